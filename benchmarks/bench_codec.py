@@ -0,0 +1,112 @@
+"""Compare EncryptionCodec payload sizes and throughput with and without compression,
+then inline against thread-pool encoding across payload sizes.
+
+Payloads are synthetic agent input histories: user questions, tool calls and Slack
+search dumps serialized as JSON, the bulk of what ConversationWorkflow stores. The
+offload table also reports the longest event-loop stall seen by a 1ms ticker while
+batches are encoded, which is what other workflow tasks on the worker wait behind.
+
+    uv run python -m benchmarks.bench_codec --turns 20 --rounds 50 --batch 8
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from temporalio.api.common.v1 import Payload
+
+from temporal.codec import EncryptionCodec, zstandard
+
+WORDS = ("deploy rollback failed staging worker pool customer timeout cache fixed release "
+         "certificate expired production incident channel thread reply approved").split()
+
+
+def make_history(turns: int, seed: int = 7) -> Payload:
+    rng = random.Random(seed)
+    items = []
+    for turn in range(turns):
+        items.append({"content": f"What happened with the {rng.choice(WORDS)} last week?", "role": "user"})
+        items.append({"type": "function_call", "call_id": f"call_{turn}", "name": "search_slack", "arguments": json.dumps({"query": rng.choice(WORDS)})})
+        matches = "\n\n".join(
+            f"{i}. #support-acme - User {rng.randint(1, 20)} (2024-01-0{rng.randint(1, 9)} 10:00)\n"
+            f"   {' '.join(rng.choice(WORDS) for _ in range(30))}\n"
+            f"   Link: https://acme.slack.com/archives/C0{rng.randint(100, 999)}/p{rng.randint(10**15, 10**16)}"
+            for i in range(1, 41)
+        )
+        items.append({"type": "function_call_output", "call_id": f"call_{turn}", "output": matches})
+        items.append({"type": "message", "role": "assistant", "content": [{"type": "output_text", "text": " ".join(rng.choice(WORDS) for _ in range(200))}]})
+    return Payload(metadata={"encoding": b"json/plain"}, data=json.dumps(items).encode())
+
+
+async def measure(codec: EncryptionCodec, payload: Payload, rounds: int) -> tuple[int, float, float]:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        encoded = await codec.encode([payload])
+    encode_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await codec.decode(encoded)
+    decode_elapsed = time.perf_counter() - start
+    return len(encoded[0].SerializeToString()), encode_elapsed, decode_elapsed
+
+
+async def measure_offload(codec: EncryptionCodec, payloads: list[Payload], rounds: int) -> tuple[float, float]:
+    """Seconds to encode and decode rounds batches, and the longest event-loop stall in ms."""
+    stall = 0.0
+    done = False
+
+    async def ticker() -> None:
+        nonlocal stall
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            stall = max(stall, now - last - 0.001)
+            last = now
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await codec.decode(await codec.encode(payloads))
+        await asyncio.sleep(0)  # let the ticker see each batch separately
+    elapsed = time.perf_counter() - start
+    done = True
+    await task
+    return elapsed, stall * 1000
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=20, help="conversation turns in the history payload")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=8, help="payloads per encode call in the offload table")
+    parser.add_argument("--workers", type=int, default=4, help="offload thread pool size")
+    args = parser.parse_args()
+
+    payload = make_history(args.turns)
+    size = payload.ByteSize()
+    compressions = ["none", "zlib"] + (["zstd"] if zstandard else [])
+
+    print(f"{size / 1024:.0f} KiB history payload, {args.rounds} rounds")
+    print(f"{'compression':<13}{'wire bytes':>12}{'ratio':>8}{'encode MB/s':>14}{'decode MB/s':>14}")
+    for compression in compressions:
+        codec = EncryptionCodec(b"0" * 32, compression=compression)
+        wire, encode_elapsed, decode_elapsed = await measure(codec, payload, args.rounds)
+        megabytes = size * args.rounds / 1e6
+        print(f"{compression:<13}{wire:>12}{size / wire:>8.1f}{megabytes / encode_elapsed:>14.1f}{megabytes / decode_elapsed:>14.1f}")
+
+
+    print(f"\nbatches of {args.batch} payloads, zlib, offload pool of {args.workers}")
+    print(f"{'turns':>6}{'KiB each':>10}{'mode':>9}{'batches/s':>12}{'max stall ms':>15}")
+    for turns in (1, 5, 20, 80):
+        payloads = [make_history(turns, seed=i) for i in range(args.batch)]
+        for mode, threshold in (("inline", None), ("offload", 0)):
+            codec = EncryptionCodec(b"0" * 32, compression="zlib", offload_threshold=threshold, offload_workers=args.workers)
+            elapsed, stall = await measure_offload(codec, payloads, args.rounds)
+            print(f"{turns:>6}{payloads[0].ByteSize() / 1024:>10.0f}{mode:>9}{args.rounds / elapsed:>12.1f}{stall:>15.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""Measure time to first result for the with_judge pipeline.
+
+Runs ConversationWorkflow on a local Temporal dev server with TestModel standing in
+for the LLM and a post_to_slack activity that takes --post-latency seconds. Status
+posts run in the background, so the final report should land roughly one post
+latency after the executor finishes instead of one per status post.
+
+    uv run python -m benchmarks.bench_judge_latency --runs 5 --post-latency 0.3
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from temporalio import activity
+from temporalio.client import Client
+from temporalio.contrib.openai_agents import OpenAIAgentsPlugin, TestModelProvider
+from temporalio.contrib.pydantic import pydantic_data_converter
+from temporalio.testing import WorkflowEnvironment
+from temporalio.worker import Worker
+
+from research_agents.tools import FindChannelsRequest
+from temporal.activities import PostToSlackInput
+from temporal.workflow import ConversationWorkflow, ProcessUserMessageInput
+from tests.test_models import MultiAgentTestModel
+
+FINAL_REPORT = "my summary is blah"
+
+
+async def run_once(client: Client, post_latency: float) -> tuple[float, float, int]:
+    """Seconds to the first post and to the final report, and the number of posts."""
+    posts: List[float] = []
+    report = asyncio.Event()
+
+    @activity.defn(name="post_to_slack")
+    async def post_to_slack(input: PostToSlackInput) -> None:
+        await asyncio.sleep(post_latency)
+        posts.append(time.perf_counter())
+        if input.message.startswith(FINAL_REPORT):
+            report.set()
+
+    @activity.defn(name="find_relevant_channels")
+    async def find_relevant_channels(request: FindChannelsRequest) -> List[Dict[str, Any]]:
+        return []
+
+    config = client.config()
+    config["plugins"] = [OpenAIAgentsPlugin(model_provider=TestModelProvider(MultiAgentTestModel()))]
+    client = Client(**config)
+    async with Worker(
+        client,
+        task_queue=str(uuid.uuid4()),
+        workflows=[ConversationWorkflow],
+        activity_executor=ThreadPoolExecutor(5),
+        activities=[post_to_slack, find_relevant_channels],
+    ) as worker:
+        handle = await client.start_workflow(ConversationWorkflow.run, "with_judge", id=str(uuid.uuid4()), task_queue=worker.task_queue)
+        start = time.perf_counter()
+        await handle.signal(ConversationWorkflow.process_user_message, ProcessUserMessageInput(
+            user_input="test message", channel_id="C123456", thread_ts="123.456"
+        ))
+        await asyncio.wait_for(report.wait(), timeout=60)
+        await handle.terminate()
+    return posts[0] - start, posts[-1] - start, len(posts)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--post-latency", type=float, default=0.3, help="simulated post_to_slack duration in seconds")
+    args = parser.parse_args()
+
+    env = await WorkflowEnvironment.start_local()
+    try:
+        config = env.client.config()
+        config["data_converter"] = pydantic_data_converter
+        client = Client(**config)
+        timings = [await run_once(client, args.post_latency) for _ in range(args.runs)]
+    finally:
+        await env.shutdown()
+
+    posts = timings[0][2]
+    print(f"{args.runs} runs, {posts} Slack posts each, {args.post_latency * 1000:.0f}ms per post")
+    print(f"{'':<22}{'median (s)':>12}{'max (s)':>10}")
+    for label, values in (("first post", [t[0] for t in timings]), ("final report", [t[1] for t in timings])):
+        values = sorted(values)
+        print(f"{label:<22}{values[len(values) // 2]:>12.2f}{values[-1]:>10.2f}")
+    print(f"posting every status message in sequence would add about {(posts - 1) * args.post_latency:.2f}s to the final report")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""Compare search_slack throughput for the sync (thread pool) and async activity modes.
+
+Slack is replaced by a fake client with a fixed round-trip latency, so the numbers
+measure how many in-flight searches each mode sustains rather than Slack itself.
+The search cache is turned off and every search has its own query, so each one
+reaches the fake client.
+
+    uv run python -m benchmarks.bench_slack_activities --requests 2000 --latency 0.2
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from research_agents.tools import search_slack, SlackSearchRequest
+from research_agents.async_tools import search_slack_async
+
+RESPONSE = {
+    "messages": {
+        "matches": [{"username": "user1", "channel": {"name": "general"}, "text": "Hello world", "ts": "1234567890.000000"}],
+        "total": 1,
+        "pagination": {},
+    }
+}
+
+
+class FakeSyncClient:
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+
+    def search_messages(self, **kwargs):
+        time.sleep(self.latency)
+        return RESPONSE
+
+
+class FakeAsyncClient:
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+
+    async def search_messages(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        return RESPONSE
+
+
+def search_requests(count: int) -> list[SlackSearchRequest]:
+    return [SlackSearchRequest(query=f"release notes {i}") for i in range(count)]
+
+
+async def run_sync(requests: int, latency: float, threads: int) -> float:
+    loop = asyncio.get_running_loop()
+    with patch("research_agents.tools.get_slack_client", return_value=FakeSyncClient(latency)), \
+            patch("research_agents.tools.search_cache", None):
+        with ThreadPoolExecutor(threads) as executor:
+            start = time.perf_counter()
+            await asyncio.gather(*[loop.run_in_executor(executor, search_slack, request) for request in search_requests(requests)])
+            return time.perf_counter() - start
+
+
+async def run_async(requests: int, latency: float) -> float:
+    with patch("research_agents.async_tools.get_async_slack_client", return_value=FakeAsyncClient(latency)), \
+            patch("research_agents.tools.search_cache", None):
+        start = time.perf_counter()
+        await asyncio.gather(*[search_slack_async(request) for request in search_requests(requests)])
+        return time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.2, help="simulated Slack round-trip in seconds")
+    parser.add_argument("--threads", type=int, default=100, help="sync activity executor size (worker default)")
+    args = parser.parse_args()
+
+    sync_elapsed = await run_sync(args.requests, args.latency, args.threads)
+    async_elapsed = await run_async(args.requests, args.latency)
+
+    print(f"{args.requests} searches, {args.latency * 1000:.0f}ms simulated latency")
+    print(f"{'mode':<8}{'elapsed (s)':>14}{'searches/s':>14}")
+    print(f"{'sync':<8}{sync_elapsed:>14.2f}{args.requests / sync_elapsed:>14.1f}")
+    print(f"{'async':<8}{async_elapsed:>14.2f}{args.requests / async_elapsed:>14.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
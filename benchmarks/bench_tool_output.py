@@ -0,0 +1,82 @@
+"""Compare tokens per match for the verbose and compact search_slack output formats.
+
+Matches are synthetic but shaped like search.messages results (a few busy channels,
+a handful of authors, full permalinks and mixed message lengths). Tokens are counted
+with tiktoken when it is installed, otherwise estimated at four characters per token.
+
+    uv run python -m benchmarks.bench_tool_output --matches 20 --budget 1500
+"""
+import argparse
+import random
+from unittest.mock import patch
+
+from research_agents.compact import estimate_tokens, split_references
+from research_agents.tool_logic import format_search_results, SlackSearchResult
+
+CHANNELS = ["support-acme", "eng-releases", "incidents", "general", "product-feedback"]
+USERS = ["Alice Chen", "Bob Martinez", "Priya Natarajan", "Sam O'Neill", "Jordan Lee", "Kenji Watanabe"]
+WORDS = ("the deploy rollback failed on staging again after we bumped the worker pool "
+         "customer reported timeouts :eyes: looks like the cache :white_check_mark: fixed "
+         "in 1.4.2 <@U024BE7LH> can you take a look at https://status.example.com").split()
+
+
+def make_matches(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    now = 1704283200.0
+    matches = []
+    for i in range(count):
+        channel = rng.choice(CHANNELS)
+        ts = f"{now - rng.randint(60, 90 * 86400):.6f}"
+        matches.append({
+            "channel": {"id": f"C0{CHANNELS.index(channel)}ABCDEF", "name": channel},
+            "username": rng.choice(USERS),
+            "ts": ts,
+            "text": " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 80))),
+            "permalink": f"https://acme.slack.com/archives/C0{CHANNELS.index(channel)}ABCDEF/p{ts.replace('.', '')}",
+        })
+    return matches
+
+
+def token_counter():
+    try:
+        import tiktoken
+        # The encoding is downloaded on first use, so this fails offline too
+        encoding = tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return estimate_tokens, "estimated"
+    return (lambda text: len(encoding.encode(text))), "tiktoken o200k_base"
+
+
+def render(result: SlackSearchResult, output_format: str, budget: int) -> str:
+    with patch("research_agents.tools.settings.tool_output_format", output_format), \
+            patch("research_agents.tools.settings.tool_output_token_budget", budget):
+        # The references block is stripped before the model sees compact output
+        return split_references(format_search_results(result))[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=20)
+    parser.add_argument("--budget", type=int, default=1500, help="compact output token budget")
+    args = parser.parse_args()
+
+    matches = make_matches(args.matches)
+    result = SlackSearchResult(matches=matches, total=len(matches), query="deploy rollback", has_more=False)
+    count_tokens, method = token_counter()
+
+    print(f"{args.matches} matches, compact budget {args.budget} tokens ({method})")
+    print(f"{'format':<10}{'tokens':>10}{'shown':>8}{'tokens/match':>15}")
+    for output_format in ("verbose", "compact"):
+        text = render(result, output_format, args.budget)
+        tokens = count_tokens(text)
+        shown = args.matches - _cut_count(text)
+        print(f"{output_format:<10}{tokens:>10}{shown:>8}{tokens / max(shown, 1):>15.1f}")
+
+
+def _cut_count(text: str) -> int:
+    last = text.rsplit("\n", 1)[-1]
+    return int(last[2:].split(" ", 1)[0]) if last.startswith("(+") else 0
+
+
+if __name__ == "__main__":
+    main()
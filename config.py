@@ -9,6 +9,35 @@ class Settings(BaseSettings):
     slack_bot_token: str = ""
     slack_app_token: str = ""
     slack_user_token: str = ""
+    slack_rate_limit_enabled: bool = True
+    slack_max_retries: int = 2
+    slack_client_mode: str = "sync"  # "sync" (thread pool) or "async" (AsyncWebClient on the event loop)
+    slack_http_pool_size: int = 100
+    channel_directory_ttl_seconds: int = 3600
+    user_directory_ttl_seconds: int = 6 * 3600
+    search_fanout_concurrency: int = 4
+    search_cache_enabled: bool = True
+    search_cache_ttl_seconds: int = 900
+    search_cache_max_entries: int = 1000
+    search_cache_path: str = ""  # SQLite file to keep cached searches across restarts
+    search_refine_enabled: bool = True  # rerank matches against the query and fold threads and near-duplicates
+    thread_cache_max_entries: int = 500  # 0 disables the thread cache
+    thread_fanout_concurrency: int = 8
+    user_fanout_concurrency: int = 8  # users.info calls in flight when resolving names on the async path
+    search_backend: str = "slack"  # "slack", "mirror", or "auto" (mirror for channel-scoped searches dated inside its synced window)
+    mirror_path: str = ""  # SQLite file for the local message mirror; empty disables it
+    mirror_channels: str = ""  # comma-separated channel names to mirror
+    mirror_sync_interval_seconds: int = 300
+    mirror_history_days: int = 90
+    mirror_thread_refresh_days: int = 7  # threads started this recently are checked for new replies on every sync
+    mirror_full_sync_interval_seconds: int = 86400  # how often the whole history window is re-listed for late replies
+    mirror_rate_limit_share: float = 0.25  # share of each Slack method's budget the indexer paces itself to
+    semantic_search_enabled: bool = False  # embeds mirrored messages; needs mirror_path
+    embedding_backend: str = "hashing"  # "hashing" (local, no model) or "openai"
+    embedding_model: str = "text-embedding-3-small"
+    embedding_dimension: int = 256  # hashing backend only
+    tool_output_format: str = "verbose"  # "verbose" or "compact" (short refs instead of permalinks, token budget)
+    tool_output_token_budget: int = 1500
 
     # Temporal settings
     temporal_namespace: str = "default"
@@ -17,12 +46,36 @@ class Settings(BaseSettings):
     temporal_ui_url: str = "http://localhost:8233"
     temporal_task_queue: str = "slack-agent-task-queue"
     temporal_codec_key: bytes = "" # must be 32 bytes
+    temporal_codec_compression: str = "none"  # "none", "zlib" or "zstd" (needs zstandard); compressed before encryption
+    temporal_codec_compression_threshold: int = 1024  # bytes
+    temporal_codec_offload_threshold: int = 0  # batches of at least this many bytes are encoded on a thread pool; 0 keeps them inline
+    temporal_codec_offload_workers: int = 4
     temporal_enable_telemetry: bool = False
+    chat_history_max_bytes: int = 32_000  # workflow details shown in the Temporal UI
+    chat_history_tool_preview_chars: int = 500
+    memory_max_tokens: int = 20_000  # summarize older turns once the agent input grows past this
+    memory_keep_turns: int = 2  # latest user turns kept verbatim
+    memory_tool_preview_chars: int = 300
 
     # LLM settings
-    model_name: str = "gpt-4o"
-    eval_model_name: str = "gpt-4o"
+    model_name: str = "gpt-4o"  # strong model: reports and anything not routed elsewhere
+    eval_model_name: str = ""  # plan judge; empty follows fast_model_name
+    fast_model_name: str = ""  # e.g. "gpt-4o-mini" for planning, search tool turns and summaries; empty uses model_name
+    # Per-agent overrides; empty follows the defaults above
+    plan_model_name: str = ""
+    execution_model_name: str = ""
+    report_model_name: str = ""
+    combined_model_name: str = ""
+    summary_model_name: str = ""
+    escalate_failed_plans: bool = True  # replan with model_name when a plan from a cheaper model fails review
     research_mode: str = "with_judge"
+    speculative_search_enabled: bool = False  # search the plan's keyword groups while the judge reviews it
+    structured_execution_enabled: bool = False  # the workflow runs the plan's searches; one model call writes the report
+    plan_prejudge_enabled: bool = False  # plans that meet every checkable review rule skip the LLM judge
+    plan_cache_enabled: bool = False  # reuse reviewed plans for first questions that match an earlier one
+    plan_cache_ttl_seconds: int = 24 * 3600
+    plan_cache_max_entries: int = 200
+    plan_cache_min_similarity: float = 0.9  # cosine similarity with embedding_backend; exact matches after normalizing always hit
 
     # Misc
     log_level: str = "INFO"
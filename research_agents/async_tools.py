@@ -0,0 +1,332 @@
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional
+
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web.async_client import AsyncWebClient
+from temporalio import activity, workflow
+from temporalio.exceptions import ApplicationError
+
+from research_agents.tools import (
+    GetChannelsRequest,
+    FindChannelsRequest,
+    SlackSearchRequest,
+    SlackSearchBatchRequest,
+    SemanticSearchRequest,
+    ThreadInput,
+    GetThreadsRequest,
+    GetUserNameRequest,
+    GetUserNamesRequest,
+    cache_search_response,
+    cached_search_response,
+    cached_thread,
+    is_current,
+    run_semantic_search,
+    search_mirror,
+    store_thread,
+    validate_semantic_search_request,
+)
+
+with workflow.unsafe.imports_passed_through():
+    from config import settings
+    from research_agents.slack_client import get_shared_async_web_client
+    from research_agents.directory import (
+        channel_directory,
+        alist_all_channels,
+        user_directory,
+        alist_all_users,
+        _next_cursor,
+    )
+    from research_agents.search_cache import cache_key
+    from research_agents.tool_logic import (
+        SEARCH_PAGE_SIZE,
+        SlackSearchResult,
+        apply_user_names,
+        build_search_query,
+        cached_user_names,
+        fit_thread_budget,
+        format_batch_results,
+        format_search_results,
+        format_thread_messages,
+        format_threads,
+        merge_batch_matches,
+        merge_fetched_users,
+        merge_search_pages,
+        message_user_ids,
+        parse_thread_url,
+        rank_channels,
+        refine_matches,
+        remaining_search_pages,
+        replies_page_args,
+        simplify_channels,
+        thread_batch_messages,
+        to_search_result,
+        user_info_record,
+        validate_find_channels_request,
+        validate_get_threads_request,
+        validate_search_batch_request,
+        validate_search_request,
+    )
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Async variants of the tool activities in research_agents.tools. They register under
+# the same activity names, so agents keep using the sync definitions as tool schemas
+# and the worker picks which implementation runs via settings.slack_client_mode.
+
+@activity.defn(name="get_slack_channels")
+async def get_slack_channels_async(request: GetChannelsRequest) -> List[Dict[str, Any]]:
+    try:
+        client = get_async_slack_client()
+        channels = await channel_directory.aget(lambda: alist_all_channels(client))
+        return simplify_channels(channels, request.include_archived)
+    except SlackApiError as e:
+        logger.error(f"Slack API error: {e.response['error']}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error retrieving Slack channels: {str(e)}")
+        raise
+
+@activity.defn(name="find_relevant_channels")
+async def find_relevant_channels_async(request: FindChannelsRequest) -> List[Dict[str, Any]] | str:
+    error = validate_find_channels_request(request)
+    if error:
+        return error
+
+    try:
+        client = get_async_slack_client()
+        channels = await channel_directory.aget(lambda: alist_all_channels(client))
+        return rank_channels(channels, request)
+    except SlackApiError as e:
+        logger.error(f"Slack API error: {e.response['error']}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error ranking Slack channels: {str(e)}")
+        raise
+
+@activity.defn(name="search_slack")
+async def search_slack_async(request: SlackSearchRequest) -> SlackSearchResult | str:
+    error = validate_search_request(request)
+    if error:
+        return error
+
+    try:
+        client = get_async_slack_client()
+        result = await _run_search(client, request)
+        result.matches = refine_matches(result.matches, request.query)
+        if request.resolve_user_names:
+            await _enrich_user_names(client, result.matches, name_field="username")
+        return format_search_results(result)
+    except SlackApiError as e:
+        logger.error(f"Slack API error during search: {e.response['error']}")
+        return f"Slack API error: {e.response['error']}"
+    except ApplicationError:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error during Slack search: {str(e)}")
+        return f"Error searching Slack: {str(e)}"
+
+@activity.defn(name="search_slack_batch")
+async def search_slack_batch_async(request: SlackSearchBatchRequest) -> str:
+    error = validate_search_batch_request(request)
+    if error:
+        return error
+
+    try:
+        client = get_async_slack_client()
+        semaphore = asyncio.Semaphore(settings.search_fanout_concurrency)
+
+        async def run(search: SlackSearchRequest) -> SlackSearchResult | str:
+            async with semaphore:
+                try:
+                    return await _run_search(client, search)
+                except SlackApiError as e:
+                    logger.error(f"Slack API error during batch search: {e.response['error']}")
+                    return f"Slack API error: {e.response['error']}"
+
+        results = await asyncio.gather(*[run(search) for search in request.requests])
+        matches = refine_matches(merge_batch_matches(results), " ".join(search.query for search in request.requests))
+        if any(search.resolve_user_names for search in request.requests):
+            await _enrich_user_names(client, matches, name_field="username")
+        return format_batch_results(results, matches)
+    except SlackApiError as e:
+        logger.error(f"Slack API error during batch search: {e.response['error']}")
+        return f"Slack API error: {e.response['error']}"
+    except ApplicationError:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error during Slack batch search: {str(e)}")
+        return f"Error searching Slack: {str(e)}"
+
+@activity.defn(name="semantic_search_slack")
+async def semantic_search_slack_async(request: SemanticSearchRequest) -> str:
+    error = validate_semantic_search_request(request)
+    if error:
+        return error
+
+    try:
+        # Embedding the query may call a model API, so keep it off the event loop
+        result = await asyncio.to_thread(run_semantic_search, request)
+        result.matches = refine_matches(result.matches, None)
+        if request.resolve_user_names:
+            await _enrich_user_names(get_async_slack_client(), result.matches, name_field="username")
+        return format_search_results(result)
+    except SlackApiError as e:
+        logger.error(f"Slack API error during semantic search: {e.response['error']}")
+        return f"Slack API error: {e.response['error']}"
+    except ApplicationError:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error during semantic search: {str(e)}")
+        return f"Error searching Slack: {str(e)}"
+
+@activity.defn(name="get_thread_messages")
+async def get_thread_messages_async(params: ThreadInput) -> List[Dict[str, Any]]:
+    try:
+        channel_id, thread_ts = parse_thread_url(params.thread_url)
+        client = get_async_slack_client()
+        messages = [dict(msg) for msg in await _fetch_thread(client, channel_id, thread_ts)]
+        if params.resolve_user_names:
+            await _enrich_user_names(client, messages, name_field="user")
+        return fit_thread_budget(format_thread_messages(messages), params.max_chars, params.query)
+    except SlackApiError as e:
+        logger.error(f"Slack API error: {e.response['error']}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error retrieving thread messages: {str(e)}")
+        raise
+
+@activity.defn(name="get_threads")
+async def get_threads_async(request: GetThreadsRequest) -> Dict[str, List[Dict[str, Any]] | str] | str:
+    error = validate_get_threads_request(request)
+    if error:
+        return error
+
+    try:
+        client = get_async_slack_client()
+        semaphore = asyncio.Semaphore(settings.thread_fanout_concurrency)
+
+        async def fetch(thread_url: str) -> List[Dict[str, Any]] | str:
+            try:
+                channel_id, thread_ts = parse_thread_url(thread_url)
+                async with semaphore:
+                    return [dict(msg) for msg in await _fetch_thread(client, channel_id, thread_ts)]
+            except ValueError as e:
+                return str(e)
+            except SlackApiError as e:
+                logger.error(f"Slack API error retrieving thread {thread_url}: {e.response['error']}")
+                return f"Slack API error: {e.response['error']}"
+
+        thread_urls = list(dict.fromkeys(request.thread_urls))
+        threads = dict(zip(thread_urls, await asyncio.gather(*[fetch(thread_url) for thread_url in thread_urls])))
+        if request.resolve_user_names:
+            await _enrich_user_names(client, thread_batch_messages(threads), name_field="user")
+        return format_threads(threads, request)
+    except SlackApiError as e:
+        logger.error(f"Slack API error retrieving threads: {e.response['error']}")
+        return f"Slack API error: {e.response['error']}"
+    except ApplicationError:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error retrieving threads: {str(e)}")
+        return f"Error retrieving threads: {str(e)}"
+
+@activity.defn(name="get_user_name")
+async def get_user_name_async(request: GetUserNameRequest) -> str:
+    try:
+        client = get_async_slack_client()
+        return (await _resolve_user_names(client, [request.user_id]))[request.user_id]
+    except SlackApiError:
+        logger.error(f"Failed to get user info for ID {request.user_id}")
+        return request.user_id
+
+@activity.defn(name="get_user_names")
+async def get_user_names_async(request: GetUserNamesRequest) -> Dict[str, str]:
+    try:
+        client = get_async_slack_client()
+        return await _resolve_user_names(client, request.user_ids)
+    except SlackApiError as e:
+        logger.error(f"Slack API error resolving user names: {e.response['error']}")
+        return {user_id: user_id for user_id in request.user_ids}
+
+async def _run_search(client: AsyncWebClient, request: SlackSearchRequest) -> SlackSearchResult:
+    search_query = build_search_query(request)
+    # The mirror and the search cache are SQLite behind a lock, so they're kept off the event loop
+    mirrored = await asyncio.to_thread(search_mirror, request, search_query)
+    if mirrored is not None:
+        return mirrored
+    logger.debug(f"Executing Slack search with query: '{search_query}'")
+    if request.max_results:
+        return await _search_all_pages(client, search_query, request)
+    response = await _search_messages(client, search_query, request.sort, request.count)
+    return to_search_result(search_query, response)
+
+async def _search_messages(client: AsyncWebClient, search_query: str, sort: str, count: int, page: int = 1) -> Dict[str, Any]:
+    key = cache_key(search_query, sort, count, page)
+    cached = await asyncio.to_thread(cached_search_response, key)
+    if cached is not None:
+        return cached
+    response = await client.search_messages(query=search_query, sort=sort, count=count, page=page)
+    return await asyncio.to_thread(cache_search_response, key, response)
+
+async def _search_all_pages(client: AsyncWebClient, search_query: str, request: SlackSearchRequest) -> SlackSearchResult:
+    first = await _search_messages(client, search_query, request.sort, SEARCH_PAGE_SIZE, page=1)
+    semaphore = asyncio.Semaphore(settings.search_fanout_concurrency)
+
+    async def fetch(page: int) -> Dict[str, Any]:
+        async with semaphore:
+            return await _search_messages(client, search_query, request.sort, SEARCH_PAGE_SIZE, page=page)
+
+    pages = remaining_search_pages(first, request.max_results)
+    responses = [first, *await asyncio.gather(*[fetch(page) for page in pages])]
+    return merge_search_pages(search_query, responses, request.max_results)
+
+async def _fetch_thread(client: AsyncWebClient, channel_id: str, thread_ts: str) -> List[Dict[str, Any]]:
+    key = (channel_id, thread_ts)
+    cached = cached_thread(key)
+    if cached is not None:
+        head = await client.conversations_replies(channel=channel_id, ts=thread_ts, limit=1)
+        if is_current(cached, head):
+            logger.debug(f"Serving thread {channel_id}/{thread_ts} from cache")
+            return cached.messages
+
+    pages = []
+    cursor = None
+    while True:
+        response = await client.conversations_replies(**replies_page_args(channel_id, thread_ts, cursor))
+        pages.append(response.get("messages", []))
+        cursor = _next_cursor(response)
+        if not cursor:
+            return store_thread(key, pages)
+
+async def _enrich_user_names(client: AsyncWebClient, messages: List[Dict[str, Any]], name_field: str) -> None:
+    user_ids = message_user_ids(messages)
+    if not user_ids:
+        return
+    try:
+        apply_user_names(messages, await _resolve_user_names(client, user_ids), name_field)
+    except SlackApiError as e:
+        logger.warning(f"Leaving user IDs unresolved: {e.response['error']}")
+
+async def _resolve_user_names(client: AsyncWebClient, user_ids: List[str]) -> Dict[str, str]:
+    users = await user_directory.aget(lambda: alist_all_users(client))
+    names, missing = cached_user_names(users, user_ids)
+    semaphore = asyncio.Semaphore(settings.user_fanout_concurrency)
+
+    async def fetch(user_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            async with semaphore:
+                return user_info_record(user_id, await client.users_info(user=user_id))
+        except SlackApiError:
+            logger.error(f"Failed to get user info for ID {user_id}")
+            names[user_id] = user_id
+            return None
+
+    records = await asyncio.gather(*[fetch(user_id) for user_id in missing])
+    return merge_fetched_users(names, {record["id"]: record for record in records if record})
+
+def get_async_slack_client() -> AsyncWebClient:
+    if not settings.slack_user_token or not settings.slack_user_token.startswith("xoxp-"):
+        raise ValueError("slack_user_token is required and must be a user token")
+    return get_shared_async_web_client(settings.slack_user_token)
@@ -1,19 +1,24 @@
 from datetime import datetime, timedelta
-from temporalio import workflow
+from typing import Optional
+
 from temporalio.contrib.openai_agents import workflow as agent_workflow
 
 from agents import Agent, WebSearchTool
 from research_agents.tools import (
-    get_slack_channels,
+    find_relevant_channels,
     search_slack,
+    search_slack_batch,
     get_thread_messages,
-    get_user_name,
+    get_threads,
+    get_user_names,
+    semantic_search_tools,
+    SEMANTIC_SEARCH_HINT,
+    COMPACT_OUTPUT_HINT,
 )
+from research_agents.compact import with_references
+from research_agents.routing import model_for
 
-with workflow.unsafe.imports_passed_through():
-    from config import settings
-
-def get_combined_prompt(now: datetime) -> str:
+def get_combined_prompt(now: datetime, semantic_search: bool = False, compact_output: bool = False) -> str:
     return f"""
 You work as a comprehensive Slack research agent that both plans and executes searches in a company's internal Slack conversations.
 
@@ -25,7 +30,7 @@ PHASE 1: PLANNING
 - For support/tickets, treat each thread in support channels as a ticket
 
 2. Channel Discovery & Selection
-- Retrieve available Slack channels
+- Find candidate channels with find_relevant_channels using the question and keyword groups
 - Select relevant channels based on query context
 - For customer queries, prioritize channels prefixed with support-
 
@@ -40,11 +45,13 @@ PHASE 2: EXECUTION
 - Execute targeted searches in selected channels
 - Use refined keyword groups
 - Show keywords and channels used
-
+- Prefer running the global and channel-specific searches together in one search_slack_batch call
+{SEMANTIC_SEARCH_HINT if semantic_search else ""}
 5. Analysis & Reporting
 - Analyze results from both searches
-- Use get_user_name for proper user identification
-- Format as Markdown report under 4000 characters with:
+- Expand several threads with one get_threads call rather than one get_thread_messages call each
+- Results already show display names; resolve any remaining raw user IDs with one get_user_names call
+{COMPACT_OUTPUT_HINT if compact_output else ""}- Format as Markdown report under 4000 characters with:
   - Summary of findings
   - Examples with formatted links
   - Important decisions/actions
@@ -56,16 +63,19 @@ Always assume searching internal Slack workspace. Present final analysis in stru
 Current date and time: {now.isoformat()}
 """
 
-def init_combined_agent(now: datetime):
+def init_combined_agent(now: datetime, model: Optional[str] = None, semantic_search: bool = False, compact_output: bool = False):
     return Agent(
         name="Combined Research Agent",
-        instructions=get_combined_prompt(now),
+        instructions=get_combined_prompt(now, semantic_search, compact_output),
         tools=[
             WebSearchTool(),
-            agent_workflow.activity_as_tool(get_slack_channels, start_to_close_timeout=timedelta(seconds=10)),
-            agent_workflow.activity_as_tool(search_slack, start_to_close_timeout=timedelta(seconds=10)),
+            agent_workflow.activity_as_tool(find_relevant_channels, start_to_close_timeout=timedelta(seconds=10)),
+            with_references(agent_workflow.activity_as_tool(search_slack, start_to_close_timeout=timedelta(seconds=10))),
+            with_references(agent_workflow.activity_as_tool(search_slack_batch, start_to_close_timeout=timedelta(seconds=30))),
+            *semantic_search_tools(semantic_search),
             agent_workflow.activity_as_tool(get_thread_messages, start_to_close_timeout=timedelta(seconds=10)),
-            agent_workflow.activity_as_tool(get_user_name, start_to_close_timeout=timedelta(seconds=10)),
+            agent_workflow.activity_as_tool(get_threads, start_to_close_timeout=timedelta(seconds=30)),
+            agent_workflow.activity_as_tool(get_user_names, start_to_close_timeout=timedelta(seconds=10)),
         ],
-        model=settings.model_name,
+        model=model or model_for("combined"),
     )
\ No newline at end of file
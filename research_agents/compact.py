@@ -0,0 +1,152 @@
+import base64
+import dataclasses
+import hashlib
+import json
+import math
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents import FunctionTool, RunContextWrapper
+
+# Compact tool outputs end with this line followed by a JSON object of ref -> permalink.
+# The workflow strips it before the model sees the output.
+REFERENCES_MARKER = "\n<<references>>"
+# Links written as [label](ref:abc12) in agent output
+REFERENCE_LINK = re.compile(r"\(ref:([a-z2-7]{5})\)")
+# Whitespace runs, including newlines inside a message
+WHITESPACE = re.compile(r"\s+")
+# Joiners and variation selectors that would dangle after a cut
+DANGLING = "\u200d\ufe0e\ufe0f"
+
+# Longest text kept per match before the budget is considered
+COMPACT_MATCH_CHARS = 240
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting; about four characters per token for English text."""
+    return math.ceil(len(text) / 4)
+
+
+def clip_text(text: str, limit: int) -> str:
+    """Cut text to at most limit characters, at a word boundary when one is close.
+
+    Cutting at a space also keeps :emoji: shortcodes, links and mentions whole.
+    """
+    if len(text) <= limit:
+        return text
+    clipped = text[:max(limit - 1, 0)]
+    space = clipped.rfind(" ")
+    # A cut inside an :emoji:, <link> or <@mention> backs off to the word before it
+    if space > limit // 2 or (space > 0 and clipped[space + 1:space + 2] in (":", "<")):
+        clipped = clipped[:space]
+    return clipped.rstrip().rstrip(DANGLING) + "…"
+
+
+def short_ref(match: Dict[str, Any]) -> str:
+    """Stable five-character id for a message, so a message found twice keeps its ref."""
+    channel = match.get("channel") or {}
+    key = match.get("permalink") or f"{channel.get('id') or channel.get('name')}/{match.get('ts')}"
+    return base64.b32encode(hashlib.blake2b(key.encode(), digest_size=5).digest()).decode().lower()[:5]
+
+
+def relative_age(ts: Optional[str], now: float) -> str:
+    try:
+        seconds = max(now - float(ts), 0)
+    except (TypeError, ValueError):
+        return "?"
+    for unit, size in (("y", 365 * 86400), ("w", 7 * 86400), ("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{int(seconds // size)}{unit}"
+    return "now"
+
+
+def folded_note(match: Dict[str, Any]) -> str:
+    """Describe the thread replies and near-duplicates folded into a match, if any."""
+    notes = []
+    if match.get("thread_matches"):
+        notes.append(f"+{match['thread_matches']} more in thread")
+    if match.get("duplicates"):
+        also_in = f", also in {', '.join('#' + channel for channel in match['also_in'])}" if match.get("also_in") else ""
+        notes.append(f"+{match['duplicates']} similar{also_in}")
+    return f" ({'; '.join(notes)})" if notes else ""
+
+
+def render_matches(header: List[str], matches: List[Dict[str, Any]], budget_tokens: int,
+                   tag: Optional[str] = None, now: Optional[float] = None) -> str:
+    """Render matches as one line each within a token budget.
+
+    Channels and users are listed once and referred to as c1, u1, ...; permalinks become
+    short refs attached after REFERENCES_MARKER. If tag is set, match[tag] (a list) is
+    shown in brackets before the text.
+    """
+    now = time.time() if now is None else now
+    channels: Dict[str, str] = {}
+    users: Dict[str, str] = {}
+    references: Dict[str, str] = {}
+    lines: List[str] = []
+    used = estimate_tokens("\n".join(header)) + 30  # room for the dictionaries' labels and the footer
+    for match in matches:
+        channel = (match.get("channel") or {}).get("name") or "unknown-channel"
+        user = match.get("username") or match.get("user") or "unknown"
+        channel_alias = channels.get(channel, f"c{len(channels) + 1}")
+        user_alias = users.get(user, f"u{len(users) + 1}")
+        ref = short_ref(match)
+        prefix = f"[{','.join(match.get(tag) or [])}] " if tag else ""
+        text = clip_text(WHITESPACE.sub(" ", match.get("text") or "").strip(), COMPACT_MATCH_CHARS)
+        line = f"{ref} {channel_alias} {user_alias} {relative_age(match.get('ts'), now)}{folded_note(match)}: {prefix}{text}"
+        cost = estimate_tokens(line)
+        cost += estimate_tokens(f" {channel_alias}=#{channel}") if channel not in channels else 0
+        cost += estimate_tokens(f" {user_alias}={user}") if user not in users else 0
+        if lines and used + cost > budget_tokens:
+            break
+        used += cost
+        channels.setdefault(channel, channel_alias)
+        users.setdefault(user, user_alias)
+        if match.get("permalink"):
+            references[ref] = match["permalink"]
+        lines.append(line)
+
+    output = list(header)
+    if lines:
+        output.append("channels: " + " ".join(f"{alias}=#{name}" for name, alias in channels.items()))
+        output.append("users: " + " ".join(f"{alias}={name}" for name, alias in users.items()))
+        output.append("ref channel user age: text")
+        output.extend(lines)
+    if len(lines) < len(matches):
+        output.append(f"(+{len(matches) - len(lines)} more matches cut to fit the output budget)")
+    return attach_references("\n".join(output), references)
+
+
+def attach_references(text: str, references: Dict[str, str]) -> str:
+    return f"{text}{REFERENCES_MARKER}{json.dumps(references)}" if references else text
+
+
+def split_references(output: str) -> Tuple[str, Dict[str, str]]:
+    text, marker, references = output.partition(REFERENCES_MARKER)
+    return (text, json.loads(references)) if marker else (output, {})
+
+
+def expand_references(text: str, references: Dict[str, str]) -> str:
+    """Replace (ref:abc12) link targets with the permalinks they stand for."""
+    return REFERENCE_LINK.sub(lambda m: f"({references[m.group(1)]})" if m.group(1) in references else m.group(0), text)
+
+
+@dataclass
+class ResearchContext:
+    """Run context shared by a workflow's agents; holds permalinks behind compact refs."""
+    references: Dict[str, str] = field(default_factory=dict)
+
+
+def with_references(tool: FunctionTool) -> FunctionTool:
+    """Strip the references block from a tool's output and keep it in the ResearchContext."""
+    invoke = tool.on_invoke_tool
+
+    async def on_invoke_tool(ctx: RunContextWrapper[Any], input: str) -> str:
+        text, references = split_references(str(await invoke(ctx, input)))
+        if references and isinstance(ctx.context, ResearchContext):
+            ctx.context.references.update(references)
+        return text
+
+    return dataclasses.replace(tool, on_invoke_tool=on_invoke_tool)
@@ -0,0 +1,226 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Coroutine, Dict, Optional
+
+from slack_sdk import WebClient
+from slack_sdk.web.async_client import AsyncWebClient
+from temporalio import workflow
+
+with workflow.unsafe.imports_passed_through():
+    from config import settings
+
+logger = logging.getLogger(__name__)
+
+Entries = Dict[str, Dict[str, Any]]
+
+# Topic and purpose are free text; keep enough to rank and describe a channel
+DESCRIPTION_MAX_CHARS = 150
+
+
+class DirectoryCache:
+    """Worker-wide in-memory snapshot of a Slack listing, keyed by Slack ID.
+
+    The first caller lists the workspace; everyone else is served from memory. Once the
+    snapshot is older than the TTL it keeps being served while a single background
+    refresh replaces it.
+    """
+
+    def __init__(self, name: str, ttl_seconds: float) -> None:
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self._entries: Entries = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+        self._pending: Optional[asyncio.Future] = None
+        self._background: Optional[asyncio.Future] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl_seconds
+
+    def entries(self) -> Entries:
+        return self._entries
+
+    def replace(self, entries: Entries) -> None:
+        with self._lock:
+            self._entries = entries
+            self._loaded_at = time.monotonic()
+            self.version += 1
+        logger.info(f"Loaded {len(entries)} entries into the {self.name} directory")
+
+    def update(self, entries: Entries) -> None:
+        """Merge individually fetched entries without resetting the snapshot's age."""
+        with self._lock:
+            self._entries = {**self._entries, **entries}
+            self.version += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = {}
+            self._loaded_at = None
+            self._refreshing = False
+            self._pending = None
+            self._background = None
+            self.version += 1
+
+    def get(self, load: Callable[[], Entries]) -> Entries:
+        if self._loaded_at is None:
+            with self._load_lock:
+                if self._loaded_at is None:
+                    self.replace(load())
+        elif self.is_stale() and self._start_refresh():
+            threading.Thread(target=self._refresh, args=(load,), daemon=True).start()
+        return self._entries
+
+    async def aget(self, load: Callable[[], Awaitable[Entries]]) -> Entries:
+        if self._loaded_at is None:
+            # Concurrent callers share a single workspace listing
+            if self._pending is None:
+                self._pending = _detached(self._load_async(load))
+            await asyncio.shield(self._pending)
+        elif self.is_stale() and self._start_refresh():
+            self._background = _detached(self._refresh_async(load))
+        return self._entries
+
+    def _start_refresh(self) -> bool:
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+            return True
+
+    def _refresh(self, load: Callable[[], Entries]) -> None:
+        try:
+            self.replace(load())
+        except Exception as e:
+            logger.warning(f"Background refresh of the {self.name} directory failed: {str(e)}")
+        finally:
+            self._refreshing = False
+
+    async def _load_async(self, load: Callable[[], Awaitable[Entries]]) -> None:
+        try:
+            self.replace(await load())
+        finally:
+            self._pending = None
+
+    async def _refresh_async(self, load: Callable[[], Awaitable[Entries]]) -> None:
+        try:
+            self.replace(await load())
+        except Exception as e:
+            logger.warning(f"Background refresh of the {self.name} directory failed: {str(e)}")
+        finally:
+            self._refreshing = False
+
+
+def _detached(coro: Coroutine[Any, Any, None]) -> asyncio.Task:
+    """Run coro as a task outside the caller's context.
+
+    Listings outlive the activity that started them, so they mustn't run under its
+    activity context (heartbeats, cancellation, the rate limiter's deadline).
+    """
+    return asyncio.get_running_loop().create_task(coro, context=contextvars.Context())
+
+
+channel_directory = DirectoryCache("channel", settings.channel_directory_ttl_seconds)
+user_directory = DirectoryCache("user", settings.user_directory_ttl_seconds)
+
+
+def _channel_record(channel: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": channel.get("id"),
+        "name": channel.get("name"),
+        "topic": (channel.get("topic") or {}).get("value", "")[:DESCRIPTION_MAX_CHARS],
+        "purpose": (channel.get("purpose") or {}).get("value", "")[:DESCRIPTION_MAX_CHARS],
+        "is_archived": channel.get("is_archived", False),
+    }
+
+
+def _channels_page_args(cursor: Optional[str]) -> Dict[str, Any]:
+    # Archived channels are listed too and filtered in memory, so one directory serves both views
+    args = {"exclude_archived": False, "types": "public_channel", "limit": 1000}
+    if cursor:
+        args["cursor"] = cursor
+    return args
+
+
+def _next_cursor(response: Dict[str, Any]) -> Optional[str]:
+    return (response.get("response_metadata") or {}).get("next_cursor") or None
+
+
+def list_all_channels(client: WebClient) -> Entries:
+    channels: Entries = {}
+    cursor = None
+    while True:
+        response = client.conversations_list(**_channels_page_args(cursor))
+        for channel in response.get("channels", []):
+            channels[channel["id"]] = _channel_record(channel)
+        cursor = _next_cursor(response)
+        if not cursor:
+            return channels
+
+
+async def alist_all_channels(client: AsyncWebClient) -> Entries:
+    channels: Entries = {}
+    cursor = None
+    while True:
+        response = await client.conversations_list(**_channels_page_args(cursor))
+        for channel in response.get("channels", []):
+            channels[channel["id"]] = _channel_record(channel)
+        cursor = _next_cursor(response)
+        if not cursor:
+            return channels
+
+
+def user_display_name(user: Dict[str, Any], user_id: str) -> str:
+    profile = user.get("profile") or {}
+    return (
+        user.get("display_name")
+        or profile.get("display_name")
+        or user.get("real_name")
+        or profile.get("real_name")
+        or user_id
+    )
+
+
+def _user_record(user: Dict[str, Any]) -> Dict[str, Any]:
+    return {"id": user.get("id"), "name": user_display_name(user, user.get("id"))}
+
+
+def _users_page_args(cursor: Optional[str]) -> Dict[str, Any]:
+    args = {"limit": 1000}
+    if cursor:
+        args["cursor"] = cursor
+    return args
+
+
+def list_all_users(client: WebClient) -> Entries:
+    users: Entries = {}
+    cursor = None
+    while True:
+        response = client.users_list(**_users_page_args(cursor))
+        for user in response.get("members", []):
+            users[user["id"]] = _user_record(user)
+        cursor = _next_cursor(response)
+        if not cursor:
+            return users
+
+
+async def alist_all_users(client: AsyncWebClient) -> Entries:
+    users: Entries = {}
+    cursor = None
+    while True:
+        response = await client.users_list(**_users_page_args(cursor))
+        for user in response.get("members", []):
+            users[user["id"]] = _user_record(user)
+        cursor = _next_cursor(response)
+        if not cursor:
+            return users
@@ -0,0 +1,87 @@
+import logging
+import zlib
+from typing import List, Optional, Protocol
+
+import numpy as np
+from openai import OpenAI
+from temporalio import workflow
+
+with workflow.unsafe.imports_passed_through():
+    from config import settings
+    from research_agents.ranking import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBackend(Protocol):
+    # Stored vectors are tagged with the name and dropped when it changes
+    name: str
+    # Cosine similarity below which a message is not considered related
+    min_similarity: float
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """One L2-normalized float32 row per text."""
+        ...
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.where(norms == 0, 1, norms)).astype(np.float32)
+
+
+class HashingEmbedder:
+    """Feature-hashed words and character trigrams, computed locally with no model.
+
+    Trigrams let "deploy", "deploys" and "deployment" overlap, which keyword search misses.
+    It is not a language model, so synonyms only match through the openai backend.
+    """
+
+    min_similarity = 0.1
+
+    def __init__(self, dimension: int) -> None:
+        self.dimension = dimension
+        self.name = f"hashing:{dimension}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                bucket = zlib.crc32(feature.encode())
+                # The top bit picks a sign so colliding features tend to cancel out
+                vectors[row, bucket % self.dimension] += -1.0 if bucket & 0x80000000 else 1.0
+        return normalize(vectors)
+
+    @staticmethod
+    def _features(text: str) -> List[str]:
+        features = []
+        for token in tokenize(text):
+            features.append(token)
+            padded = f"<{token}>"
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+
+class OpenAIEmbedder:
+    """Embeddings from the OpenAI API (OPENAI_API_KEY), for matching by meaning."""
+
+    min_similarity = 0.25
+
+    def __init__(self, model: str) -> None:
+        self.model = model
+        self.name = f"openai:{model}"
+        self._client: Optional[OpenAI] = None
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        if self._client is None:
+            self._client = OpenAI()
+        # The API rejects empty strings
+        response = self._client.embeddings.create(model=self.model, input=[text or " " for text in texts])
+        return normalize(np.array([item.embedding for item in response.data], dtype=np.float32))
+
+
+def get_embedder() -> EmbeddingBackend:
+    if settings.embedding_backend == "openai":
+        return OpenAIEmbedder(settings.embedding_model)
+    if settings.embedding_backend != "hashing":
+        logger.warning(f"Unknown embedding_backend '{settings.embedding_backend}', using hashing")
+    return HashingEmbedder(settings.embedding_dimension)
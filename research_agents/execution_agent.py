@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
-from temporalio import workflow
+from typing import Optional
+
 from temporalio.contrib.openai_agents import workflow as agent_workflow
 
 from agents import (
@@ -8,71 +9,123 @@ from agents import (
     ModelSettings
 )
 from research_agents.tools import (
-    get_slack_channels,
+    find_relevant_channels,
     search_slack,
+    search_slack_batch,
     get_thread_messages,
-    get_user_name,
+    get_threads,
+    get_user_names,
+    semantic_search_tools,
+    SEMANTIC_SEARCH_HINT,
+    COMPACT_OUTPUT_HINT,
 )
+from research_agents.compact import with_references
+from research_agents.routing import model_for
 
-with workflow.unsafe.imports_passed_through():
-    from config import settings
+REPORT_HANDOFF_HINT = "- Once the searches and thread reads are done, hand off to the Report Agent instead of writing the report yourself; it writes the report from your results.\n"
 
-def get_execution_prompt(now: datetime) -> str:
+def report_sections(start: int) -> str:
+    """Report format and self-reflection guidelines, numbered from start."""
+    return f"""{start}. Present Your Analysis in a Structured Format
+- Make sure the response is less than 4000 characters
+- Make sure to format with Markdown without html tags such as <hr> or <br>
+- Don't include raw URL. Always render them with text.
+- Highlight the report's title with minimal emoji
+- Use clearly defined sections:
+  - Summary of findings (comprehensive and synthesized)
+  - A list of examples including formatted links to the original message
+  - Important decisions or action items
+  - A short list of no more than 5 names involved in the discussions. Their name should be properly capitalized.
+
+{start + 1}. Self-Reflection and Continuous Improvement
+- After each search and analysis, critically assess your results:
+  - Show the number of messages analyzed
+  - Were any relevant channels or discussions possibly missed? If so, suggest next steps or clarifying questions for the user.
+  - Did the summary address the user's query comprehensively and concisely?
+  - Are there recurring ambiguities or workflow bottlenecks that could be improved in future searches?
+  - Actively seek feedback from the user to improve your process and adjust your approach accordingly.
+  - Document patterns or suggestions for future improvements based on user feedback and your own observations.
+"""
+
+def get_execution_prompt(now: datetime, semantic_search: bool = False, compact_output: bool = False, hands_off_report: bool = False) -> str:
     return f"""
 You work in a group of agents for searching and analyzing a company's internal Slack conversations.
 Your job is to execute the search plan and analysis based on a given plan.
 Final report should be in Markdown format.
 
 1. Perform searches based on the previously generated plan
+- Prefer one search_slack_batch call that runs the global search and the channel-specific searches for every keyword group together; results are deduplicated and tagged with the queries that found them.
 - Use the keywords from the double quoted keywords groups with no more than two keywords per search
 - Don't quotes the keywords
 - Don't use OR operand for searching keywords
 - If time ranges are relevant, include them in the search.
 - Drop redundant keywords if the query is already scoped by channels.
-
+- When a search reports more results than shown and coverage matters, repeat it once with max_results instead of guessing new queries.
+{SEMANTIC_SEARCH_HINT if semantic_search else ""}
 2. Analyze Search Results
 - Do not complete analysis until both global and channel-based searches are performed.
 - Organize information by topic and relevance.
 - Provide a concise summary of the main discussion points.
 - Extract any actionable items or decisions.
 - Highlight important messages with their permalinks.
-- If the question is about customers, mention the customer's name and relevant channels.
-- Use tool get_user_name to get the user's name from their Slack ID.
+{COMPACT_OUTPUT_HINT if compact_output else ""}- If the question is about customers, mention the customer's name and relevant channels.
+- To read several threads from the search results, fetch them all with one get_threads call instead of calling get_thread_messages for each.
+- For long threads, pass max_chars (around 6000) and the topic as query to get_thread_messages or get_threads; it keeps the opening message, the latest replies and the most relevant replies in between.
+- Search and thread results already show display names. Only if raw Slack user IDs remain, resolve them all with one get_user_names call.
+{REPORT_HANDOFF_HINT if hands_off_report else ""}
+{report_sections(3)}
+Current date and time: {now.isoformat()}
+"""
 
-3. Present Your Analysis in a Structured Format
-- Make sure the response is less than 4000 characters
-- Make sure to format with Markdown without html tags such as <hr> or <br>
-- Don't include raw URL. Always render them with text.
-- Highlight the report's title with minimal emoji
-- Use clearly defined sections:
-  - Summary of findings (comprehensive and synthesized)
-  - A list of examples including formatted links to the original message
-  - Important decisions or action items
-  - A short list of no more than 5 names involved in the discussions. Their name should be properly capitalized.
+def get_report_prompt(now: datetime, compact_output: bool = False) -> str:
+    return f"""
+You work in a group of agents for searching and analyzing a company's internal Slack conversations.
+The Execution Agent has run the searches for the plan and handed the results to you. Write the final report from them; don't search again.
+Final report should be in Markdown format.
 
-4. Self-Reflection and Continuous Improvement
-- After each search and analysis, critically assess your results:
-  - Show the number of messages analyzed
-  - Were any relevant channels or discussions possibly missed? If so, suggest next steps or clarifying questions for the user.
-  - Did the summary address the user's query comprehensively and concisely?
-  - Are there recurring ambiguities or workflow bottlenecks that could be improved in future searches?
-  - Actively seek feedback from the user to improve your process and adjust your approach accordingly.
-  - Document patterns or suggestions for future improvements based on user feedback and your own observations.
+1. Analyze Search Results
+- Organize information by topic and relevance.
+- Provide a concise summary of the main discussion points.
+- Extract any actionable items or decisions.
+- Highlight important messages with their permalinks.
+{COMPACT_OUTPUT_HINT if compact_output else ""}- If the question is about customers, mention the customer's name and relevant channels.
 
+{report_sections(2)}
 Current date and time: {now.isoformat()}
 """
 
-def init_execution_agent(now: datetime):
+def init_report_agent(now: datetime, model: Optional[str] = None, compact_output: bool = False):
+    return Agent(
+        name="Report Agent",
+        instructions=get_report_prompt(now, compact_output),
+        model_settings=ModelSettings(temperature=0, top_p=0.9, frequency_penalty=0.3, presence_penalty=0),
+        model=model or model_for("report"),
+    )
+
+def init_execution_agent(
+    now: datetime,
+    model: Optional[str] = None,
+    report_model: Optional[str] = None,
+    semantic_search: bool = False,
+    compact_output: bool = False,
+):
+    model = model or model_for("execution")
+    report_model = report_model or model_for("report")
+    hands_off_report = report_model != model
     return Agent(
         name="Execution Agent",
-        instructions=get_execution_prompt(now),
+        instructions=get_execution_prompt(now, semantic_search, compact_output, hands_off_report),
         model_settings=ModelSettings(tool_choice="required", temperature=0, top_p=0.9, frequency_penalty=0.3, presence_penalty=0),
         tools=[
             WebSearchTool(),
-            agent_workflow.activity_as_tool(get_slack_channels, start_to_close_timeout=timedelta(seconds=10)),
-            agent_workflow.activity_as_tool(search_slack, start_to_close_timeout=timedelta(seconds=10)),
+            agent_workflow.activity_as_tool(find_relevant_channels, start_to_close_timeout=timedelta(seconds=10)),
+            with_references(agent_workflow.activity_as_tool(search_slack, start_to_close_timeout=timedelta(seconds=10))),
+            with_references(agent_workflow.activity_as_tool(search_slack_batch, start_to_close_timeout=timedelta(seconds=30))),
+            *semantic_search_tools(semantic_search),
             agent_workflow.activity_as_tool(get_thread_messages, start_to_close_timeout=timedelta(seconds=10)),
-            agent_workflow.activity_as_tool(get_user_name, start_to_close_timeout=timedelta(seconds=10)),
+            agent_workflow.activity_as_tool(get_threads, start_to_close_timeout=timedelta(seconds=30)),
+            agent_workflow.activity_as_tool(get_user_names, start_to_close_timeout=timedelta(seconds=10)),
         ],
-        model=settings.model_name,
+        handoffs=[init_report_agent(now, report_model, compact_output)] if hands_off_report else [],
+        model=model,
     )
@@ -0,0 +1,522 @@
+import asyncio
+import logging
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from slack_sdk import WebClient
+from temporalio import workflow
+
+with workflow.unsafe.imports_passed_through():
+    from config import settings
+    from research_agents.directory import channel_directory, list_all_channels, _next_cursor
+
+logger = logging.getLogger(__name__)
+
+HISTORY_PAGE_SIZE = 200
+# Auto mode stops trusting a channel after this many sync intervals without a sync
+MAX_MISSED_SYNCS = 2
+
+# Channel housekeeping messages carry nothing worth searching
+SKIPPED_SUBTYPES = frozenset({
+    "channel_join", "channel_leave", "channel_topic", "channel_purpose",
+    "channel_name", "channel_archive", "channel_unarchive",
+})
+
+# A quoted phrase (optionally negated) or a bare token
+QUERY_TOKEN = re.compile(r'(-?)"([^"]*)"|(\S+)')
+# Search modifiers; anything else with a colon (URLs, "error:timeout") is a plain term
+MODIFIER = re.compile(r"^(-?)(in|from|after|before|on|during|is|has|to|with):(.*)$", re.IGNORECASE)
+USER_MENTION = re.compile(r"^<@([UW][A-Z0-9]+)(?:\|[^>]*)?>$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    channel_id TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    created REAL NOT NULL,
+    thread_ts TEXT,
+    user TEXT,
+    username TEXT,
+    text TEXT NOT NULL,
+    UNIQUE (channel_id, ts)
+);
+CREATE INDEX IF NOT EXISTS messages_created ON messages (channel_id, created);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    text, content='messages', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_au AFTER UPDATE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO messages_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TABLE IF NOT EXISTS channels (
+    channel_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    latest_ts TEXT,
+    synced_at REAL,
+    window_start REAL,
+    full_synced_at REAL
+);
+CREATE TABLE IF NOT EXISTS threads (
+    channel_id TEXT NOT NULL,
+    thread_ts TEXT NOT NULL,
+    latest_reply TEXT NOT NULL,
+    PRIMARY KEY (channel_id, thread_ts)
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS embeddings (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    message_id INTEGER NOT NULL UNIQUE,
+    vector BLOB NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS messages_ad_embedding AFTER DELETE ON messages BEGIN
+    DELETE FROM embeddings WHERE message_id = old.id;
+END;
+CREATE TRIGGER IF NOT EXISTS messages_au_embedding AFTER UPDATE OF text ON messages BEGIN
+    DELETE FROM embeddings WHERE message_id = old.id;
+END;
+"""
+
+
+@dataclass
+class MirrorQuery:
+    terms: List[str] = field(default_factory=list)
+    prefixes: List[str] = field(default_factory=list)
+    excluded_terms: List[str] = field(default_factory=list)
+    channels: List[str] = field(default_factory=list)
+    excluded_channels: List[str] = field(default_factory=list)
+    users: List[str] = field(default_factory=list)
+    after: Optional[float] = None
+    before: Optional[float] = None
+
+    def match_expression(self, any_term: bool = False) -> Optional[str]:
+        """FTS5 MATCH expression: every term must appear (Slack's implicit AND) unless any_term is set."""
+        positive = [_fts_phrase(term) for term in self.terms] + [f"{_fts_phrase(prefix)}*" for prefix in self.prefixes]
+        if not positive:
+            return None
+        expression = f"({' OR '.join(positive)})" if any_term else " ".join(positive)
+        return expression + "".join(f" NOT {_fts_phrase(term)}" for term in self.excluded_terms)
+
+    def text(self) -> str:
+        """The free-text part of the query, without modifiers."""
+        return " ".join(self.terms + self.prefixes)
+
+
+def _fts_phrase(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _day_start(value: str) -> Optional[float]:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+
+def parse_search_query(query: str) -> Optional[MirrorQuery]:
+    """Split a search.messages query into FTS terms and the filters the mirror understands.
+
+    Supports in:, -in:, from:, after:, before: and on: with YYYY-MM-DD dates (UTC), quoted
+    phrases, -term and trailing * wildcards. Returns None for anything else, such as
+    has:link or after:yesterday, so the caller can fall back to Slack.
+    """
+    parsed = MirrorQuery()
+    for match in QUERY_TOKEN.finditer(query):
+        negated, phrase, token = match.groups()
+        if phrase is not None:
+            if phrase.strip():
+                (parsed.excluded_terms if negated else parsed.terms).append(phrase)
+            continue
+
+        modifier = MODIFIER.match(token)
+        if modifier is None:
+            if token.startswith("-") and len(token) > 1:
+                parsed.excluded_terms.append(token[1:])
+            elif token.endswith("*") and len(token) > 1:
+                parsed.prefixes.append(token.rstrip("*"))
+            else:
+                parsed.terms.append(token)
+            continue
+
+        negated, name, value = modifier.group(1), modifier.group(2).lower(), modifier.group(3)
+        if name == "in" and value.startswith("#"):
+            (parsed.excluded_channels if negated else parsed.channels).append(value[1:].lower())
+        elif name == "in" and not negated and value and not value.startswith(("@", "<")):
+            parsed.channels.append(value.lower())
+        elif name == "is" and negated and value.lower() in ("dm", "mpim"):
+            # The mirror only holds channel messages
+            continue
+        elif name == "from" and not negated and value:
+            mention = USER_MENTION.match(value)
+            parsed.users.append(mention.group(1) if mention else value.lstrip("@"))
+        elif name in ("after", "before", "on") and not negated and _day_start(value) is not None:
+            day = _day_start(value)
+            # Slack's date filters are exclusive: after:D starts the day after D
+            if name == "after":
+                parsed.after = max(parsed.after or 0, day + 86400)
+            elif name == "before":
+                parsed.before = min(parsed.before or float("inf"), day)
+            else:
+                parsed.after, parsed.before = day, day + 86400
+        else:
+            return None
+    if parsed.excluded_terms and not (parsed.terms or parsed.prefixes):
+        return None
+    return parsed
+
+
+class MessageMirror:
+    """Local SQLite copy of selected channels' messages with an FTS5 index for search."""
+
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(channels)")}
+            # Mirrors created before window tracking are re-listed on their next sync
+            for column in ("window_start", "full_synced_at"):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE channels ADD COLUMN {column} REAL")
+
+    def store(self, channel_id: str, name: str, messages: List[Dict[str, Any]], latest_ts: Optional[str],
+              window_start: Optional[float] = None, threads: Optional[Dict[str, str]] = None) -> int:
+        """Store messages and the channel's sync state.
+
+        window_start is given by syncs that listed the whole history window and is when that
+        window starts; incremental syncs leave it as it was. threads maps the thread_ts of
+        threads whose replies were fetched to their latest_reply.
+        """
+        rows = [
+            (
+                channel_id,
+                msg["ts"],
+                float(msg["ts"]),
+                msg.get("thread_ts"),
+                msg.get("user"),
+                msg.get("username") or (msg.get("user_profile") or {}).get("display_name"),
+                msg.get("text") or "",
+            )
+            for msg in messages
+            if msg.get("ts") and msg.get("subtype") not in SKIPPED_SUBTYPES
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO messages (channel_id, ts, created, thread_ts, user, username, text) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (channel_id, ts) DO UPDATE SET thread_ts = excluded.thread_ts, user = excluded.user, "
+                "username = excluded.username, text = excluded.text",
+                rows,
+            )
+            now = time.time()
+            self._conn.execute(
+                "INSERT INTO channels (channel_id, name, latest_ts, synced_at, window_start, full_synced_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (channel_id) DO UPDATE SET name = excluded.name, "
+                "latest_ts = COALESCE(excluded.latest_ts, channels.latest_ts), synced_at = excluded.synced_at, "
+                "window_start = COALESCE(excluded.window_start, channels.window_start), "
+                "full_synced_at = COALESCE(excluded.full_synced_at, channels.full_synced_at)",
+                (channel_id, name.lower(), latest_ts, now, window_start, now if window_start is not None else None),
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO threads (channel_id, thread_ts, latest_reply) VALUES (?, ?, ?)",
+                [(channel_id, thread_ts, latest_reply) for thread_ts, latest_reply in (threads or {}).items()],
+            )
+        return len(rows)
+
+    def thread_latest_replies(self, channel_id: str) -> Dict[str, str]:
+        """latest_reply of every thread whose replies have been mirrored, by thread_ts."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT thread_ts, latest_reply FROM threads WHERE channel_id = ?", (channel_id,)
+            ).fetchall()
+        return {row["thread_ts"]: row["latest_reply"] for row in rows}
+
+    def sync_cursor(self, channel_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT latest_ts FROM channels WHERE channel_id = ?", (channel_id,)).fetchone()
+        return row["latest_ts"] if row else None
+
+    def last_full_sync(self, channel_id: str) -> Optional[float]:
+        """When the channel's whole history window was last listed, or None if it never was."""
+        with self._lock:
+            row = self._conn.execute("SELECT full_synced_at FROM channels WHERE channel_id = ?", (channel_id,)).fetchone()
+        return row["full_synced_at"] if row else None
+
+    def covers(self, channel_names: List[str], after: Optional[float] = None, before: Optional[float] = None) -> bool:
+        """Whether the mirror holds everything Slack would return for these channels and dates.
+
+        The time range has to start inside the window the last full listing covered, since
+        older messages and their threads aren't kept current. Unless it ends before the last
+        sync, that sync must also be recent. Late replies to threads older than
+        settings.mirror_thread_refresh_days only show up after the next full listing.
+        """
+        if not channel_names or after is None:
+            return False
+        names = {name.lower() for name in channel_names}
+        placeholders = ",".join("?" * len(names))
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT COUNT(*), MAX(window_start), MIN(synced_at) FROM channels "
+                f"WHERE synced_at IS NOT NULL AND window_start IS NOT NULL AND name IN ({placeholders})",
+                tuple(names),
+            ).fetchone()
+        count, window_start, synced_at = row
+        if count != len(names) or after < window_start:
+            return False
+        if before is not None and before <= synced_at:
+            return True
+        return time.time() - synced_at <= MAX_MISSED_SYNCS * settings.mirror_sync_interval_seconds
+
+    def set_workspace_url(self, url: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('workspace_url', ?)", (url,))
+
+    def workspace_url(self) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'workspace_url'").fetchone()
+        return row["value"] if row else None
+
+    def search(self, query: MirrorQuery, sort: str, limit: int) -> Tuple[int, List[Dict[str, Any]]]:
+        """Return (total, matches) with matches shaped like search.messages results."""
+        joins, where, params, expression = _filtered(query)
+        order = "bm25(messages_fts), m.created DESC" if expression and sort == "score" else "m.created DESC"
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM {joins}{where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT {MATCH_COLUMNS} FROM {joins}{where} ORDER BY {order} LIMIT ?",
+                [*params, limit],
+            ).fetchall()
+        base_url = self.workspace_url()
+        return total, [_to_match(row, base_url) for row in rows]
+
+    def ranked_ids(self, query: MirrorQuery, limit: int) -> List[int]:
+        """Message ids matching any of the query's terms, best bm25 first."""
+        joins, where, params, expression = _filtered(query, any_term=True)
+        if not expression:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT m.id FROM {joins}{where} ORDER BY bm25(messages_fts) LIMIT ?", [*params, limit]
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def matches_by_id(self, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        if not ids:
+            return {}
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT m.id, {MATCH_COLUMNS} FROM messages m JOIN channels c ON c.channel_id = m.channel_id "
+                f"WHERE m.id IN ({','.join('?' * len(ids))})",
+                ids,
+            ).fetchall()
+        base_url = self.workspace_url()
+        return {row["id"]: _to_match(row, base_url) for row in rows}
+
+    def reset_embeddings(self, backend_name: str) -> None:
+        """Drop stored vectors if they were computed by a different embedding backend."""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'embedding_backend'").fetchone()
+            if row is None or row["value"] != backend_name:
+                self._conn.execute("DELETE FROM embeddings")
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('embedding_backend', ?)", (backend_name,))
+
+    def unembedded_messages(self, limit: int) -> List[Tuple[int, str]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT m.id, m.text FROM messages m LEFT JOIN embeddings e ON e.message_id = m.id "
+                "WHERE e.message_id IS NULL ORDER BY m.id LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def store_embeddings(self, vectors: List[Tuple[int, bytes]]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (message_id, vector) VALUES (?, ?)", vectors)
+
+    def embeddings_since(self, seq: int) -> List[sqlite3.Row]:
+        """Vectors stored after seq, with the columns the vector index filters on."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT e.seq, e.message_id, e.vector, c.name AS channel, m.created, m.user, m.username "
+                "FROM embeddings e JOIN messages m ON m.id = e.message_id JOIN channels c ON c.channel_id = m.channel_id "
+                "WHERE e.seq > ? ORDER BY e.seq",
+                (seq,),
+            ).fetchall()
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM messages")
+            self._conn.execute("DELETE FROM channels")
+            self._conn.execute("DELETE FROM threads")
+
+
+MATCH_COLUMNS = "m.channel_id, c.name, m.ts, m.thread_ts, m.user, m.username, m.text"
+
+
+def _filtered(query: MirrorQuery, any_term: bool = False) -> Tuple[str, str, List[Any], Optional[str]]:
+    """FROM and WHERE clauses for a query, with their parameters and the FTS expression used."""
+    joins = "messages m JOIN channels c ON c.channel_id = m.channel_id"
+    conditions: List[str] = []
+    params: List[Any] = []
+    expression = query.match_expression(any_term)
+    if expression:
+        joins += " JOIN messages_fts ON messages_fts.rowid = m.id"
+        conditions.append("messages_fts MATCH ?")
+        params.append(expression)
+    for column, values, operator in (
+        ("c.name", query.channels, "IN"),
+        ("c.name", query.excluded_channels, "NOT IN"),
+    ):
+        if values:
+            conditions.append(f"{column} {operator} ({','.join('?' * len(values))})")
+            params.extend(values)
+    if query.users:
+        placeholders = ",".join("?" * len(query.users))
+        conditions.append(f"(m.user IN ({placeholders}) OR m.username IN ({placeholders}))")
+        params.extend(query.users * 2)
+    if query.after is not None:
+        conditions.append("m.created >= ?")
+        params.append(query.after)
+    if query.before is not None:
+        conditions.append("m.created < ?")
+        params.append(query.before)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return joins, where, params, expression
+
+
+def _to_match(row: sqlite3.Row, base_url: Optional[str]) -> Dict[str, Any]:
+    match = {
+        "channel": {"id": row["channel_id"], "name": row["name"]},
+        "ts": row["ts"],
+        "user": row["user"],
+        "username": row["username"] or row["user"],
+        "text": row["text"],
+        "permalink": "",
+    }
+    if base_url:
+        permalink = f"{base_url.rstrip('/')}/archives/{row['channel_id']}/p{row['ts'].replace('.', '')}"
+        if row["thread_ts"] and row["thread_ts"] != row["ts"]:
+            permalink += f"?thread_ts={row['thread_ts']}&cid={row['channel_id']}"
+        match["permalink"] = permalink
+    return match
+
+
+def _history_page_args(channel_id: str, oldest: str, cursor: Optional[str]) -> Dict[str, Any]:
+    args = {"channel": channel_id, "oldest": oldest, "limit": HISTORY_PAGE_SIZE}
+    if cursor:
+        args["cursor"] = cursor
+    return args
+
+
+def _thread_replies(client: WebClient, channel_id: str, thread_ts: str, oldest: str) -> List[Dict[str, Any]]:
+    replies = []
+    cursor = None
+    while True:
+        args = {"channel": channel_id, "ts": thread_ts, "oldest": oldest, "limit": HISTORY_PAGE_SIZE}
+        if cursor:
+            args["cursor"] = cursor
+        response = client.conversations_replies(**args)
+        replies.extend(msg for msg in response.get("messages", []) if msg.get("ts") != thread_ts)
+        cursor = _next_cursor(response)
+        if not cursor:
+            return replies
+
+
+def sync_channel(client: WebClient, mirror: MessageMirror, channel_id: str, name: str) -> int:
+    """Store the channel's new messages and new replies.
+
+    A reply doesn't show up in conversations.history, but it bumps its parent's latest_reply,
+    so threads whose latest_reply moved are re-read. Syncs list history from the last mirrored
+    message or the last settings.mirror_thread_refresh_days, whichever is older. The whole
+    settings.mirror_history_days window is listed on the first sync and then every
+    settings.mirror_full_sync_interval_seconds, to catch late replies to older threads.
+    Top-level messages already mirrored aren't stored again.
+    """
+    now = time.time()
+    cursor_ts = mirror.sync_cursor(channel_id)
+    last_full_sync = mirror.last_full_sync(channel_id)
+    full = last_full_sync is None or now - last_full_sync >= settings.mirror_full_sync_interval_seconds
+    window_start = now - settings.mirror_history_days * 86400
+    if full:
+        oldest = window_start
+    else:
+        oldest = now - settings.mirror_thread_refresh_days * 86400
+        if cursor_ts is not None:
+            oldest = min(oldest, float(cursor_ts))
+        oldest = max(oldest, window_start)
+
+    known_threads = mirror.thread_latest_replies(channel_id)
+    listed: List[Dict[str, Any]] = []
+    cursor = None
+    while True:
+        response = client.conversations_history(**_history_page_args(channel_id, f"{oldest:.6f}", cursor))
+        listed.extend(response.get("messages", []))
+        cursor = _next_cursor(response)
+        if not cursor:
+            break
+
+    messages = [msg for msg in listed if msg.get("ts") and (cursor_ts is None or float(msg["ts"]) > float(cursor_ts))]
+    replies: List[Dict[str, Any]] = []
+    threads: Dict[str, str] = {}
+    for msg in listed:
+        if not msg.get("reply_count"):
+            continue
+        latest_reply = msg.get("latest_reply") or msg["ts"]
+        seen = known_threads.get(msg["ts"])
+        if seen != latest_reply:
+            # oldest is inclusive; the reply at seen is already mirrored
+            fetched = _thread_replies(client, channel_id, msg["ts"], seen or msg["ts"])
+            replies.extend(reply for reply in fetched if seen is None or float(reply["ts"]) > float(seen))
+            threads[msg["ts"]] = latest_reply
+    latest_ts = max((msg["ts"] for msg in messages), key=float, default=None)
+    stored = mirror.store(channel_id, name, messages + replies, latest_ts,
+                          window_start=window_start if full else None, threads=threads)
+    logger.debug(f"Mirrored {stored} new messages from #{name}{' (full listing)' if full else ''}")
+    return stored
+
+
+def sync_mirror(client: WebClient, mirror: MessageMirror, channel_names: List[str]) -> Dict[str, int]:
+    if not mirror.workspace_url():
+        mirror.set_workspace_url(client.auth_test().get("url", ""))
+    channels = channel_directory.get(lambda: list_all_channels(client))
+    ids_by_name = {channel["name"].lower(): channel_id for channel_id, channel in channels.items()}
+    synced = {}
+    for name in channel_names:
+        channel_id = ids_by_name.get(name.lower())
+        if channel_id is None:
+            logger.warning(f"Cannot mirror #{name}: channel not found")
+            continue
+        synced[name] = sync_channel(client, mirror, channel_id, name)
+    return synced
+
+
+async def run_indexer(client: WebClient, mirror: MessageMirror, channel_names: List[str], interval_seconds: float,
+                      on_synced: Optional[Callable[[], Any]] = None) -> None:
+    """Keep the mirror up to date until cancelled. Syncs run in a thread so the loop stays free."""
+    while True:
+        try:
+            synced = await asyncio.to_thread(sync_mirror, client, mirror, channel_names)
+            logger.info(f"Mirror sync stored {sum(synced.values())} messages from {len(synced)} channels")
+            if on_synced:
+                await asyncio.to_thread(on_synced)
+        except Exception as e:
+            logger.warning(f"Mirror sync failed: {str(e)}")
+        await asyncio.sleep(interval_seconds)
+
+
+def mirror_channel_names() -> List[str]:
+    return [name.strip().lstrip("#") for name in settings.mirror_channels.split(",") if name.strip()]
+
+
+message_mirror = MessageMirror(settings.mirror_path) if settings.mirror_path else None
@@ -1,22 +1,37 @@
 from datetime import datetime, timedelta
-from temporalio import workflow
 from temporalio.contrib.openai_agents import workflow as agent_workflow
 from pydantic import BaseModel, Field
+from typing import List, Optional
 
 from agents import (
     Agent,
     WebSearchTool,
     ModelSettings,
 )
-from research_agents.tools import get_slack_channels, search_slack
-
-with workflow.unsafe.imports_passed_through():
-    from config import settings
+from research_agents.tools import MAX_BATCH_SEARCHES, SlackSearchRequest, find_relevant_channels
+from research_agents.routing import model_for
 
 class PlanningResult(BaseModel):
     clarifying_questions: str = Field(description="Either clarifying questions if input unclear, or detailed search plan if clear")
     human_input_required: bool = Field(description="True if clarifying questions needed, False if plan is ready")
     plan: str = Field(description="Detailed search plan if clarifying questions not needed")
+    keyword_groups: Optional[List[str]] = Field(default=None, description="The plan's keyword groups, each written as one Slack search query, e.g. 'go sdk release'")
+    channels: Optional[List[str]] = Field(default=None, description="Names of the channels the plan searches, without #")
+    start_time: Optional[str] = Field(default=None, description="ISO date the plan's time range starts, if it has one")
+    end_time: Optional[str] = Field(default=None, description="ISO date the plan's time range ends, if it has one")
+
+# Searches a structured plan runs without the execution agent: two batches' worth
+MAX_PLAN_SEARCHES = 2 * MAX_BATCH_SEARCHES
+
+def plan_searches(plan: PlanningResult) -> List[SlackSearchRequest]:
+    """The searches a structured plan asks for: per keyword group, one across the plan's channels and one global."""
+    channels = ",".join(plan.channels) if plan.channels else None
+    searches = []
+    for keywords in plan.keyword_groups or []:
+        if channels:
+            searches.append(SlackSearchRequest(query=keywords, channels=channels, start_time=plan.start_time, end_time=plan.end_time))
+        searches.append(SlackSearchRequest(query=keywords, start_time=plan.start_time, end_time=plan.end_time))
+    return searches[:MAX_PLAN_SEARCHES]
 
 def get_plan_prompt(now: datetime) -> str:
     """Returns the planning phase prompt"""
@@ -35,9 +50,10 @@ Your job is to plan the search based on the following steps.
 - Don't ask which channel to search figure it out by using tools.
 - Always assume searching in internal Slack workspace NOT over the internet
 
-2. Retrieve Available Slack Channels
-- Use the tool available to obtain the list of channels.
-- Review channel names and descriptions to understand their purposes.
+2. Find Candidate Slack Channels
+- Use find_relevant_channels with the user's question and your keyword groups to get the best-matching channels.
+- Call it again with different keywords if the candidates look off topic.
+- Review channel names, topics and purposes to understand what each channel is for.
 
 3. Select Relevant Channels for Searching
 - Based on the query and channel descriptions, identify the most relevant channels.
@@ -48,9 +64,10 @@ Your job is to plan the search based on the following steps.
 
 4. Articulate the Search Plan
 - Clearly state the key words and keyword groups that will be used for searching.
-- List the specific channels that will be searched.
+- Also return the keyword groups in keyword_groups, each as one Slack search query.
+- List the specific channels that will be searched, and return their names in channels.
 - Explain the rationale for the selected keywords and channels.
-- Include any time ranges or filters that will be applied.
+- Include any time ranges or filters that will be applied, and return the time range in start_time and end_time.
 - End with a confidence level: 🔴 (low), 🟡 (medium), or 🟢 (high) based on how well the available channels and keywords match the user's query.
 
 IMPORTANT: If the user's question is too vague to generate keywords for searching, return clarifying questions in the clarifying_questions field and set human_input_required to true. Otherwise, return the detailed search plan in clarifying_questions field and set human_input_required to false.
@@ -58,15 +75,15 @@ IMPORTANT: If the user's question is too vague to generate keywords for searchin
 Current date and time: {now.isoformat()}
 """
 
-def init_plan_agent(now: datetime):
+def init_plan_agent(now: datetime, model: Optional[str] = None):
     return Agent(
         name="Planning Agent",
         instructions=get_plan_prompt(now),
         model_settings=ModelSettings(temperature=0),
         tools=[
             WebSearchTool(),
-            agent_workflow.activity_as_tool(get_slack_channels, start_to_close_timeout=timedelta(seconds=10)),
+            agent_workflow.activity_as_tool(find_relevant_channels, start_to_close_timeout=timedelta(seconds=10)),
         ],
-        model=settings.model_name,
+        model=model or model_for("plan"),
         output_type=PlanningResult,
     )
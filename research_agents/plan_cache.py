@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from temporalio import activity, workflow
+
+with workflow.unsafe.imports_passed_through():
+    from config import settings
+    from research_agents.embeddings import EmbeddingBackend, get_embedder
+    from research_agents.ranking import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_question(question: str) -> str:
+    """Word-order-, case- and plural-insensitive form of a question with stopwords dropped."""
+    return " ".join(sorted(set(tokenize(question))))
+
+
+@dataclass
+class CachedPlan:
+    question: str
+    plan: Dict[str, Any]
+    vector: np.ndarray
+    stored_at: float
+
+
+class PlanCache:
+    """Reviewed plans from earlier questions, matched by normalized text or embedding similarity.
+
+    Entries expire after ttl_seconds, since plans name time ranges and channels that go stale.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, min_similarity: float, embedder: EmbeddingBackend) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.min_similarity = min_similarity
+        self.embedder = embedder
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, CachedPlan] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, question: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """The cached plan closest to question and its similarity, if one is close enough."""
+        key = normalize_question(question)
+        if not key:
+            return None
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            match = self._entries.get(key)
+            if match is not None:
+                self._entries.move_to_end(key)
+                self._record(hit=True)
+                return match.plan, 1.0
+            if not self._entries:
+                self._record(hit=False)
+                return None
+        vector = self.embedder.embed([question])[0]
+        with self._lock:
+            best_key, best = None, self.min_similarity
+            for entry_key, entry in self._entries.items():
+                similarity = float(entry.vector @ vector)
+                if similarity >= best:
+                    best_key, best = entry_key, similarity
+            if best_key is None:
+                self._record(hit=False)
+                return None
+            self._entries.move_to_end(best_key)
+            self._record(hit=True)
+            return self._entries[best_key].plan, best
+
+    def put(self, question: str, plan: Dict[str, Any]) -> None:
+        key = normalize_question(question)
+        if not key:
+            return
+        vector = self.embedder.embed([question])[0]
+        with self._lock:
+            self._entries[key] = CachedPlan(question, plan, vector, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def _expire(self, now: float) -> None:
+        for key in [key for key, entry in self._entries.items() if now - entry.stored_at > self.ttl_seconds]:
+            del self._entries[key]
+
+    def _record(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if activity.in_activity():
+            name = "plan_cache_hits" if hit else "plan_cache_misses"
+            activity.metric_meter().create_counter(name, "Plan cache lookups").add(1)
+        logger.debug(f"Plan cache {'hit' if hit else 'miss'}: {self.stats()}")
+
+
+def _build_plan_cache() -> Optional[PlanCache]:
+    if not settings.plan_cache_enabled:
+        return None
+    return PlanCache(
+        settings.plan_cache_max_entries,
+        settings.plan_cache_ttl_seconds,
+        settings.plan_cache_min_similarity,
+        get_embedder(),
+    )
+
+
+plan_cache = _build_plan_cache()
@@ -3,8 +3,10 @@ from agents import (
     Agent,
     ModelSettings,
 )
-from temporalio import workflow
 from pydantic import BaseModel, Field
+from typing import Optional
+
+from research_agents.routing import model_for
 
 class EvaluationFeedback(BaseModel):
     scores: str = Field(description="Detailed scoring breakdown")
@@ -12,8 +14,6 @@ class EvaluationFeedback(BaseModel):
     passed: bool = Field(description="Whether the evaluation passed")
     feedback: str = Field(description="Detailed feedback and recommendations")
 
-with workflow.unsafe.imports_passed_through():
-    from config import settings
 
 def get_plan_eval_prompt(now: datetime, pass_threshold: float = 0.67) -> str:
     return f"""
@@ -28,7 +28,7 @@ Evaluate the planning based on these criteria (1-5 scale each):
 - Maximum 3 keywords per group maintained?
 
 2. Channel Selection
-- Were all available channels properly retrieved?
+- Were candidate channels looked up with the channel tool rather than guessed?
 - Are the selected channels relevant to the query?
 - Was proper logic applied (e.g., support- prefix for customer queries)?
 - Were users prompted for clarification when needed?
@@ -50,11 +50,11 @@ Return:
 Current date and time: {now.isoformat()}
 """
 
-def init_plan_eval_agent(now: datetime, pass_threshold: float = 0.7):
+def init_plan_eval_agent(now: datetime, pass_threshold: float = 0.7, model: Optional[str] = None):
     return Agent(
         name="Plan Evaluation Agent",
         instructions=get_plan_eval_prompt(now, pass_threshold),
         model_settings=ModelSettings(temperature=0),
-        model=settings.eval_model_name,
+        model=model or model_for("eval"),
         output_type=EvaluationFeedback,
     )
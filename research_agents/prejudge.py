@@ -0,0 +1,103 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from research_agents.plan_agent import PlanningResult
+from research_agents.plan_eval_agent import EvaluationFeedback
+from research_agents.tools import MAX_BATCH_SEARCHES
+
+# The evaluation prompt allows up to 3 keywords per group
+MAX_GROUP_KEYWORDS = 3
+
+CHANNEL_MENTION = re.compile(r"(?<![\w&])#([a-z0-9][a-z0-9_-]*)", re.IGNORECASE)
+QUERY_TOKEN = re.compile(r'-?"[^"]*"|\S+')
+SEARCH_MODIFIER = re.compile(r"-?[a-z]+:\S+", re.IGNORECASE)
+# Questions that need the plan to pick a time range
+TIME_CUE = re.compile(
+    r"\b(?:today|yesterday|recent(?:ly)?|latest|last|past|since|this (?:week|month|quarter|year)|(?:19|20)\d{2})\b",
+    re.IGNORECASE,
+)
+TIME_RANGE = re.compile(
+    r"\b(?:after|before|on|during):\S+|\b\d{4}-\d{2}-\d{2}\b"
+    r"|\b(?:last|past|previous|since|between)\s+\w+|\b(?:today|yesterday)\b",
+    re.IGNORECASE,
+)
+CUSTOMER_CUE = re.compile(r"\b(?:customers?|tickets?|support requests?|escalat\w*)\b", re.IGNORECASE)
+UNSURE_CONFIDENCE = ("🔴", "🟡")
+
+Check = Tuple[str, bool, str]
+
+
+def group_keywords(query: str) -> List[str]:
+    """Search terms of a keyword group; quoted phrases count once and modifiers not at all."""
+    return [token for token in QUERY_TOKEN.findall(query) if not SEARCH_MODIFIER.fullmatch(token)]
+
+
+def planned_channels(plan: PlanningResult) -> List[str]:
+    """Channel names the plan lists in channels or mentions as #name, in its text or in:#name filters."""
+    text = "\n".join([plan.plan, *(plan.keyword_groups or [])])
+    # "#2" is a step number, not a channel
+    mentioned = [name for name in CHANNEL_MENTION.findall(text) if not name.isdigit()]
+    return list(dict.fromkeys(name.lower().lstrip("#") for name in [*(plan.channels or []), *mentioned]))
+
+
+def _check_keyword_groups(plan: PlanningResult) -> Check:
+    groups = plan.keyword_groups or []
+    if not groups or len(groups) > MAX_BATCH_SEARCHES:
+        return "Keyword groups", False, f"{len(groups)} keyword groups"
+    sizes = [len(group_keywords(group)) for group in groups]
+    ok = all(1 <= size <= MAX_GROUP_KEYWORDS for size in sizes)
+    return "Keyword groups", ok, f"{len(groups)} groups of {min(sizes)}-{max(sizes)} keywords"
+
+
+def _check_channels(plan: PlanningResult, question: str, channels: Dict[str, Dict[str, Any]]) -> List[Check]:
+    names = planned_channels(plan)
+    active = {channel["name"].lower() for channel in channels.values() if not channel.get("is_archived")}
+    unknown = [name for name in names if name not in active]
+    checks = [(
+        "Channels",
+        bool(names) and not unknown,
+        f"unknown or archived: {', '.join('#' + name for name in unknown)}" if unknown
+        else f"{len(names)} existing channels" if names else "no channels named",
+    )]
+    if CUSTOMER_CUE.search(question):
+        support = [name for name in names if name.startswith("support-")]
+        checks.append(("Customer channels", bool(support), f"{len(support)} support- channels"))
+    return checks
+
+
+def _check_time_range(plan: PlanningResult, question: str) -> Optional[Check]:
+    if not TIME_CUE.search(question):
+        return None
+    if plan.start_time or plan.end_time:
+        return "Time range", True, f"{plan.start_time or '…'} to {plan.end_time or 'now'}"
+    text = "\n".join([plan.plan, *(plan.keyword_groups or [])])
+    found = TIME_RANGE.search(text)
+    return "Time range", found is not None, f"'{found.group(0)}'" if found else "none given"
+
+
+def _check_confidence(plan: PlanningResult) -> Check:
+    unsure = next((mark for mark in UNSURE_CONFIDENCE if mark in plan.plan), None)
+    return "Confidence", unsure is None, f"planner marked it {unsure}" if unsure else "not marked low or medium"
+
+
+def score_plan(question: str, plan: PlanningResult, channels: Dict[str, Dict[str, Any]]) -> EvaluationFeedback:
+    """Score a plan with the evaluation prompt's checkable rules.
+
+    The plan passes only if it meets every rule. Plans that miss one are borderline rather
+    than failed and go to the LLM judge.
+    """
+    checks = [
+        _check_keyword_groups(plan),
+        *_check_channels(plan, question, channels),
+        _check_time_range(plan, question),
+        _check_confidence(plan),
+    ]
+    checks = [check for check in checks if check is not None]
+    passed = all(ok for _, ok, _ in checks)
+    scores = "\n".join(f"{'✅' if ok else '❌'} {name}: {note}" for name, ok, note in checks)
+    return EvaluationFeedback(
+        scores=scores,
+        total_score=sum(ok for _, ok, _ in checks),
+        passed=passed,
+        feedback=f"Quick checks {'passed' if passed else 'were inconclusive'}:\n{scores}",
+    )
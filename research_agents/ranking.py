@@ -0,0 +1,78 @@
+import hashlib
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are about as at be by can do does for from has have how i in is it its "
+    "me my of on or our that the their there this to was we were what when where which "
+    "who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords dropped and a naive plural strip."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall((text or "").lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 over pre-tokenized documents, scored through an inverted index."""
+
+    def __init__(self, documents: Iterable[List[str]], k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths: List[int] = []
+        for doc_id, tokens in enumerate(documents):
+            self.doc_lengths.append(len(tokens))
+            for token, tf in Counter(tokens).items():
+                self.postings[token].append((doc_id, tf))
+        self.size = len(self.doc_lengths)
+        self.avg_length = (sum(self.doc_lengths) / self.size) if self.size else 0.0
+
+    def idf(self, token: str) -> float:
+        df = len(self.postings.get(token, ()))
+        return math.log(1 + (self.size - df + 0.5) / (df + 0.5))
+
+    def scores(self, query_tokens: Iterable[str]) -> Dict[int, float]:
+        scores: Dict[int, float] = defaultdict(float)
+        for token in set(query_tokens):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = self.idf(token)
+            for doc_id, tf in postings:
+                norm = 1 - self.b + self.b * self.doc_lengths[doc_id] / (self.avg_length or 1)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+        return scores
+
+    def top_k(self, query_tokens: Iterable[str], k: int) -> List[Tuple[int, float]]:
+        scores = self.scores(query_tokens)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+def simhash(tokens: List[str], bits: int = 64) -> int:
+    """Charikar SimHash over word unigrams and bigrams; similar texts differ in few bits."""
+    features = Counter(tokens)
+    features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    weights = [0] * bits
+    for feature, count in features.items():
+        digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=bits // 8).digest(), "big")
+        for bit in range(bits):
+            weights[bit] += count if digest >> bit & 1 else -count
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
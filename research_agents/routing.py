@@ -0,0 +1,26 @@
+from typing import Dict
+
+from temporalio import workflow
+
+with workflow.unsafe.imports_passed_through():
+    from config import settings
+
+# Roles that default to settings.fast_model_name: planning, the plan judge, search tool turns and memory summaries
+FAST_ROLES = ("plan", "eval", "execution", "summary")
+# Every role a conversation's agents are built for; "escalation" replans after a failed review
+AGENT_ROLES = ("plan", "eval", "execution", "report", "combined", "summary", "escalation")
+
+
+def model_for(role: str) -> str:
+    """Model for an agent role: its <role>_model_name setting, else the fast model for FAST_ROLES, else model_name."""
+    override = getattr(settings, f"{role}_model_name", "")
+    if override:
+        return override
+    if role in FAST_ROLES and settings.fast_model_name:
+        return settings.fast_model_name
+    return settings.model_name
+
+
+def agent_models() -> Dict[str, str]:
+    """The model for every role in AGENT_ROLES, as routed by this worker's settings."""
+    return {role: model_for(role) for role in AGENT_ROLES}
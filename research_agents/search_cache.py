@@ -0,0 +1,160 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from temporalio import activity, workflow
+
+with workflow.unsafe.imports_passed_through():
+    from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Search modifiers whose order doesn't change the result set
+FILTER_PREFIXES = ("in:", "-in:", "is:", "-is:", "from:", "after:", "before:", "on:", "during:")
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a search.messages query with filters sorted."""
+    terms, filters = [], []
+    for token in query.lower().split():
+        (filters if token.startswith(FILTER_PREFIXES) else terms).append(token)
+    return " ".join(terms + sorted(filters))
+
+
+def cache_key(query: str, sort: str, count: int, page: int = 1) -> str:
+    return f"{normalize_query(query)}|sort={sort}|count={count}|page={page}"
+
+
+class SqliteCacheStore:
+    """On-disk copy of cached entries so a restarted worker starts warm."""
+
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, stored_at FROM search_cache WHERE key = ?", (key,)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def put(self, key: str, value: Dict[str, Any], stored_at: float) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), stored_at),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+
+    def prune(self, max_entries: int, oldest_allowed: float) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM search_cache WHERE stored_at < ?", (oldest_allowed,))
+            self._conn.execute(
+                "DELETE FROM search_cache WHERE key NOT IN (SELECT key FROM search_cache ORDER BY stored_at DESC LIMIT ?)",
+                (max_entries,),
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM search_cache")
+
+
+class SearchCache:
+    """Bounded LRU of raw search.messages pages with a TTL and an optional SQLite tier."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, store: Optional[SqliteCacheStore] = None) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, Tuple[Dict[str, Any], float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[1] <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self._record(hit=True)
+                    return entry[0]
+                del self._entries[key]
+        if self.store is not None:
+            stored = self.store.get(key)
+            if stored is not None and now - stored[1] <= self.ttl_seconds:
+                with self._lock:
+                    self._insert(key, stored)
+                    self._record(hit=True)
+                return stored[0]
+        with self._lock:
+            self._record(hit=False)
+        return None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        stored_at = time.time()
+        with self._lock:
+            self._insert(key, (value, stored_at))
+            self._puts += 1
+            prune = self._puts % self.max_entries == 0
+        if self.store is not None:
+            self.store.put(key, value, stored_at)
+            if prune:
+                self.store.prune(self.max_entries, stored_at - self.ttl_seconds)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def _insert(self, key: str, entry: Tuple[Dict[str, Any], float]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _record(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if activity.in_activity():
+            name = "slack_search_cache_hits" if hit else "slack_search_cache_misses"
+            activity.metric_meter().create_counter(name, "Slack search cache lookups").add(1)
+        logger.debug(f"Search cache {'hit' if hit else 'miss'}: {self.stats()}")
+
+
+def _build_search_cache() -> Optional[SearchCache]:
+    if not settings.search_cache_enabled:
+        return None
+    store = SqliteCacheStore(settings.search_cache_path) if settings.search_cache_path else None
+    return SearchCache(settings.search_cache_max_entries, settings.search_cache_ttl_seconds, store)
+
+
+search_cache = _build_search_cache()
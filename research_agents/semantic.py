@@ -0,0 +1,164 @@
+import logging
+import threading
+from dataclasses import replace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from temporalio import workflow
+
+with workflow.unsafe.imports_passed_through():
+    from config import settings
+    from research_agents.embeddings import EmbeddingBackend, get_embedder
+    from research_agents.mirror import MessageMirror, MirrorQuery, message_mirror
+    from research_agents.ranking import tokenize
+
+logger = logging.getLogger(__name__)
+
+EMBED_BATCH_SIZE = 256
+# Candidates taken from each ranking before fusion
+FUSION_CANDIDATES = 200
+# Standard reciprocal rank fusion constant; damps the advantage of the very top ranks
+RRF_K = 60
+
+
+class VectorIndex:
+    """Flat in-memory vector index: a query is scored against every row in one matrix product.
+
+    Rows carry the channel, time and author of their message so Slack-style filters become
+    a boolean mask over the scores.
+    """
+
+    def __init__(self) -> None:
+        self.ids = np.empty(0, dtype=np.int64)
+        self.channels = np.empty(0, dtype=object)
+        self.created = np.empty(0, dtype=np.float64)
+        self.users = np.empty(0, dtype=object)
+        self.usernames = np.empty(0, dtype=object)
+        self.vectors: Optional[np.ndarray] = None
+        self._positions: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, ids: Sequence[int], vectors: np.ndarray, channels: Sequence[str], created: Sequence[float],
+            users: Sequence[Optional[str]], usernames: Sequence[Optional[str]]) -> None:
+        new_rows = []
+        for row, message_id in enumerate(ids):
+            position = self._positions.get(message_id)
+            if position is None:
+                new_rows.append(row)
+            else:
+                # Re-embedded after an edit
+                self.vectors[position] = vectors[row]
+        if not new_rows:
+            return
+        start = len(self.ids)
+        self.ids = np.concatenate([self.ids, np.asarray([ids[row] for row in new_rows], dtype=np.int64)])
+        self.channels = np.concatenate([self.channels, np.asarray([channels[row] for row in new_rows], dtype=object)])
+        self.created = np.concatenate([self.created, np.asarray([created[row] for row in new_rows], dtype=np.float64)])
+        self.users = np.concatenate([self.users, np.asarray([users[row] for row in new_rows], dtype=object)])
+        self.usernames = np.concatenate([self.usernames, np.asarray([usernames[row] for row in new_rows], dtype=object)])
+        added = vectors[new_rows]
+        self.vectors = added if self.vectors is None else np.vstack([self.vectors, added])
+        self._positions.update({int(ids[row]): start + i for i, row in enumerate(new_rows)})
+
+    def mask(self, query: MirrorQuery) -> np.ndarray:
+        mask = np.ones(len(self.ids), dtype=bool)
+        if query.channels:
+            mask &= np.isin(self.channels, query.channels)
+        if query.excluded_channels:
+            mask &= ~np.isin(self.channels, query.excluded_channels)
+        if query.users:
+            mask &= np.isin(self.users, query.users) | np.isin(self.usernames, query.users)
+        if query.after is not None:
+            mask &= self.created >= query.after
+        if query.before is not None:
+            mask &= self.created < query.before
+        return mask
+
+    def search(self, vector: np.ndarray, k: int, mask: Optional[np.ndarray] = None,
+               min_score: float = -1.0) -> List[Tuple[int, float]]:
+        if self.vectors is None or k <= 0:
+            return []
+        scores = self.vectors @ vector
+        keep = scores >= min_score
+        if mask is not None:
+            keep &= mask
+        candidates = np.flatnonzero(keep)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(self.ids[i]), float(scores[i])) for i in candidates]
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = RRF_K) -> List[int]:
+    """Merge ranked id lists; ids ranked high in several lists come first."""
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, message_id in enumerate(ranking, 1):
+            scores[message_id] = scores.get(message_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda message_id: -scores[message_id])
+
+
+class SemanticIndex:
+    """Embeddings of mirrored messages, searched alone or fused with the mirror's bm25 ranking."""
+
+    def __init__(self, mirror: MessageMirror, embedder: EmbeddingBackend) -> None:
+        self.mirror = mirror
+        self.embedder = embedder
+        self.index = VectorIndex()
+        self._last_seq = 0
+        self._lock = threading.Lock()
+        mirror.reset_embeddings(embedder.name)
+
+    def embed_pending(self) -> int:
+        """Embed mirrored messages that have no vector yet. Called after each mirror sync."""
+        embedded = 0
+        while True:
+            pending = self.mirror.unembedded_messages(EMBED_BATCH_SIZE)
+            if not pending:
+                break
+            vectors = self.embedder.embed([text for _, text in pending])
+            self.mirror.store_embeddings([(message_id, vector.tobytes()) for (message_id, _), vector in zip(pending, vectors)])
+            embedded += len(pending)
+        if embedded:
+            logger.info(f"Embedded {embedded} mirrored messages with {self.embedder.name}")
+        return embedded
+
+    def refresh(self) -> None:
+        """Load vectors stored since the last refresh into the in-memory index."""
+        with self._lock:
+            rows = self.mirror.embeddings_since(self._last_seq)
+            if not rows:
+                return
+            self.index.add(
+                [row["message_id"] for row in rows],
+                np.vstack([np.frombuffer(row["vector"], dtype=np.float32) for row in rows]),
+                [row["channel"] for row in rows],
+                [row["created"] for row in rows],
+                [row["user"] for row in rows],
+                [row["username"] for row in rows],
+            )
+            self._last_seq = rows[-1]["seq"]
+
+    def search(self, query: MirrorQuery, limit: int, mode: str = "hybrid") -> Tuple[int, List[Dict]]:
+        """Return (total, matches) ranked by meaning, or by meaning and keywords fused."""
+        self.refresh()
+        vector = self.embedder.embed([query.text()])[0]
+        semantic = [message_id for message_id, _ in self.index.search(
+            vector, FUSION_CANDIDATES, self.index.mask(query), self.embedder.min_similarity
+        )]
+        ranked = semantic
+        if mode == "hybrid":
+            # Any query word may match; bm25 rewards messages matching more of them
+            lexical_query = replace(query, terms=tokenize(query.text()), prefixes=[])
+            ranked = reciprocal_rank_fusion([self.mirror.ranked_ids(lexical_query, FUSION_CANDIDATES), semantic])
+        matches = self.mirror.matches_by_id(ranked[:limit])
+        return len(ranked), [matches[message_id] for message_id in ranked[:limit] if message_id in matches]
+
+
+semantic_index = (
+    SemanticIndex(message_mirror, get_embedder())
+    if message_mirror is not None and settings.semantic_search_enabled
+    else None
+)
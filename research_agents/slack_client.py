@@ -0,0 +1,369 @@
+import asyncio
+import json
+import logging
+import ssl
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from slack_sdk import WebClient
+from slack_sdk.http_retry import RateLimitErrorRetryHandler
+from slack_sdk.http_retry.builtin_async_handlers import AsyncRateLimitErrorRetryHandler
+from slack_sdk.web import SlackResponse
+from slack_sdk.web.async_client import AsyncWebClient, AsyncSlackResponse
+from temporalio import activity, workflow
+from temporalio.exceptions import ApplicationError
+
+with workflow.unsafe.imports_passed_through():
+    import aiohttp
+    from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Slack's published per-method budgets (requests per minute)
+TIER_2 = 20
+TIER_3 = 50
+TIER_4 = 100
+POST_MESSAGE = 60  # "special" tier: roughly 1 per second per channel, budgeted per channel below
+
+METHOD_RATE_LIMITS: Dict[str, int] = {
+    "conversations.list": TIER_2,
+    "search.messages": TIER_2,
+    "users.list": TIER_2,
+    "conversations.history": TIER_3,
+    "conversations.replies": TIER_3,
+    "users.info": TIER_4,
+    "auth.test": TIER_4,
+    "chat.postMessage": POST_MESSAGE,
+}
+
+# Methods whose budget Slack counts per channel rather than per workspace
+PER_CHANNEL_METHODS = ("chat.postMessage",)
+
+# Time kept back from the activity's deadline for the API call itself
+REQUEST_ALLOWANCE_SECONDS = 2.0
+
+
+class _TokenBucket:
+    def __init__(self, per_minute: int, burst: int) -> None:
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+
+    def reserve(self, now: float) -> float:
+        """Take a token and return how long the caller must wait before using it.
+
+        Tokens may go negative, which queues callers into successive slots instead
+        of letting them all wake up at once.
+        """
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def refund(self) -> None:
+        self.tokens += 1
+
+    def is_full(self, now: float) -> bool:
+        """Whether the bucket has refilled, so a fresh one would behave the same."""
+        return self.tokens + (now - self.updated_at) * self.rate >= self.capacity
+
+
+class RateLimiter:
+    """Paces Slack API calls per method so concurrent activities stay within Slack's tiers."""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, int]] = None,
+        default_per_minute: int = TIER_3,
+        burst_ratio: float = 0.5,
+    ) -> None:
+        self.limits = dict(METHOD_RATE_LIMITS if limits is None else limits)
+        self.default_per_minute = default_per_minute
+        self.burst_ratio = burst_ratio
+        self._buckets: Dict[str, _TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, method: str, channel: Optional[str] = None) -> _TokenBucket:
+        key = f"{method}:{channel}" if channel and method in PER_CHANNEL_METHODS else method
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if key != method:
+                self._evict_idle_channel_buckets()
+            per_minute = self.limits.get(method, self.default_per_minute)
+            bucket = _TokenBucket(per_minute, max(1, int(per_minute * self.burst_ratio)))
+            self._buckets[key] = bucket
+        return bucket
+
+    def _evict_idle_channel_buckets(self) -> None:
+        """Drop refilled per-channel buckets, so one per channel ever posted to doesn't pile up."""
+        now = time.monotonic()
+        for key in [key for key, bucket in self._buckets.items() if ":" in key and bucket.is_full(now)]:
+            del self._buckets[key]
+
+    def reserve(self, method: str, channel: Optional[str] = None, max_wait: Optional[float] = None) -> float:
+        """Take a call slot and return the wait before it.
+
+        If the wait would exceed max_wait, the slot is handed back and a retryable
+        ApplicationError asks Temporal to retry the activity once the budget allows.
+        """
+        with self._lock:
+            bucket = self._bucket(method, channel)
+            delay = bucket.reserve(time.monotonic())
+            if max_wait is None or delay <= max_wait:
+                return delay
+            bucket.refund()
+        raise ApplicationError(
+            f"Slack rate limit for {method} needs a {delay:.1f}s wait, longer than the activity has left",
+            type="SlackRateLimited",
+            next_retry_delay=timedelta(seconds=delay),
+        )
+
+    def acquire(self, method: str, channel: Optional[str] = None) -> None:
+        delay = self.reserve(method, channel, max_wait=_activity_wait_budget())
+        if delay > 0:
+            logger.debug(f"Pacing {method} for {delay:.2f}s to stay within Slack rate limits")
+            time.sleep(delay)
+
+    async def acquire_async(self, method: str, channel: Optional[str] = None) -> None:
+        delay = self.reserve(method, channel, max_wait=_activity_wait_budget())
+        if delay > 0:
+            logger.debug(f"Pacing {method} for {delay:.2f}s to stay within Slack rate limits")
+            await asyncio.sleep(delay)
+
+    def penalize(self, method: str, retry_after: float, channel: Optional[str] = None) -> None:
+        """Drain a method's budget after Slack answered with a 429 and Retry-After."""
+        with self._lock:
+            bucket = self._bucket(method, channel)
+            bucket.tokens = min(bucket.tokens, -retry_after * bucket.rate)
+            bucket.updated_at = time.monotonic()
+
+
+def _activity_wait_budget() -> Optional[float]:
+    """Seconds a rate-limit wait may take before the current activity times out; None outside activities."""
+    if not activity.in_activity():
+        return None
+    info = activity.info()
+    deadlines = []
+    if info.start_to_close_timeout:
+        deadlines.append(info.started_time + info.start_to_close_timeout)
+    if info.schedule_to_close_timeout:
+        deadlines.append(info.scheduled_time + info.schedule_to_close_timeout)
+    if not deadlines:
+        return None
+    left = (min(deadlines) - datetime.now(timezone.utc)).total_seconds()
+    return max(0.0, left - REQUEST_ALLOWANCE_SECONDS)
+
+
+def _call_channel(method: str, kwargs: Dict[str, Any]) -> Optional[str]:
+    if method not in PER_CHANNEL_METHODS:
+        return None
+    for field in ("json", "params", "data"):
+        body = kwargs.get(field)
+        if isinstance(body, dict) and body.get("channel"):
+            return body["channel"]
+    return None
+
+
+def _request_channel(method: str, request) -> Optional[str]:
+    """Channel of a retried request, read from its body, for methods budgeted per channel."""
+    if method not in PER_CHANNEL_METHODS:
+        return None
+    if getattr(request, "body_params", None):
+        return request.body_params.get("channel")
+    data = getattr(request, "data", None)
+    if not isinstance(data, (bytes, str)):
+        return None
+    text = data.decode() if isinstance(data, bytes) else data
+    try:
+        body = json.loads(text)
+        return body.get("channel") if isinstance(body, dict) else None
+    except ValueError:
+        return (parse_qs(text).get("channel") or [None])[0]
+
+
+def _method_from_url(url: str) -> str:
+    return urlparse(url).path.rsplit("/", 1)[-1]
+
+
+def _retry_after(headers: Dict[str, list]) -> float:
+    for key, value in headers.items():
+        if key.lower() == "retry-after":
+            try:
+                return float(value[0] if isinstance(value, list) else value)
+            except (TypeError, ValueError):
+                break
+    return 1.0
+
+
+class PacedRateLimitErrorRetryHandler(RateLimitErrorRetryHandler):
+    """Retries 429s like the SDK handler, and tells the shared limiter to back off."""
+
+    def __init__(self, limiter: RateLimiter, max_retry_count: int = 1) -> None:
+        super().__init__(max_retry_count=max_retry_count)
+        self.limiter = limiter
+
+    def prepare_for_next_attempt(self, *, state, request, response=None, error=None) -> None:
+        if response is not None:
+            method = _method_from_url(request.url)
+            self.limiter.penalize(method, _retry_after(response.headers), _request_channel(method, request))
+        super().prepare_for_next_attempt(state=state, request=request, response=response, error=error)
+
+
+class AsyncPacedRateLimitErrorRetryHandler(AsyncRateLimitErrorRetryHandler):
+    def __init__(self, limiter: RateLimiter, max_retry_count: int = 1) -> None:
+        super().__init__(max_retry_count=max_retry_count)
+        self.limiter = limiter
+
+    async def prepare_for_next_attempt_async(self, *, state, request, response=None, error=None) -> None:
+        if response is not None:
+            method = _method_from_url(request.url)
+            self.limiter.penalize(method, _retry_after(response.headers), _request_channel(method, request))
+        await super().prepare_for_next_attempt_async(state=state, request=request, response=response, error=error)
+
+
+class RateLimitedWebClient(WebClient):
+    """WebClient that waits for its per-method budget before every API call."""
+
+    def __init__(self, limiter: RateLimiter, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.limiter = limiter
+
+    def api_call(self, api_method: str, **kwargs) -> SlackResponse:
+        self.limiter.acquire(api_method, _call_channel(api_method, kwargs))
+        return super().api_call(api_method, **kwargs)
+
+
+class RateLimitedAsyncWebClient(AsyncWebClient):
+    """AsyncWebClient that awaits its per-method budget before every API call."""
+
+    def __init__(self, limiter: RateLimiter, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.limiter = limiter
+
+    async def api_call(self, api_method: str, **kwargs) -> AsyncSlackResponse:
+        await self.limiter.acquire_async(api_method, _call_channel(api_method, kwargs))
+        return await super().api_call(api_method, **kwargs)
+
+
+_clients: Dict[str, WebClient] = {}
+_limiters: Dict[str, RateLimiter] = {}
+_clients_lock = threading.Lock()
+_ssl_context: Optional[ssl.SSLContext] = None
+
+
+def _indexer_enabled() -> bool:
+    return bool(settings.mirror_path and settings.mirror_channels)
+
+
+def _scaled_limiter(share: float) -> RateLimiter:
+    return RateLimiter(
+        limits={method: max(1, int(per_minute * share)) for method, per_minute in METHOD_RATE_LIMITS.items()},
+        default_per_minute=max(1, int(TIER_3 * share)),
+    )
+
+
+def get_rate_limiter(token: str) -> RateLimiter:
+    """Slack budgets are per token, so every client built for a token shares one limiter.
+
+    When the mirror indexer runs, it gets settings.mirror_rate_limit_share of each budget
+    and the activities get the rest.
+    """
+    with _clients_lock:
+        limiter = _limiters.get(token)
+        if limiter is None:
+            limiter = _scaled_limiter(1 - settings.mirror_rate_limit_share) if _indexer_enabled() else RateLimiter()
+            _limiters[token] = limiter
+        return limiter
+
+
+def get_indexer_web_client(token: str) -> WebClient:
+    """WebClient for the mirror indexer, paced by its own smaller limiter.
+
+    A backfill can then only use the indexer's share of Slack's budget, never the part
+    interactive activities are waiting on.
+    """
+    limiter = _scaled_limiter(settings.mirror_rate_limit_share)
+    retry_handlers = [PacedRateLimitErrorRetryHandler(limiter, max_retry_count=settings.slack_max_retries)]
+    if settings.slack_rate_limit_enabled:
+        return RateLimitedWebClient(limiter, token=token, ssl=_shared_ssl_context(), retry_handlers=retry_handlers)
+    return WebClient(token=token, ssl=_shared_ssl_context(), retry_handlers=retry_handlers)
+
+
+def get_shared_web_client(token: str) -> WebClient:
+    """Return the worker-wide WebClient for a token, creating it on first use."""
+    client = _clients.get(token)
+    if client is not None:
+        return client
+    limiter = get_rate_limiter(token)
+    with _clients_lock:
+        client = _clients.get(token)
+        if client is None:
+            retry_handlers = [PacedRateLimitErrorRetryHandler(limiter, max_retry_count=settings.slack_max_retries)]
+            if settings.slack_rate_limit_enabled:
+                client = RateLimitedWebClient(limiter, token=token, ssl=_shared_ssl_context(), retry_handlers=retry_handlers)
+            else:
+                client = WebClient(token=token, ssl=_shared_ssl_context(), retry_handlers=retry_handlers)
+            _clients[token] = client
+        return client
+
+
+_async_clients: Dict[str, AsyncWebClient] = {}
+_async_session: Optional[aiohttp.ClientSession] = None
+_async_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _shared_ssl_context() -> ssl.SSLContext:
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = ssl.create_default_context()
+    return _ssl_context
+
+
+def get_shared_session() -> aiohttp.ClientSession:
+    """Return the worker's pooled aiohttp session, bound to the running event loop."""
+    global _async_session, _async_loop
+    loop = asyncio.get_running_loop()
+    if _async_session is None or _async_session.closed or _async_loop is not loop:
+        connector = aiohttp.TCPConnector(limit=settings.slack_http_pool_size, ssl=_shared_ssl_context())
+        _async_session = aiohttp.ClientSession(connector=connector)
+        _async_loop = loop
+        _async_clients.clear()
+    return _async_session
+
+
+def get_shared_async_web_client(token: str) -> AsyncWebClient:
+    """Return the worker-wide AsyncWebClient for a token, sharing one aiohttp session."""
+    session = get_shared_session()
+    client = _async_clients.get(token)
+    if client is None:
+        limiter = get_rate_limiter(token)
+        retry_handlers = [AsyncPacedRateLimitErrorRetryHandler(limiter, max_retry_count=settings.slack_max_retries)]
+        if settings.slack_rate_limit_enabled:
+            client = RateLimitedAsyncWebClient(limiter, token=token, session=session, retry_handlers=retry_handlers)
+        else:
+            client = AsyncWebClient(token=token, session=session, retry_handlers=retry_handlers)
+        _async_clients[token] = client
+    return client
+
+
+async def close_shared_session() -> None:
+    global _async_session, _async_loop
+    if _async_session is not None and not _async_session.closed:
+        await _async_session.close()
+    _async_session = None
+    _async_loop = None
+    _async_clients.clear()
+
+
+def reset_shared_clients() -> None:
+    """Drop cached clients and limiters, e.g. between tests or after rotating tokens."""
+    with _clients_lock:
+        _clients.clear()
+        _limiters.clear()
+    _async_clients.clear()
@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Optional
+
+from agents import (
+    Agent,
+    ModelSettings,
+)
+
+from research_agents.routing import model_for
+
+def get_summary_prompt(now: datetime) -> str:
+    return f"""
+You work in a group of agents for searching and analyzing a company's internal Slack conversations.
+You compress the earlier part of a research conversation so later turns can build on it without rereading it.
+
+You get a transcript of the user's questions, the agents' answers and previews of tool outputs.
+Write a summary in Markdown, at most 400 words, with:
+- The questions the user asked, in order, and any clarifications they gave
+- The findings reported for each question, keeping names, dates, numbers and decisions
+- Channels searched, keyword groups that worked, and searches that found nothing
+- Links that were cited, copied exactly (including ref:xxxxx links)
+- Open questions or follow-ups the user asked for
+
+Do not add anything that is not in the transcript.
+
+Current date and time: {now.isoformat()}
+"""
+
+def init_summary_agent(now: datetime, model: Optional[str] = None):
+    return Agent(
+        name="Summary Agent",
+        instructions=get_summary_prompt(now),
+        model_settings=ModelSettings(temperature=0),
+        model=model or model_for("summary"),
+    )
@@ -0,0 +1,56 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from temporalio import workflow
+
+with workflow.unsafe.imports_passed_through():
+    from config import settings
+
+ThreadKey = Tuple[str, str]
+# (latest_reply, reply_count) of the parent message; changes whenever someone replies
+ThreadVersion = Tuple[Optional[str], int]
+
+
+class CachedThread(NamedTuple):
+    version: ThreadVersion
+    messages: List[Dict[str, Any]]
+
+
+def thread_version(messages: List[Dict[str, Any]]) -> ThreadVersion:
+    parent = messages[0] if messages else {}
+    return parent.get("latest_reply"), parent.get("reply_count", 0)
+
+
+class ThreadCache:
+    """Bounded LRU of raw conversations.replies messages keyed by (channel, thread ts).
+
+    Entries carry the parent's thread version so callers can check freshness with a
+    single limit=1 request instead of paging through the whole thread again.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[ThreadKey, CachedThread] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: ThreadKey) -> Optional[CachedThread]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: ThreadKey, messages: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._entries[key] = CachedThread(thread_version(messages), messages)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+thread_cache = ThreadCache(settings.thread_cache_max_entries) if settings.thread_cache_max_entries > 0 else None
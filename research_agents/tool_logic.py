@@ -0,0 +1,482 @@
+from __future__ import annotations
+
+import logging
+import math
+import re
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+from temporalio import workflow
+
+with workflow.unsafe.imports_passed_through():
+    from config import settings
+    from research_agents.directory import channel_directory, user_directory, _user_record
+    from research_agents.ranking import BM25Index, hamming, simhash, tokenize
+    from research_agents.semantic import reciprocal_rank_fusion
+    from research_agents.compact import clip_text, folded_note, render_matches
+
+if TYPE_CHECKING:
+    from research_agents.tools import (
+        FindChannelsRequest,
+        GetThreadsRequest,
+        SemanticSearchRequest,
+        SlackSearchBatchRequest,
+        SlackSearchRequest,
+    )
+
+logger = logging.getLogger(__name__)
+
+# The I/O-free half of the tool activities: request validation, query building, merging and
+# refining search results, fitting threads to a budget, user name substitution and the text
+# the agents see. research_agents.tools and research_agents.async_tools only add the Slack
+# calls and caches around these helpers, so the sync and async activities can't drift apart.
+
+# search.messages returns at most 100 matches per page
+SEARCH_PAGE_SIZE = 100
+MAX_SEARCH_RESULTS = 1000
+MAX_BATCH_SEARCHES = 10
+MAX_BATCH_THREADS = 15
+
+# conversations.replies page size; Slack recommends no more than 200
+THREAD_PAGE_SIZE = 200
+# Latest replies always kept when a thread is cut down to max_chars
+THREAD_TAIL_REPLIES = 3
+
+# SimHash bits two messages may differ in and still count as near-duplicates
+NEAR_DUPLICATE_BITS = 6
+# Shorter messages ("+1", "thanks") only collapse when their tokens are identical
+NEAR_DUPLICATE_MIN_TOKENS = 5
+# Matches shown per thread; the rest are counted on the thread's first match
+THREAD_GROUP_MATCHES = 2
+THREAD_TS_PATTERN = re.compile(r"[?&]thread_ts=([0-9.]+)")
+# Matches <@U123> and <@U123|handle> mentions in message text
+MENTION_PATTERN = re.compile(r"<@([UW][A-Z0-9]+)(?:\|[^>]*)?>")
+
+class SlackSearchResult(BaseModel):
+    query: str = Field(description="The search query that was executed")
+    total: int = Field(description="Total number of matching messages")
+    matches: List[Dict[str, Any]] = Field(description="List of matching message objects")
+    pagination: Optional[Dict[str, Any]] = Field(default=None, description="Pagination information from Slack API")
+    has_more: bool = Field(default=False, description="Whether there are more results available")
+
+# Simplified listings per (directory version, include_archived), rebuilt only after a refresh
+_channel_listings: Dict[Tuple[int, bool], List[Dict[str, Any]]] = {}
+
+def simplify_channels(channels: Dict[str, Dict[str, Any]], include_archived: bool) -> List[Dict[str, Any]]:
+    global _channel_listings
+    key = (channel_directory.version, include_archived)
+    simplified_channels = _channel_listings.get(key)
+    if simplified_channels is None:
+        simplified_channels = [
+            {field: channel[field] for field in ("name", "topic", "purpose") if channel.get(field)}
+            for channel in channels.values()
+            if include_archived or not channel.get("is_archived")
+        ]
+        _channel_listings = {k: v for k, v in _channel_listings.items() if k[0] == key[0]}
+        _channel_listings[key] = simplified_channels
+    logger.debug(f"Returning {len(simplified_channels)} simplified channel records")
+    return simplified_channels
+
+def validate_find_channels_request(request: FindChannelsRequest) -> Optional[str]:
+    if not request.query or not request.query.strip():
+        return "Query parameter is required and cannot be empty"
+    if request.top_k < 1 or request.top_k > 50:
+        return "top_k must be between 1 and 50"
+    return None
+
+# BM25 index over the channel directory, rebuilt only when the directory version changes
+_channel_index: Optional[Tuple[int, List[str], BM25Index]] = None
+
+def _channel_tokens(channel: Dict[str, Any]) -> List[str]:
+    # Names are short and deliberate, so weigh them above free-text topic and purpose
+    return tokenize(channel.get("name", "")) * 3 + tokenize(channel.get("topic", "")) + tokenize(channel.get("purpose", ""))
+
+def rank_channels(channels: Dict[str, Dict[str, Any]], request: FindChannelsRequest) -> List[Dict[str, Any]]:
+    global _channel_index
+    if _channel_index is None or _channel_index[0] != channel_directory.version:
+        channel_ids = list(channels.keys())
+        _channel_index = (channel_directory.version, channel_ids, BM25Index(_channel_tokens(channels[cid]) for cid in channel_ids))
+    _, channel_ids, index = _channel_index
+
+    ranked = []
+    for doc_id, score in index.top_k(tokenize(request.query), len(channel_ids)):
+        channel = channels[channel_ids[doc_id]]
+        if channel.get("is_archived") and not request.include_archived:
+            continue
+        ranked.append({
+            **{field: channel[field] for field in ("name", "topic", "purpose") if channel.get(field)},
+            "score": round(score, 2),
+        })
+        if len(ranked) == request.top_k:
+            break
+    logger.debug(f"Ranked {len(ranked)} of {len(channel_ids)} channels for query '{request.query}'")
+    return ranked
+
+def validate_search_request(request: SlackSearchRequest) -> Optional[str]:
+    if not request.query or not request.query.strip():
+        return "Query parameter is required and cannot be empty"
+    if request.count < 1 or request.count > 100:
+        return "Count must be between 1 and 100"
+    if request.sort not in ["timestamp", "score"]:
+        return "Sort must be either 'timestamp' or 'score'"
+    if request.max_results is not None and (request.max_results < 1 or request.max_results > MAX_SEARCH_RESULTS):
+        return f"max_results must be between 1 and {MAX_SEARCH_RESULTS}"
+    return None
+
+def validate_search_batch_request(request: SlackSearchBatchRequest) -> Optional[str]:
+    if not request.requests:
+        return "At least one search request is required"
+    if len(request.requests) > MAX_BATCH_SEARCHES:
+        return f"At most {MAX_BATCH_SEARCHES} searches can be batched together"
+    errors = []
+    for i, search in enumerate(request.requests, 1):
+        error = validate_search_request(search)
+        if error:
+            errors.append(f"Q{i}: {error}")
+    return "\n".join(errors) or None
+
+def build_search_query(request: SlackSearchRequest) -> str:
+    return f"{request.query.strip()} -in:@Research Bot -is:dm{search_filters(request)}"
+
+def search_filters(request: SlackSearchRequest | SemanticSearchRequest) -> str:
+    search_filters = ""
+    if request.channels:
+        formatted_channels = [f"#{channel.strip()}" if not channel.strip().startswith('#') else channel.strip() for channel in request.channels.split(',')]
+        channel_filter = " ".join([f"in:{channel}" for channel in formatted_channels])
+        search_filters = f"{search_filters} {channel_filter}"
+    if request.start_time:
+        try:
+            dt = datetime.fromisoformat(request.start_time.replace('Z', '+00:00'))
+            search_filters = f"{search_filters} after:{dt.strftime('%Y-%m-%d')}"
+        except ValueError:
+            logger.warning(f"Invalid start_time ISO format: {request.start_time}, ignoring time filter")
+    if request.end_time:
+        try:
+            dt = datetime.fromisoformat(request.end_time.replace('Z', '+00:00'))
+            search_filters = f"{search_filters} before:{dt.strftime('%Y-%m-%d')}"
+        except ValueError:
+            logger.warning(f"Invalid end_time ISO format: {request.end_time}, ignoring time filter")
+    return search_filters
+
+def to_search_result(search_query: str, response: Dict[str, Any]) -> SlackSearchResult:
+    messages = response.get("messages", {})
+    matches = messages.get("matches", [])
+    total = messages.get("total", 0)
+    pagination = messages.get("pagination", {})
+    has_more = pagination.get("total_count", 0) > len(matches)
+
+    logger.debug(f"Search completed - found {total} total results, returning {len(matches)} matches")
+    return SlackSearchResult(query=search_query, total=total, matches=matches, pagination=pagination, has_more=has_more)
+
+def remaining_search_pages(first_response: Dict[str, Any], max_results: int) -> List[int]:
+    messages = first_response.get("messages", {})
+    last_page = math.ceil(min(max_results, messages.get("total", 0)) / SEARCH_PAGE_SIZE)
+    page_count = messages.get("pagination", {}).get("page_count")
+    if page_count:
+        last_page = min(last_page, page_count)
+    return list(range(2, last_page + 1))
+
+def _match_key(match: Dict[str, Any]) -> Tuple[str, str]:
+    channel = match.get("channel") or {}
+    return (channel.get("id") or channel.get("name") or "", match.get("ts") or match.get("permalink") or "")
+
+def merge_search_pages(search_query: str, responses: List[Dict[str, Any]], max_results: int) -> SlackSearchResult:
+    matches: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for response in responses:
+        for match in response.get("messages", {}).get("matches", []):
+            matches.setdefault(_match_key(match), match)
+    merged = list(matches.values())[:max_results]
+    messages = responses[0].get("messages", {})
+    total = messages.get("total", 0)
+
+    logger.debug(f"Merged {len(responses)} search pages - found {total} total results, returning {len(merged)} unique matches")
+    return SlackSearchResult(
+        query=search_query,
+        total=total,
+        matches=merged,
+        pagination={**messages.get("pagination", {}), "pages_fetched": len(responses)},
+        has_more=total > len(merged),
+    )
+
+def merge_batch_matches(results: List[SlackSearchResult | str]) -> List[Dict[str, Any]]:
+    """Deduplicate matches across queries, recording which queries (Q1, Q2, ...) found each one."""
+    matches: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for i, result in enumerate(results, 1):
+        if isinstance(result, str):
+            continue
+        for match in result.matches:
+            merged = matches.setdefault(_match_key(match), {**match, "matched_queries": []})
+            merged["matched_queries"].append(f"Q{i}")
+    return list(matches.values())
+
+def refine_matches(matches: List[Dict[str, Any]], query: Optional[str]) -> List[Dict[str, Any]]:
+    """Rerank matches against query, fold near-duplicates and group matches from the same thread.
+
+    The rerank fuses the order Slack returned with a BM25 ranking of the match texts, so a
+    chronological search still favours recent messages. Matches from one thread follow its
+    best-ranked match, up to THREAD_GROUP_MATCHES; extra thread matches and near-duplicates
+    are counted on the match that absorbs them (thread_matches, duplicates, also_in).
+    """
+    if not settings.search_refine_enabled or len(matches) < 2:
+        return matches
+    order = list(range(len(matches)))
+    documents = [tokenize(match.get("text") or "") for match in matches]
+    query_tokens = tokenize(" ".join(term for term in (query or "").split() if ":" not in term))
+    if query_tokens:
+        scores = BM25Index(documents).scores(query_tokens)
+        relevant = sorted(scores, key=lambda i: (-scores[i], i))
+        order = reciprocal_rank_fusion([order, relevant])
+
+    threads: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    fingerprints: List[Tuple[int, Tuple[str, ...], Dict[str, Any]]] = []
+    for i in order:
+        match = matches[i]
+        fingerprint = simhash(documents[i])
+        original = _near_duplicate(fingerprints, fingerprint, tuple(documents[i]))
+        if original is not None:
+            original["duplicates"] = original.get("duplicates", 0) + 1
+            channel = (match.get("channel") or {}).get("name")
+            if channel and channel != (original.get("channel") or {}).get("name") and channel not in original.setdefault("also_in", []):
+                original["also_in"].append(channel)
+            _fold_queries(original, match)
+            continue
+        thread = threads.setdefault(_thread_key(match), [])
+        if len(thread) >= THREAD_GROUP_MATCHES:
+            thread[0]["thread_matches"] = thread[0].get("thread_matches", 0) + 1
+            _fold_queries(thread[0], match)
+            continue
+        match = dict(match)
+        thread.append(match)
+        fingerprints.append((fingerprint, tuple(documents[i]), match))
+    refined = [match for thread in threads.values() for match in thread]
+    logger.debug(f"Refined {len(matches)} matches to {len(refined)} distinct messages")
+    return refined
+
+def _thread_key(match: Dict[str, Any]) -> Tuple[str, str]:
+    channel, ts = _match_key(match)
+    thread_ts = match.get("thread_ts")
+    if not thread_ts:
+        found = THREAD_TS_PATTERN.search(match.get("permalink") or "")
+        thread_ts = found.group(1) if found else None
+    return (channel, thread_ts or ts)
+
+def _fold_queries(kept: Dict[str, Any], folded: Dict[str, Any]) -> None:
+    """Credit a batch match with the queries that found the match folded into it."""
+    if "matched_queries" in kept:
+        kept["matched_queries"] = sorted({*kept["matched_queries"], *folded.get("matched_queries", [])}, key=lambda q: int(q[1:]))
+
+def _near_duplicate(fingerprints: List[Tuple[int, Tuple[str, ...], Dict[str, Any]]], fingerprint: int, tokens: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+    for other, other_tokens, match in fingerprints:
+        if tokens == other_tokens and tokens:
+            return match
+        if min(len(tokens), len(other_tokens)) >= NEAR_DUPLICATE_MIN_TOKENS and hamming(fingerprint, other) <= NEAR_DUPLICATE_BITS:
+            return match
+    return None
+
+def format_batch_results(results: List[SlackSearchResult | str], matches: List[Dict[str, Any]]) -> str:
+    if settings.tool_output_format == "compact":
+        return render_matches(_batch_summary(results, matches), matches, settings.tool_output_token_budget, tag="matched_queries")
+    output_lines = _batch_summary(results, matches)
+    output_lines.append("")
+
+    for i, match in enumerate(matches, 1):
+        output_lines.append(_format_match(i, match, prefix=f"[{','.join(match['matched_queries'])}] ") + "\n")
+    return "\n".join(output_lines)
+
+def _batch_summary(results: List[SlackSearchResult | str], matches: List[Dict[str, Any]]) -> List[str]:
+    total_matches = sum(len(result.matches) for result in results if not isinstance(result, str))
+    summary = [f"Ran {len(results)} searches: {len(matches)} unique messages ({total_matches} matches before deduplication)"]
+    for i, result in enumerate(results, 1):
+        if isinstance(result, str):
+            summary.append(f"Q{i}: {result}")
+        else:
+            summary.append(f"Q{i}: '{result.query}' - showing {len(result.matches)} of {result.total}")
+    return summary
+
+def parse_thread_url(thread_url: str) -> Tuple[str, str]:
+    url_parts = thread_url.split('/')
+    if len(url_parts) < 6:
+        raise ValueError("Invalid Slack thread URL format")
+    channel_id = url_parts[-2]
+    # Ensure correct timestamp format: 10 digits, period, 6 digits
+    thread_ts = url_parts[-1][1:11] + '.' + url_parts[-1][11:17]
+    return channel_id, thread_ts
+
+def validate_get_threads_request(request: GetThreadsRequest) -> Optional[str]:
+    if not request.thread_urls:
+        return "At least one thread URL is required"
+    if len(request.thread_urls) > MAX_BATCH_THREADS:
+        return f"At most {MAX_BATCH_THREADS} threads can be fetched together"
+    return None
+
+def thread_batch_messages(threads: Dict[str, List[Dict[str, Any]] | str]) -> List[Dict[str, Any]]:
+    # All threads share one name lookup
+    return [msg for messages in threads.values() if isinstance(messages, list) for msg in messages]
+
+def format_threads(threads: Dict[str, List[Dict[str, Any]] | str], request: GetThreadsRequest) -> Dict[str, List[Dict[str, Any]] | str]:
+    return {
+        thread_url: messages if isinstance(messages, str)
+        else fit_thread_budget(format_thread_messages(messages), request.max_chars, request.query)
+        for thread_url, messages in threads.items()
+    }
+
+def replies_page_args(channel_id: str, thread_ts: str, cursor: Optional[str]) -> Dict[str, Any]:
+    args = {"channel": channel_id, "ts": thread_ts, "limit": THREAD_PAGE_SIZE}
+    if cursor:
+        args["cursor"] = cursor
+    return args
+
+def thread_messages(pages: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """A thread's messages from its conversations.replies pages, once each; every page repeats the parent."""
+    seen = set()
+    messages = []
+    for page in pages:
+        for msg in page:
+            ts = msg.get("ts")
+            if ts and ts in seen:
+                continue
+            seen.add(ts)
+            messages.append(msg)
+    return messages
+
+def fit_thread_budget(messages: List[Dict[str, Any]], max_chars: Optional[int], query: Optional[str]) -> List[Dict[str, Any]]:
+    """Keep at most max_chars of text: the opening message, the latest replies, then the middle replies most relevant to query."""
+    if not max_chars or sum(len(msg.get("text") or "") for msg in messages) <= max_chars:
+        return messages
+
+    tail_start = max(1, len(messages) - THREAD_TAIL_REPLIES)
+    middle = list(range(1, tail_start))
+    query_tokens = tokenize(query or "")
+    if query_tokens and middle:
+        scores = BM25Index(tokenize(messages[i].get("text") or "") for i in middle).scores(query_tokens)
+        middle.sort(key=lambda i: (-scores.get(i - 1, 0.0), -i))
+    else:
+        middle.reverse()
+
+    budget = max_chars
+    kept: Dict[int, Dict[str, Any]] = {}
+    for i in [0, *range(len(messages) - 1, tail_start - 1, -1), *middle]:
+        text = messages[i].get("text") or ""
+        if len(text) <= budget:
+            kept[i] = messages[i]
+        elif i == 0:
+            # A long opening message still has to leave room for replies
+            text = clip_text(text, max_chars // 2)
+            kept[i] = {**messages[i], "text": text}
+        else:
+            continue
+        budget -= len(text)
+
+    fitted: List[Dict[str, Any]] = []
+    omitted = 0
+    for i, msg in enumerate(messages):
+        if i not in kept:
+            omitted += 1
+            continue
+        if omitted:
+            fitted.append(_omitted_replies(omitted))
+            omitted = 0
+        fitted.append(kept[i])
+    if omitted:
+        fitted.append(_omitted_replies(omitted))
+    logger.debug(f"Kept {len(kept)} of {len(messages)} thread messages within {max_chars} characters")
+    return fitted
+
+def _omitted_replies(count: int) -> Dict[str, Any]:
+    return {"text": f"[{count} {'reply' if count == 1 else 'replies'} omitted]", "user": None, "timestamp": None, "omitted": count}
+
+def format_thread_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    logger.debug(f"Retrieved {len(messages)} messages from thread")
+    thread_messages = [{
+        "text": msg.get("text"),
+        "user": msg.get("user"),
+        "timestamp": msg.get("ts"),
+        "reply_count": msg.get("reply_count", 0),
+        "reply_users_count": msg.get("reply_users_count", 0)
+    } for msg in messages]
+    logger.debug(f"Returning {len(thread_messages)} formatted messages")
+    return thread_messages
+
+def message_user_ids(messages: List[Dict[str, Any]]) -> List[str]:
+    user_ids: Dict[str, None] = {}
+    for msg in messages:
+        if msg.get("user"):
+            user_ids[msg["user"]] = None
+        for user_id in MENTION_PATTERN.findall(msg.get("text") or ""):
+            user_ids[user_id] = None
+    return list(user_ids)
+
+def apply_user_names(messages: List[Dict[str, Any]], names: Dict[str, str], name_field: str) -> None:
+    """Write display names into name_field and rewrite <@U123> mentions as @name, in place."""
+    for msg in messages:
+        if msg.get("user") in names:
+            msg[name_field] = names[msg["user"]]
+        if msg.get("text"):
+            msg["text"] = MENTION_PATTERN.sub(lambda m: f"@{names.get(m.group(1), m.group(1))}", msg["text"])
+
+def cached_user_names(users: Dict[str, Dict[str, Any]], user_ids: List[str]) -> Tuple[Dict[str, str], List[str]]:
+    names: Dict[str, str] = {}
+    missing: List[str] = []
+    for user_id in dict.fromkeys(user_ids):
+        user = users.get(user_id)
+        if user:
+            names[user_id] = user["name"]
+        else:
+            missing.append(user_id)
+    logger.debug(f"Resolved {len(names)} of {len(names) + len(missing)} user names from the directory")
+    return names, missing
+
+def user_info_record(user_id: str, response: Dict[str, Any]) -> Dict[str, Any]:
+    """Directory record for a user fetched with users.info."""
+    return _user_record({**response.get('user', {}), "id": user_id})
+
+def merge_fetched_users(names: Dict[str, str], fetched: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+    if fetched:
+        user_directory.update(fetched)
+        names.update({user_id: user["name"] for user_id, user in fetched.items()})
+    return names
+
+def format_search_results(result: SlackSearchResult) -> str:
+        if result.total == 0:
+            return f"No messages found for query: '{result.query}'"
+
+        if settings.tool_output_format == "compact":
+            header = [f"Found {result.total} messages for query: '{result.query}' (ages relative to now)"]
+            return render_matches(header, result.matches, settings.tool_output_token_budget)
+
+        # Format results for LLM
+        output_lines = [
+            f"Found {result.total} messages for query: '{result.query}'",
+            f"Showing top {len(result.matches)} results:\n"
+        ]
+
+        for i, match in enumerate(result.matches, 1):
+            output_lines.append(_format_match(i, match) + "\n")
+
+        if result.has_more:
+            output_lines.append(f"... and {result.total - len(result.matches)} more results")
+
+        return "\n".join(output_lines)
+
+def _format_match(i: int, match: Dict[str, Any], prefix: str = "") -> str:
+    user = match.get('username', 'Unknown')
+    channel = match.get('channel', {}).get('name', 'unknown-channel')
+    text = match.get('text', '')[:200] + ('...' if len(match.get('text', '')) > 200 else '')
+    timestamp = match.get('ts', '')
+    permalink = match.get('permalink', '')
+
+    # Format each result
+    result_text = f"{i}. {prefix}#{channel} - {user}"
+    if timestamp:
+        try:
+            dt = datetime.fromtimestamp(float(timestamp))
+            result_text += f" ({dt.strftime('%Y-%m-%d %H:%M')})"
+        except:
+            pass
+    result_text += folded_note(match)
+
+    result_text += f"\n   {text}"
+    if permalink:
+        result_text += f"\n   Link: {permalink}"
+    return result_text
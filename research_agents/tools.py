@@ -1,56 +1,125 @@
+import contextvars
 import logging
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Any, Optional, Tuple, TypeVar
+from datetime import timedelta
 
 from pydantic import BaseModel, Field
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 from temporalio import activity, workflow
+from temporalio.contrib.openai_agents import workflow as agent_workflow
+from temporalio.exceptions import ApplicationError
 
 with workflow.unsafe.imports_passed_through():
     from config import settings
+    from research_agents.slack_client import get_shared_web_client
+    from research_agents.directory import (
+        channel_directory,
+        list_all_channels,
+        user_directory,
+        list_all_users,
+        _next_cursor,
+    )
+    from research_agents.search_cache import search_cache, cache_key
+    from research_agents.thread_cache import CachedThread, thread_cache, thread_version
+    from research_agents.mirror import message_mirror, parse_search_query
+    from research_agents.semantic import semantic_index
+    from research_agents.compact import with_references
+    from research_agents.tool_logic import (
+        MAX_BATCH_SEARCHES,
+        SEARCH_PAGE_SIZE,
+        SlackSearchResult,
+        apply_user_names,
+        build_search_query,
+        cached_user_names,
+        fit_thread_budget,
+        format_batch_results,
+        format_search_results,
+        format_thread_messages,
+        format_threads,
+        merge_batch_matches,
+        merge_fetched_users,
+        merge_search_pages,
+        message_user_ids,
+        parse_thread_url,
+        rank_channels,
+        refine_matches,
+        remaining_search_pages,
+        replies_page_args,
+        search_filters,
+        simplify_channels,
+        thread_batch_messages,
+        thread_messages,
+        to_search_result,
+        user_info_record,
+        validate_find_channels_request,
+        validate_get_threads_request,
+        validate_search_batch_request,
+        validate_search_request,
+    )
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Prompt lines for agents that get semantic_search_tools(True) or compact tool output
+SEMANTIC_SEARCH_HINT = "- Start with one semantic_search_slack call phrased as the question; it matches by meaning across the mirrored channels, so only fall back to keyword variants for what it misses.\n"
+COMPACT_OUTPUT_HINT = "- Search results name each message by a short ref (e.g. k3x9q) instead of a URL. Link to a message as [label](ref:k3x9q); refs are replaced with permalinks before posting.\n"
+
 class GetChannelsRequest(BaseModel):
     include_archived: bool = Field(default=False, description="Whether to include archived channels in the results")
 
+class FindChannelsRequest(BaseModel):
+    query: str = Field(description="The user's question or keywords describing the topic to research")
+    top_k: int = Field(default=15, description="Maximum number of channels to return (1-50)")
+    include_archived: bool = Field(default=False, description="Whether to include archived channels in the results")
+
 class SlackSearchRequest(BaseModel):
     query: str = Field(description="Search query string to find messages")
     channels: Optional[str] = Field(default=None, description="Comma-separated list of channel names to search in")
     sort: str = Field(default="timestamp", description="Sort order: 'timestamp' (chronological) or 'score' (relevance)")
     count: int = Field(default=40, description="Number of results to return (1-100)")
+    max_results: Optional[int] = Field(default=None, description="Fetch several result pages at once and return up to this many deduplicated matches (1-1000). Overrides count")
     start_time: Optional[str] = Field(default=None, description="ISO format start time filter")
     end_time: Optional[str] = Field(default=None, description="ISO format end time filter")
+    resolve_user_names: bool = Field(default=True, description="Replace Slack user IDs and @-mentions with display names")
 
-class SlackSearchResult(BaseModel):
-    query: str = Field(description="The search query that was executed")
-    total: int = Field(description="Total number of matching messages")
-    matches: List[Dict[str, Any]] = Field(description="List of matching message objects")
-    pagination: Optional[Dict[str, Any]] = Field(default=None, description="Pagination information from Slack API")
-    has_more: bool = Field(default=False, description="Whether there are more results available")
+class SlackSearchBatchRequest(BaseModel):
+    requests: List[SlackSearchRequest] = Field(description="Searches to run together, e.g. a global search plus channel-scoped searches for each keyword group (max 10)")
+
+class SemanticSearchRequest(BaseModel):
+    query: str = Field(description="What to look for, in plain language. No need to expand it into keyword variants")
+    channels: Optional[str] = Field(default=None, description="Comma-separated list of channel names to search in")
+    count: int = Field(default=40, description="Number of results to return (1-100)")
+    mode: str = Field(default="hybrid", description="'hybrid' (keywords and meaning fused) or 'semantic' (meaning only)")
+    start_time: Optional[str] = Field(default=None, description="ISO format start time filter")
+    end_time: Optional[str] = Field(default=None, description="ISO format end time filter")
+    resolve_user_names: bool = Field(default=True, description="Replace Slack user IDs and @-mentions with display names")
 
 class ThreadInput(BaseModel):
     thread_url: str = Field(description="Slack thread URL to retrieve messages from")
+    max_chars: Optional[int] = Field(default=None, description="Character budget for message text. Long threads keep the opening message, the latest replies and the middle replies most relevant to query")
+    query: Optional[str] = Field(default=None, description="Topic used to pick which middle replies to keep when max_chars is set")
+    resolve_user_names: bool = Field(default=True, description="Replace Slack user IDs and @-mentions with display names")
+
+class GetThreadsRequest(BaseModel):
+    thread_urls: List[str] = Field(description="Slack thread URLs to retrieve messages from, e.g. permalinks from search results (max 15)")
+    max_chars: Optional[int] = Field(default=None, description="Character budget for each thread's message text. Long threads keep the opening message, the latest replies and the middle replies most relevant to query")
+    query: Optional[str] = Field(default=None, description="Topic used to pick which middle replies to keep when max_chars is set")
+    resolve_user_names: bool = Field(default=True, description="Replace Slack user IDs and @-mentions with display names")
 
 class GetUserNameRequest(BaseModel):
     user_id: str = Field(description="Slack user ID to get the display name for")
 
+class GetUserNamesRequest(BaseModel):
+    user_ids: List[str] = Field(description="Slack user IDs to get display names for")
+
 @activity.defn
 def get_slack_channels(request: GetChannelsRequest) -> List[Dict[str, Any]]:
     try:
         client = get_slack_client()
-        channel_types = ["public_channel"]
-        response = client.conversations_list(
-            exclude_archived=not request.include_archived,
-            types=",".join(channel_types),
-            limit=1000
-        )
-        channels = response.get("channels", [])
-        simplified_channels = [{"name": channel.get("name")} for channel in channels]
-        logger.debug(f"Returning {len(simplified_channels)} simplified channel records")
-        return simplified_channels
+        channels = channel_directory.get(lambda: list_all_channels(client))
+        return simplify_channels(channels, request.include_archived)
     except SlackApiError as e:
         logger.error(f"Slack API error: {e.response['error']}")
         raise
@@ -59,74 +128,112 @@ def get_slack_channels(request: GetChannelsRequest) -> List[Dict[str, Any]]:
         raise
 
 @activity.defn
-def search_slack(request: SlackSearchRequest) -> SlackSearchResult | str:
-    if not request.query or not request.query.strip():
-        return "Query parameter is required and cannot be empty"
-    if request.count < 1 or request.count > 100:
-        return "Count must be between 1 and 100"
-    if request.sort not in ["timestamp", "score"]:
-        return "Sort must be either 'timestamp' or 'score'"
+def find_relevant_channels(request: FindChannelsRequest) -> List[Dict[str, Any]] | str:
+    error = validate_find_channels_request(request)
+    if error:
+        return error
 
     try:
-        search_query = f"{request.query.strip()} -in:@Research Bot -is:dm"
-        if request.channels:
-            formatted_channels = [f"#{channel.strip()}" if not channel.strip().startswith('#') else channel.strip() for channel in request.channels.split(',')]
-            channel_filter = " ".join([f"in:{channel}" for channel in formatted_channels])
-            search_query = f"{search_query} {channel_filter}"
-        if request.start_time:
-            try:
-                dt = datetime.fromisoformat(request.start_time.replace('Z', '+00:00'))
-                search_query = f"{search_query} after:{dt.strftime('%Y-%m-%d')}"
-            except ValueError:
-                logger.warning(f"Invalid start_time ISO format: {request.start_time}, ignoring time filter")
-        if request.end_time:
-            try:
-                dt = datetime.fromisoformat(request.end_time.replace('Z', '+00:00'))
-                search_query = f"{search_query} before:{dt.strftime('%Y-%m-%d')}"
-            except ValueError:
-                logger.warning(f"Invalid end_time ISO format: {request.end_time}, ignoring time filter")
+        client = get_slack_client()
+        channels = channel_directory.get(lambda: list_all_channels(client))
+        return rank_channels(channels, request)
+    except SlackApiError as e:
+        logger.error(f"Slack API error: {e.response['error']}")
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error ranking Slack channels: {str(e)}")
+        raise
 
-        logger.debug(f"Executing Slack search with query: '{search_query}'")
+@activity.defn
+def search_slack(request: SlackSearchRequest) -> SlackSearchResult | str:
+    error = validate_search_request(request)
+    if error:
+        return error
+
+    try:
         client = get_slack_client()
-        response = client.search_messages(query=search_query, sort=request.sort, count=request.count)
-        messages = response.get("messages", {})
-        matches = messages.get("matches", [])
-        total = messages.get("total", 0)
-        pagination = messages.get("pagination", {})
-        has_more = pagination.get("total_count", 0) > len(matches)
-
-        logger.debug(f"Search completed - found {total} total results, returning {len(matches)} matches")
-        result = SlackSearchResult(query=search_query, total=total, matches=matches, pagination=pagination, has_more=has_more)
-        return _format_search_results(result)
+        result = _run_search(client, request)
+        result.matches = refine_matches(result.matches, request.query)
+        if request.resolve_user_names:
+            _enrich_user_names(client, result.matches, name_field="username")
+        return format_search_results(result)
     except SlackApiError as e:
         logger.error(f"Slack API error during search: {e.response['error']}")
         return f"Slack API error: {e.response['error']}"
+    except ApplicationError:
+        raise
     except Exception as e:
         logger.error(f"Unexpected error during Slack search: {str(e)}")
         return f"Error searching Slack: {str(e)}"
 
+@activity.defn
+def search_slack_batch(request: SlackSearchBatchRequest) -> str:
+    error = validate_search_batch_request(request)
+    if error:
+        return error
+
+    try:
+        client = get_slack_client()
+
+        def run(search: SlackSearchRequest) -> SlackSearchResult | str:
+            try:
+                return _run_search(client, search)
+            except SlackApiError as e:
+                logger.error(f"Slack API error during batch search: {e.response['error']}")
+                return f"Slack API error: {e.response['error']}"
+
+        results = _fan_out(run, request.requests, settings.search_fanout_concurrency)
+        matches = refine_matches(merge_batch_matches(results), " ".join(search.query for search in request.requests))
+        if any(search.resolve_user_names for search in request.requests):
+            _enrich_user_names(client, matches, name_field="username")
+        return format_batch_results(results, matches)
+    except SlackApiError as e:
+        logger.error(f"Slack API error during batch search: {e.response['error']}")
+        return f"Slack API error: {e.response['error']}"
+    except ApplicationError:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error during Slack batch search: {str(e)}")
+        return f"Error searching Slack: {str(e)}"
+
+@activity.defn
+def semantic_search_slack(request: SemanticSearchRequest) -> str:
+    error = validate_semantic_search_request(request)
+    if error:
+        return error
+
+    try:
+        result = run_semantic_search(request)
+        # Already ranked by meaning; only fold threads and near-duplicates
+        result.matches = refine_matches(result.matches, None)
+        if request.resolve_user_names:
+            _enrich_user_names(get_slack_client(), result.matches, name_field="username")
+        return format_search_results(result)
+    except SlackApiError as e:
+        logger.error(f"Slack API error during semantic search: {e.response['error']}")
+        return f"Slack API error: {e.response['error']}"
+    except ApplicationError:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error during semantic search: {str(e)}")
+        return f"Error searching Slack: {str(e)}"
+
+def semantic_search_tools(enabled: bool) -> list:
+    """The semantic_search_slack agent tool, or nothing when semantic search is off for the conversation."""
+    if not enabled:
+        return []
+    return [with_references(agent_workflow.activity_as_tool(semantic_search_slack, start_to_close_timeout=timedelta(seconds=30)))]
+
 @activity.defn
 def get_thread_messages(params: ThreadInput) -> List[Dict[str, Any]]:
     try:
-        url_parts = params.thread_url.split('/')
-        if len(url_parts) < 6:
-            raise ValueError("Invalid Slack thread URL format")
-        channel_id = url_parts[-2]
-        # Ensure correct timestamp format: 10 digits, period, 6 digits
-        thread_ts = url_parts[-1][1:11] + '.' + url_parts[-1][11:17]
+        channel_id, thread_ts = parse_thread_url(params.thread_url)
         client = get_slack_client()
-        response = client.conversations_replies(channel=channel_id, ts=thread_ts)
-        messages = response.get("messages", [])
-        logger.debug(f"Retrieved {len(messages)} messages from thread")
-        thread_messages = [{
-            "text": msg.get("text"),
-            "user": msg.get("user"),
-            "timestamp": msg.get("ts"),
-            "reply_count": msg.get("reply_count", 0),
-            "reply_users_count": msg.get("reply_users_count", 0)
-        } for msg in messages]
-        logger.debug(f"Returning {len(thread_messages)} formatted messages")
-        return thread_messages
+        # Copies, since name resolution rewrites text and the raw messages stay cached
+        messages = [dict(msg) for msg in _fetch_thread(client, channel_id, thread_ts)]
+        if params.resolve_user_names:
+            _enrich_user_names(client, messages, name_field="user")
+        return fit_thread_budget(format_thread_messages(messages), params.max_chars, params.query)
     except SlackApiError as e:
         logger.error(f"Slack API error: {e.response['error']}")
         raise
@@ -134,56 +241,217 @@ def get_thread_messages(params: ThreadInput) -> List[Dict[str, Any]]:
         logger.error(f"Unexpected error retrieving thread messages: {str(e)}")
         raise
 
+@activity.defn
+def get_threads(request: GetThreadsRequest) -> Dict[str, List[Dict[str, Any]] | str] | str:
+    error = validate_get_threads_request(request)
+    if error:
+        return error
+
+    try:
+        client = get_slack_client()
+
+        def fetch(thread_url: str) -> List[Dict[str, Any]] | str:
+            try:
+                channel_id, thread_ts = parse_thread_url(thread_url)
+                return [dict(msg) for msg in _fetch_thread(client, channel_id, thread_ts)]
+            except ValueError as e:
+                return str(e)
+            except SlackApiError as e:
+                logger.error(f"Slack API error retrieving thread {thread_url}: {e.response['error']}")
+                return f"Slack API error: {e.response['error']}"
+
+        thread_urls = list(dict.fromkeys(request.thread_urls))
+        threads = dict(zip(thread_urls, _fan_out(fetch, thread_urls, settings.thread_fanout_concurrency)))
+        if request.resolve_user_names:
+            _enrich_user_names(client, thread_batch_messages(threads), name_field="user")
+        return format_threads(threads, request)
+    except SlackApiError as e:
+        logger.error(f"Slack API error retrieving threads: {e.response['error']}")
+        return f"Slack API error: {e.response['error']}"
+    except ApplicationError:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error retrieving threads: {str(e)}")
+        return f"Error retrieving threads: {str(e)}"
+
 @activity.defn
 def get_user_name(request: GetUserNameRequest) -> str:
     try:
         client = get_slack_client()
-        response = client.users_info(user=request.user_id)
-        user = response.get('user', {})
-        return user.get('display_name') or user.get('real_name') or request.user_id
+        return _resolve_user_names(client, [request.user_id])[request.user_id]
     except SlackApiError:
         logger.error(f"Failed to get user info for ID {request.user_id}")
         return request.user_id
-    
-def _format_search_results(result: SlackSearchResult) -> str:
-        if result.total == 0:
-            return f"No messages found for query: '{result.query}'"
-
-        # Format results for LLM
-        output_lines = [
-            f"Found {result.total} messages for query: '{result.query}'",
-            f"Showing top {len(result.matches)} results:\n"
-        ]
-
-        for i, match in enumerate(result.matches, 1):
-            user = match.get('username', 'Unknown')
-            channel = match.get('channel', {}).get('name', 'unknown-channel')
-            text = match.get('text', '')[:200] + ('...' if len(match.get('text', '')) > 200 else '')
-            timestamp = match.get('ts', '')
-            permalink = match.get('permalink', '')
-
-            # Format each result
-            result_text = f"{i}. #{channel} - {user}"
-            if timestamp:
-                try:
-                    dt = datetime.fromtimestamp(float(timestamp))
-                    result_text += f" ({dt.strftime('%Y-%m-%d %H:%M')})"
-                except:
-                    pass
-
-            result_text += f"\n   {text}"
-            if permalink:
-                result_text += f"\n   Link: {permalink}"
-
-            output_lines.append(result_text + "\n")
-
-        if result.has_more:
-            output_lines.append(f"... and {result.total - len(result.matches)} more results")
-
-        return "\n".join(output_lines)
+
+@activity.defn
+def get_user_names(request: GetUserNamesRequest) -> Dict[str, str]:
+    try:
+        client = get_slack_client()
+        return _resolve_user_names(client, request.user_ids)
+    except SlackApiError as e:
+        logger.error(f"Slack API error resolving user names: {e.response['error']}")
+        return {user_id: user_id for user_id in request.user_ids}
+
+def _resolve_user_names(client: WebClient, user_ids: List[str]) -> Dict[str, str]:
+    users = user_directory.get(lambda: list_all_users(client))
+    names, missing = cached_user_names(users, user_ids)
+    # Users who joined after the last listing are fetched one by one and merged in
+    fetched = {}
+    for user_id in missing:
+        try:
+            fetched[user_id] = user_info_record(user_id, client.users_info(user=user_id))
+        except SlackApiError:
+            logger.error(f"Failed to get user info for ID {user_id}")
+            names[user_id] = user_id
+    return merge_fetched_users(names, fetched)
+
+def search_mirror(request: SlackSearchRequest, search_query: str) -> Optional[SlackSearchResult]:
+    """Answer a search from the local mirror when settings.search_backend allows it, else None."""
+    if message_mirror is None or settings.search_backend == "slack":
+        return None
+    # The bot/DM exclusions don't apply: the mirror only holds channel messages
+    query = parse_search_query(f"{request.query.strip()}{search_filters(request)}")
+    if query is None:
+        logger.debug(f"Query uses filters the mirror can't answer, searching Slack: '{search_query}'")
+        return None
+    if settings.search_backend == "auto" and not message_mirror.covers(query.channels, query.after, query.before):
+        return None
+
+    total, matches = message_mirror.search(query, request.sort, request.max_results or request.count)
+    logger.debug(f"Mirror search found {total} total results, returning {len(matches)} matches")
+    return SlackSearchResult(
+        query=search_query,
+        total=total,
+        matches=matches,
+        pagination={"source": "mirror"},
+        has_more=total > len(matches),
+    )
+
+def validate_semantic_search_request(request: SemanticSearchRequest) -> Optional[str]:
+    if semantic_index is None:
+        return "Semantic search is not enabled on this worker; use search_slack instead"
+    if not request.query or not request.query.strip():
+        return "Query parameter is required and cannot be empty"
+    if request.count < 1 or request.count > 100:
+        return "Count must be between 1 and 100"
+    if request.mode not in ["hybrid", "semantic"]:
+        return "Mode must be either 'hybrid' or 'semantic'"
+    return None
+
+def run_semantic_search(request: SemanticSearchRequest) -> SlackSearchResult:
+    search_query = f"{request.query.strip()}{search_filters(request)}"
+    query = parse_search_query(search_query)
+    if query is None:
+        raise ValueError("Only in:, from:, after:, before: and on: modifiers are supported")
+    total, matches = semantic_index.search(query, request.count, request.mode)
+    logger.debug(f"Semantic search ({request.mode}) ranked {total} messages, returning {len(matches)}")
+    return SlackSearchResult(
+        query=search_query,
+        total=total,
+        matches=matches,
+        pagination={"source": "mirror", "mode": request.mode},
+        has_more=total > len(matches),
+    )
+
+def _run_search(client: WebClient, request: SlackSearchRequest) -> SlackSearchResult:
+    search_query = build_search_query(request)
+    mirrored = search_mirror(request, search_query)
+    if mirrored is not None:
+        return mirrored
+    logger.debug(f"Executing Slack search with query: '{search_query}'")
+    if request.max_results:
+        return _search_all_pages(client, search_query, request)
+    response = _search_messages(client, search_query, request.sort, request.count)
+    return to_search_result(search_query, response)
+
+def _search_messages(client: WebClient, search_query: str, sort: str, count: int, page: int = 1) -> Dict[str, Any]:
+    """search.messages through the worker's result cache."""
+    key = cache_key(search_query, sort, count, page)
+    cached = cached_search_response(key)
+    if cached is not None:
+        return cached
+    response = client.search_messages(query=search_query, sort=sort, count=count, page=page)
+    return cache_search_response(key, response)
+
+def cached_search_response(key: str) -> Optional[Dict[str, Any]]:
+    return search_cache.get(key) if search_cache else None
+
+def cache_search_response(key: str, response: Any) -> Dict[str, Any]:
+    """Store a search.messages response unless it's an error; returns its data."""
+    data = getattr(response, "data", response)
+    if search_cache and data.get("ok", True):
+        search_cache.put(key, data)
+    return data
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+def _fan_out(fn: Callable[[T], R], items: List[T], max_workers: int) -> List[R]:
+    """Map fn over items on a thread pool.
+
+    Each call runs in a copy of the caller's context, so inside an activity the rate limiter
+    still sees the activity and keeps its waits within the activity's deadline.
+    """
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda item: context.copy().run(fn, item), items))
+
+def _search_all_pages(client: WebClient, search_query: str, request: SlackSearchRequest) -> SlackSearchResult:
+    first = _search_messages(client, search_query, request.sort, SEARCH_PAGE_SIZE, page=1)
+    pages = remaining_search_pages(first, request.max_results)
+    responses = [first]
+    if pages:
+        # Pages are independent; the shared rate limiter keeps the fan-out within budget
+        responses += _fan_out(
+            lambda page: _search_messages(client, search_query, request.sort, SEARCH_PAGE_SIZE, page=page),
+            pages,
+            settings.search_fanout_concurrency,
+        )
+    return merge_search_pages(search_query, responses, request.max_results)
+
+def _fetch_thread(client: WebClient, channel_id: str, thread_ts: str) -> List[Dict[str, Any]]:
+    key = (channel_id, thread_ts)
+    cached = cached_thread(key)
+    if cached is not None:
+        # The parent alone tells whether anyone replied since the thread was cached
+        head = client.conversations_replies(channel=channel_id, ts=thread_ts, limit=1)
+        if is_current(cached, head):
+            logger.debug(f"Serving thread {channel_id}/{thread_ts} from cache")
+            return cached.messages
+
+    pages = []
+    cursor = None
+    while True:
+        response = client.conversations_replies(**replies_page_args(channel_id, thread_ts, cursor))
+        pages.append(response.get("messages", []))
+        cursor = _next_cursor(response)
+        if not cursor:
+            return store_thread(key, pages)
+
+def cached_thread(key: Tuple[str, str]) -> Optional[CachedThread]:
+    return thread_cache.get(key) if thread_cache else None
+
+def is_current(cached: CachedThread, head: Dict[str, Any]) -> bool:
+    """Whether a cached thread is current, judged by a limit=1 conversations.replies of its parent."""
+    return thread_version(head.get("messages", [])) == cached.version
+
+def store_thread(key: Tuple[str, str], pages: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    messages = thread_messages(pages)
+    if thread_cache:
+        thread_cache.put(key, messages)
+    return messages
+
+def _enrich_user_names(client: WebClient, messages: List[Dict[str, Any]], name_field: str) -> None:
+    user_ids = message_user_ids(messages)
+    if not user_ids:
+        return
+    try:
+        apply_user_names(messages, _resolve_user_names(client, user_ids), name_field)
+    except SlackApiError as e:
+        logger.warning(f"Leaving user IDs unresolved: {e.response['error']}")
 
 # todo: Should use instance methods once the Agent no longer rely on an instance method
 def get_slack_client() -> WebClient:
     if not settings.slack_user_token or not settings.slack_user_token.startswith("xoxp-"):
         raise ValueError("slack_user_token is required and must be a user token")
-    return WebClient(token=settings.slack_user_token)
+    return get_shared_web_client(settings.slack_user_token)
@@ -8,6 +8,7 @@ from temporalio.client import Client
 
 from config import settings
 from temporal.workflow import (
+    ConversationConfig,
     ConversationWorkflow,
     ProcessUserMessageInput,
 )
@@ -35,7 +36,7 @@ class MessageHandler:
         input = ProcessUserMessageInput(user_input=prompt, channel_id=channel_id, thread_ts=thread_ts)
         await self.temporal_client.start_workflow(
             ConversationWorkflow.run,
-            settings.research_mode,
+            args=[settings.research_mode, ConversationConfig.from_settings()],
             id=wf_id,
             task_queue=settings.temporal_task_queue,
             start_signal=ConversationWorkflow.process_user_message.__name__,
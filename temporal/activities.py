@@ -1,16 +1,45 @@
-from temporalio import activity
+import asyncio
+from typing import Optional
+
+from temporalio import activity, workflow
 from slackstyler import SlackStyler
-from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 import logging
 from pydantic import BaseModel
 from config import settings
+from research_agents.plan_agent import PlanningResult
+from research_agents.plan_eval_agent import EvaluationFeedback
+from research_agents.slack_client import get_shared_async_web_client
+
+with workflow.unsafe.imports_passed_through():
+    from research_agents.async_tools import get_async_slack_client
+    from research_agents.directory import alist_all_channels, channel_directory
+    from research_agents.plan_cache import plan_cache
+    from research_agents.prejudge import score_plan
+
+# SlackStyler builds its markdown renderer on construction, so share one instance
+styler = SlackStyler()
 
 class PostToSlackInput(BaseModel):
     message: str
     channel_id: str
     thread_ts: str
 
+class LookupPlanInput(BaseModel):
+    question: str
+
+class CachedPlanResult(BaseModel):
+    plan: PlanningResult
+    similarity: float
+
+class StorePlanInput(BaseModel):
+    question: str
+    plan: PlanningResult
+
+class PrejudgePlanInput(BaseModel):
+    question: str
+    plan: PlanningResult
+
 def sanitize_message(message: str) -> str:
     """Remove HTML tags like <hr> and <br> from message."""
     return message.replace('<hr>', '---').replace('<br>', '\t')
@@ -18,15 +47,47 @@ def sanitize_message(message: str) -> str:
 @activity.defn
 async def post_to_slack(args: PostToSlackInput) -> None:
     """Post a message to a Slack thread."""
-    client = WebClient(token=settings.slack_bot_token)
+    client = get_shared_async_web_client(settings.slack_bot_token)
 
     try:
         sanitized_message = sanitize_message(args.message)
-        client.chat_postMessage(
+        await client.chat_postMessage(
             channel=args.channel_id,
-            text=f"🧠 {SlackStyler().convert(sanitized_message)}",
+            text=f"🧠 {styler.convert(sanitized_message)}",
             thread_ts=args.thread_ts
         )
     except SlackApiError as e:
         logging.error(f"Error posting to Slack: {e}")
         raise
+
+@activity.defn
+async def lookup_plan(args: LookupPlanInput) -> Optional[CachedPlanResult]:
+    """Find a reviewed plan cached for the same or a similar question."""
+    if plan_cache is None:
+        return None
+    # The openai embedding backend makes a blocking request
+    match = await asyncio.to_thread(plan_cache.get, args.question)
+    if match is None:
+        return None
+    plan, similarity = match
+    return CachedPlanResult(plan=PlanningResult.model_validate(plan), similarity=similarity)
+
+@activity.defn
+async def store_plan(args: StorePlanInput) -> None:
+    """Cache a plan that passed review for later questions."""
+    if plan_cache is not None:
+        await asyncio.to_thread(plan_cache.put, args.question, args.plan.model_dump())
+
+@activity.defn
+async def prejudge_plan(args: PrejudgePlanInput) -> Optional[EvaluationFeedback]:
+    """Score a plan against the cached channel list; None if it can't be checked."""
+    try:
+        channels = await channel_directory.aget(lambda: alist_all_channels(get_async_slack_client()))
+    except Exception as e:
+        logging.warning(f"Couldn't load channels to pre-judge the plan: {e}")
+        return None
+    feedback = score_plan(args.question, args.plan, channels)
+    activity.metric_meter().create_counter(
+        "plan_prejudge_passes" if feedback.passed else "plan_prejudge_referrals", "Plans scored by the pre-judge"
+    ).add(1)
+    return feedback
@@ -32,7 +32,15 @@ async def connect() -> Client:
     if settings.temporal_codec_key:
         print("- Encrypting payloads")
         config["data_converter"] = dataclasses.replace(
-            temporalio.converter.default(), payload_codec=EncryptionCodec(settings.temporal_codec_key))
+            temporalio.converter.default(),
+            payload_codec=EncryptionCodec(
+                settings.temporal_codec_key,
+                compression=settings.temporal_codec_compression,
+                compression_threshold=settings.temporal_codec_compression_threshold,
+                offload_threshold=settings.temporal_codec_offload_threshold or None,
+                offload_workers=settings.temporal_codec_offload_workers,
+            ),
+        )
         
     if settings.temporal_enable_telemetry:
         print("- Enabling telemetry")
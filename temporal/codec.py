@@ -1,52 +1,111 @@
+import asyncio
 import os
-from typing import Iterable, List
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional
 
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from temporalio.api.common.v1 import Payload
 from temporalio.converter import PayloadCodec
 
+try:
+    import zstandard
+except ImportError:  # zstd is optional; zlib is always available
+    zstandard = None
+
 default_key_id = "test"
 
+COMPRESSIONS = ("none", "zlib", "zstd")
+# Serialized payloads smaller than this are encrypted as they are
+DEFAULT_COMPRESSION_THRESHOLD = 1024
+DEFAULT_OFFLOAD_WORKERS = 4
+
 
 class EncryptionCodec(PayloadCodec):
-    def __init__(self, key: bytes, key_id: str = default_key_id) -> None:
+    def __init__(
+        self,
+        key: bytes,
+        key_id: str = default_key_id,
+        compression: str = "none",
+        compression_threshold: int = DEFAULT_COMPRESSION_THRESHOLD,
+        offload_threshold: Optional[int] = None,
+        offload_workers: int = DEFAULT_OFFLOAD_WORKERS,
+    ) -> None:
         super().__init__()
         self.key_id = key_id
         # We are using direct AESGCM to be compatible with samples from
         # TypeScript and Go. Pure Python samples may prefer the higher-level,
         # safer APIs.
         self.crypto = AESGCM(key)
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression {compression}, expected one of {', '.join(COMPRESSIONS)}")
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("zstd compression needs the zstandard package")
+        # Encrypted data doesn't compress, so large payloads are compressed first
+        # and marked with the algorithm. Payloads without the marker decrypt as before.
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+        # Batches of at least offload_threshold bytes are encoded on a thread pool instead
+        # of the event loop; AES-GCM and zlib release the GIL, so payloads run in parallel.
+        self.offload_threshold = offload_threshold
+        self.offload_workers = offload_workers
+        self.executor: Optional[ThreadPoolExecutor] = None
 
     async def encode(self, payloads: Iterable[Payload]) -> List[Payload]:
         # We blindly encode all payloads with the key and set the metadata
         # saying which key we used
-        return [
-            Payload(
-                metadata={
-                    "encoding": b"binary/encrypted",
-                    "encryption-key-id": self.key_id.encode(),
-                },
-                data=self.encrypt(p.SerializeToString()),
-            )
-            for p in payloads
-        ]
+        return await self._map(self.encode_payload, list(payloads))
 
     async def decode(self, payloads: Iterable[Payload]) -> List[Payload]:
-        ret: List[Payload] = []
+        return await self._map(self.decode_payload, list(payloads))
+
+    async def _map(self, codec: Callable[[Payload], Payload], payloads: List[Payload]) -> List[Payload]:
+        if not self._should_offload(payloads):
+            return [codec(p) for p in payloads]
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(self.offload_workers, thread_name_prefix="payload-codec")
+        loop = asyncio.get_running_loop()
+        return list(await asyncio.gather(*[loop.run_in_executor(self.executor, codec, p) for p in payloads]))
+
+    def _should_offload(self, payloads: List[Payload]) -> bool:
+        if self.offload_threshold is None:
+            return False
+        size = 0
         for p in payloads:
-            # Ignore ones w/out our expected encoding
-            if p.metadata.get("encoding", b"").decode() != "binary/encrypted":
-                ret.append(p)
-                continue
-            # Confirm our key ID is the same
-            key_id = p.metadata.get("encryption-key-id", b"").decode()
-            if key_id != self.key_id:
-                raise ValueError(
-                    f"Unrecognized key ID {key_id}. Current key ID is {self.key_id}."
-                )
-            # Decrypt and append
-            ret.append(Payload.FromString(self.decrypt(p.data)))
-        return ret
+            size += len(p.data)
+            if size >= self.offload_threshold:
+                return True
+        return False
+
+    def encode_payload(self, payload: Payload) -> Payload:
+        metadata = {
+            "encoding": b"binary/encrypted",
+            "encryption-key-id": self.key_id.encode(),
+        }
+        data = payload.SerializeToString()
+        if self.compression != "none" and len(data) >= self.compression_threshold:
+            compressed = compress(data, self.compression)
+            if len(compressed) < len(data):
+                metadata["encryption-compression"] = self.compression.encode()
+                data = compressed
+        return Payload(metadata=metadata, data=self.encrypt(data))
+
+    def decode_payload(self, payload: Payload) -> Payload:
+        # Ignore ones w/out our expected encoding
+        if payload.metadata.get("encoding", b"").decode() != "binary/encrypted":
+            return payload
+        # Confirm our key ID is the same
+        key_id = payload.metadata.get("encryption-key-id", b"").decode()
+        if key_id != self.key_id:
+            raise ValueError(
+                f"Unrecognized key ID {key_id}. Current key ID is {self.key_id}."
+            )
+        # Decrypt, then decompress if the payload was compressed first
+        data = self.decrypt(payload.data)
+        compression = payload.metadata.get("encryption-compression", b"").decode()
+        if compression:
+            data = decompress(data, compression)
+        return Payload.FromString(data)
 
     def encrypt(self, data: bytes) -> bytes:
         nonce = os.urandom(12)
@@ -54,3 +113,19 @@ class EncryptionCodec(PayloadCodec):
 
     def decrypt(self, data: bytes) -> bytes:
         return self.crypto.decrypt(data[:12], data[12:], None)
+
+
+def compress(data: bytes, compression: str) -> bytes:
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return zlib.compress(data, 6)
+
+
+def decompress(data: bytes, compression: str) -> bytes:
+    if compression == "zstd":
+        if zstandard is None:
+            raise ValueError("Payload is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if compression == "zlib":
+        return zlib.decompress(data)
+    raise ValueError(f"Unrecognized payload compression {compression}")
@@ -0,0 +1,55 @@
+from collections import deque
+from typing import Any, Deque, Optional
+
+from research_agents.compact import clip_text
+
+# Separator between entries in the rendered transcript
+ENTRY_SEPARATOR = "\n\n"
+
+
+class ChatHistory:
+    """Transcript shown as the workflow's current details, capped at max_bytes.
+
+    The oldest entries are dropped once the cap is reached and tool outputs are kept as
+    previews of at most preview_chars, so a long thread costs the same to render and
+    replay as a short one.
+    """
+
+    def __init__(self, max_bytes: int, preview_chars: int) -> None:
+        self.max_bytes = max_bytes
+        self.preview_chars = preview_chars
+        self.entries: Deque[str] = deque()
+        self.size = 0
+        self.dropped = 0
+        self.changed = False
+
+    def __len__(self) -> int:
+        return len(self.entries) + self.dropped
+
+    def append(self, entry: str) -> None:
+        # A single entry never takes more than the whole budget
+        entry = clip_text(entry, self.max_bytes // 2) if len(entry.encode()) > self.max_bytes // 2 else entry
+        self.entries.append(entry)
+        self.size += _entry_size(entry)
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            self.size -= _entry_size(self.entries.popleft())
+            self.dropped += 1
+        self.changed = True
+
+    def append_tool_output(self, prefix: str, output: Any) -> None:
+        self.append(f"{prefix}{clip_text(str(output), self.preview_chars)}")
+
+    def render(self) -> str:
+        header = [f"[{self.dropped} earlier entries dropped]"] if self.dropped else []
+        return ENTRY_SEPARATOR.join([*header, *self.entries])
+
+    def pending_details(self) -> Optional[str]:
+        """The rendered transcript if it changed since the last call, else None."""
+        if not self.changed:
+            return None
+        self.changed = False
+        return self.render()
+
+
+def _entry_size(entry: str) -> int:
+    return len(entry.encode()) + len(ENTRY_SEPARATOR)
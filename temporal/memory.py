@@ -0,0 +1,94 @@
+import json
+from typing import Any, Dict, List, Tuple
+
+from research_agents.compact import clip_text, estimate_tokens
+
+# Opens the message that stands in for summarized turns
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+# Opens the messages the workflow adds for its agents (plans, review feedback, search results);
+# they go in as user messages but aren't turns of the user's
+NOTE_PREFIX = "Workflow note: "
+# Tool outputs at most this long are kept as they are
+ELIDE_MIN_CHARS = 1000
+
+
+def estimate_items_tokens(items: List[Dict[str, Any]]) -> int:
+    return estimate_tokens(json.dumps(items, default=str))
+
+
+def split_recent_turns(items: List[Dict[str, Any]], keep_turns: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Split items before the last keep_turns user messages, so tool calls stay with their outputs."""
+    starts = [i for i, item in enumerate(items) if _is_user_message(item)]
+    if len(starts) <= keep_turns:
+        return [], items
+    cut = starts[-keep_turns] if keep_turns else len(items)
+    return items[:cut], items[cut:]
+
+
+def elide_tool_outputs(items: List[Dict[str, Any]], keep_turns: int, preview_chars: int) -> List[Dict[str, Any]]:
+    """Replace long tool outputs and workflow notes from before the last keep_turns turns with a short preview."""
+    older, recent = split_recent_turns(items, keep_turns)
+    names = _tool_names(items)
+    elided = []
+    for item in older:
+        output = item.get("output") if item.get("type") == "function_call_output" else None
+        if output is not None and not isinstance(output, str):
+            output = json.dumps(output, default=str)
+        if output is not None and len(output) > ELIDE_MIN_CHARS and not output.startswith("[elided"):
+            name = names.get(item.get("call_id"), "tool")
+            item = {**item, "output": f"[elided {name} output of {len(output)} chars] {clip_text(output, preview_chars)}"}
+        elif _is_note(item) and len(item["content"]) > ELIDE_MIN_CHARS:
+            note = item["content"][len(NOTE_PREFIX):]
+            if not note.startswith("[elided"):
+                item = {**item, "content": f"{NOTE_PREFIX}[elided note of {len(note)} chars] {clip_text(note, preview_chars)}"}
+        elided.append(item)
+    return elided + recent
+
+
+def render_transcript(items: List[Dict[str, Any]], preview_chars: int) -> str:
+    """Plain-text transcript of input items for the summary agent."""
+    names = _tool_names(items)
+    lines = []
+    for item in items:
+        kind = item.get("type")
+        if kind == "function_call":
+            lines.append(f"Tool call: {item.get('name')}({clip_text(str(item.get('arguments', '')), preview_chars)})")
+        elif kind == "function_call_output":
+            lines.append(f"{names.get(item.get('call_id'), 'tool')} returned: {clip_text(str(item.get('output', '')), preview_chars)}")
+        elif _is_note(item):
+            lines.append(f"Workflow: {clip_text(item['content'][len(NOTE_PREFIX):], preview_chars)}")
+        elif item.get("role") in ("user", "assistant"):
+            text = _message_text(item)
+            if text:
+                lines.append(f"{item['role'].capitalize()}: {text}")
+    return "\n\n".join(lines)
+
+
+def summary_item(summary: str) -> Dict[str, Any]:
+    return {"content": f"{SUMMARY_PREFIX}{summary}", "role": "user"}
+
+
+def note_item(note: str) -> Dict[str, Any]:
+    """A message from the workflow to the next agent, which memory doesn't count as a user turn."""
+    return {"content": f"{NOTE_PREFIX}{note}", "role": "user"}
+
+
+def _is_user_message(item: Dict[str, Any]) -> bool:
+    if item.get("role") != "user" or item.get("type", "message") != "message":
+        return False
+    return not (isinstance(item.get("content"), str) and item["content"].startswith((SUMMARY_PREFIX, NOTE_PREFIX)))
+
+
+def _is_note(item: Dict[str, Any]) -> bool:
+    return item.get("role") == "user" and isinstance(item.get("content"), str) and item["content"].startswith(NOTE_PREFIX)
+
+
+def _tool_names(items: List[Dict[str, Any]]) -> Dict[str, str]:
+    return {item.get("call_id"): item.get("name") for item in items if item.get("type") == "function_call"}
+
+
+def _message_text(item: Dict[str, Any]) -> str:
+    content = item.get("content")
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") for part in content or [] if isinstance(part, dict))
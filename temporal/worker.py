@@ -1,3 +1,4 @@
+import asyncio
 from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 
@@ -8,31 +9,103 @@ from temporal.workflow import ConversationWorkflow
 from temporal.client import connect
 from research_agents.tools import (
     get_slack_channels,
+    find_relevant_channels,
     search_slack,
+    search_slack_batch,
+    semantic_search_slack,
     get_thread_messages,
+    get_threads,
     get_user_name,
+    get_user_names,
 )
+from research_agents.async_tools import (
+    get_slack_channels_async,
+    find_relevant_channels_async,
+    search_slack_async,
+    search_slack_batch_async,
+    semantic_search_slack_async,
+    get_thread_messages_async,
+    get_threads_async,
+    get_user_name_async,
+    get_user_names_async,
+)
+from research_agents.slack_client import close_shared_session, get_indexer_web_client
+from research_agents.mirror import message_mirror, mirror_channel_names, run_indexer
+from research_agents.semantic import semantic_index
 from temporal.activities import (
+    lookup_plan,
     post_to_slack,
+    prejudge_plan,
+    store_plan,
 )
 
+def tool_activities() -> list:
+    """Tool activities for the configured Slack client mode."""
+    if settings.slack_client_mode == "async":
+        return [
+            get_slack_channels_async,
+            find_relevant_channels_async,
+            search_slack_async,
+            search_slack_batch_async,
+            semantic_search_slack_async,
+            get_thread_messages_async,
+            get_threads_async,
+            get_user_name_async,
+            get_user_names_async,
+        ]
+    return [
+        get_slack_channels,
+        find_relevant_channels,
+        search_slack,
+        search_slack_batch,
+        semantic_search_slack,
+        get_thread_messages,
+        get_threads,
+        get_user_name,
+        get_user_names,
+    ]
+
+def start_mirror_indexer() -> asyncio.Task | None:
+    """Background sync of the local message mirror, if one is configured."""
+    channel_names = mirror_channel_names()
+    if message_mirror is None or not channel_names:
+        return None
+    client = get_indexer_web_client(settings.slack_user_token)
+    return asyncio.create_task(
+        run_indexer(
+            client,
+            message_mirror,
+            channel_names,
+            settings.mirror_sync_interval_seconds,
+            on_synced=semantic_index.embed_pending if semantic_index else None,
+        )
+    )
+
 @asynccontextmanager
 async def worker():
     client = await connect()
-    async with Worker(
-        client,
-        task_queue=settings.temporal_task_queue,
-        workflows=[ConversationWorkflow],
-        activity_executor=ThreadPoolExecutor(100),
-        interceptors=[TracingInterceptor()],
-        activities=[
-            # tool activities
-            get_slack_channels,
-            search_slack,
-            get_thread_messages,
-            get_user_name,
-            # vanilla activities
-            post_to_slack,
-        ],
-    ) as worker:
-        yield worker
+    # Async tool activities run on the event loop and don't need a thread each
+    activity_executor = None if settings.slack_client_mode == "async" else ThreadPoolExecutor(100)
+    indexer = start_mirror_indexer()
+    try:
+        async with Worker(
+            client,
+            task_queue=settings.temporal_task_queue,
+            workflows=[ConversationWorkflow],
+            activity_executor=activity_executor,
+            interceptors=[TracingInterceptor()],
+            activities=[
+                # tool activities
+                *tool_activities(),
+                # vanilla activities
+                post_to_slack,
+                lookup_plan,
+                store_plan,
+                prejudge_plan,
+            ],
+        ) as worker:
+            yield worker
+    finally:
+        if indexer:
+            indexer.cancel()
+        await close_shared_session()
@@ -1,14 +1,45 @@
 from __future__ import annotations as _annotations
 
+import asyncio
+from typing import Any, Optional
+
 from temporalio import workflow
+from temporalio.exceptions import ActivityError
 
 from pydantic import BaseModel
 
-from research_agents.plan_agent import init_plan_agent, PlanningResult
-from research_agents.execution_agent import init_execution_agent
+from research_agents.plan_agent import init_plan_agent, plan_searches, PlanningResult
+from research_agents.execution_agent import init_execution_agent, init_report_agent
 from research_agents.plan_eval_agent import init_plan_eval_agent, EvaluationFeedback
 from research_agents.combined_agent import init_combined_agent
-from temporal.activities import post_to_slack, PostToSlackInput
+from research_agents.summary_agent import init_summary_agent
+from research_agents.compact import ResearchContext, expand_references, split_references
+from research_agents.routing import agent_models
+from research_agents.tools import (
+    MAX_BATCH_SEARCHES,
+    SlackSearchBatchRequest,
+    SlackSearchRequest,
+    search_slack_batch,
+)
+from temporal.activities import (
+    LookupPlanInput,
+    PostToSlackInput,
+    PrejudgePlanInput,
+    StorePlanInput,
+    lookup_plan,
+    post_to_slack,
+    prejudge_plan,
+    store_plan,
+)
+from temporal.history import ChatHistory
+from temporal.memory import (
+    elide_tool_outputs,
+    estimate_items_tokens,
+    render_transcript,
+    note_item,
+    split_recent_turns,
+    summary_item,
+)
 
 with workflow.unsafe.imports_passed_through():
     from agents import (
@@ -30,34 +61,113 @@ class ProcessUserMessageInput(BaseModel):
     thread_ts: str = None
     channel_id: str = None
 
+class ConversationState(BaseModel):
+    """What a conversation carries across continue-as-new."""
+    input_items: list[dict[str, Any]] = []
+    references: dict[str, str] = {}
+
+class ConversationConfig(BaseModel):
+    """Worker settings the workflow branches on, fixed when the conversation starts.
+
+    A replay on a worker with different settings takes the same branches and builds the
+    same agents. Conversations started without a config run with these defaults, which
+    leave the optional steps off and put every agent on settings.model_name.
+    """
+    memory_max_tokens: int = 20_000
+    memory_keep_turns: int = 2
+    memory_tool_preview_chars: int = 300
+    escalate_failed_plans: bool = False
+    speculative_search_enabled: bool = False
+    structured_execution_enabled: bool = False
+    plan_prejudge_enabled: bool = False
+    plan_cache_enabled: bool = False
+    # The agent graph: the model per routing role, the semantic search tool and compact tool output
+    models: dict[str, str] = {}
+    semantic_search_enabled: bool = False
+    tool_output_format: str = "verbose"
+
+    @classmethod
+    def from_settings(cls) -> "ConversationConfig":
+        values = {name: getattr(settings, name) for name in cls.model_fields if name != "models"}
+        return cls(models=agent_models(), **values)
+
+    def model_for(self, role: str) -> str:
+        """The model routed to role when the conversation started."""
+        return self.models.get(role, settings.model_name)
+
+
+def _search_batches(searches: list[SlackSearchRequest]) -> list[list[SlackSearchRequest]]:
+    """Split searches into batches search_slack_batch accepts."""
+    return [searches[i:i + MAX_BATCH_SEARCHES] for i in range(0, len(searches), MAX_BATCH_SEARCHES)]
+
 
 @workflow.defn
 class ConversationWorkflow:
     @workflow.init
-    def __init__(self, research_mode: str = ""):
+    def __init__(self, research_mode: str = "", config: Optional[ConversationConfig] = None, state: Optional[ConversationState] = None):
         self.research_mode = research_mode
+        self.config = config or ConversationConfig()
         self.run_config: RunConfig = RunConfig(
             trace_include_sensitive_data=False,
         )
-        self.plan_agent: Agent = init_plan_agent(now=workflow.now())
-        self.plan_eval_agent: Agent = init_plan_eval_agent(workflow.now())
-        self.execution_agent: Agent = init_execution_agent(now=workflow.now())
-        self.combined_agent: Agent = init_combined_agent(now=workflow.now())
-        self.chat_history: list[str] = []
+        semantic_search = self.config.semantic_search_enabled
+        compact_output = self.config.tool_output_format == "compact"
+        self.plan_agent: Agent = init_plan_agent(now=workflow.now(), model=self.config.model_for("plan"))
+        # Replans on the strong model when a plan from a cheaper one fails review
+        escalation_model = self.config.model_for("escalation")
+        self.escalation_plan_agent: Optional[Agent] = (
+            init_plan_agent(now=workflow.now(), model=escalation_model)
+            if self.config.escalate_failed_plans and self.plan_agent.model != escalation_model
+            else None
+        )
+        self.plan_eval_agent: Agent = init_plan_eval_agent(workflow.now(), model=self.config.model_for("eval"))
+        self.execution_agent: Agent = init_execution_agent(
+            now=workflow.now(),
+            model=self.config.model_for("execution"),
+            report_model=self.config.model_for("report"),
+            semantic_search=semantic_search,
+            compact_output=compact_output,
+        )
+        self.report_agent: Agent = init_report_agent(
+            now=workflow.now(), model=self.config.model_for("report"), compact_output=compact_output
+        )
+        self.combined_agent: Agent = init_combined_agent(
+            now=workflow.now(),
+            model=self.config.model_for("combined"),
+            semantic_search=semantic_search,
+            compact_output=compact_output,
+        )
+        self.summary_agent: Agent = init_summary_agent(now=workflow.now(), model=self.config.model_for("summary"))
+        self.chat_history = ChatHistory(settings.chat_history_max_bytes, settings.chat_history_tool_preview_chars)
+        # Permalinks behind the short refs in compact search results
+        self.research_context = ResearchContext(references=dict(state.references) if state else {})
         self.trace_name: str = "Slack Research Bot"
-        self.input_items = []
+        self.input_items = list(state.input_items) if state else []
         self.evaluation_enabled: bool = True
         self.max_evaluation_loops: int = 2
         self.thread_ts: str = None
         self.channel_id: str = None
+        # Latest background status post; each one waits for the post before it
+        self.status_posts: Optional[asyncio.Task] = None
 
     @workflow.run
-    async def run(self, research_mode: str = ""):
+    async def run(self, research_mode: str = "", config: Optional[ConversationConfig] = None, state: Optional[ConversationState] = None):
         await workflow.wait_condition(
             lambda: workflow.info().is_continue_as_new_suggested()
             and workflow.all_handlers_finished()
         )
-        workflow.continue_as_new(self.input_items)
+        # Conversations from before memory compaction continue as they did then
+        if not workflow.patched("compact-memory"):
+            workflow.continue_as_new(self.input_items)
+        with trace(self.trace_name, group_id=workflow.info().workflow_id):
+            await self._compact_memory(force=True)
+        # A message may have arrived while the summary was written
+        await workflow.wait_condition(workflow.all_handlers_finished)
+        workflow.continue_as_new(args=[
+            self.research_mode,
+            self.config,
+            ConversationState(input_items=self.input_items, references=self.research_context.references),
+        ])
 
     @workflow.signal
     async def process_user_message(self, input: ProcessUserMessageInput) -> None:
@@ -65,20 +175,23 @@ class ConversationWorkflow:
         self.channel_id = input.channel_id
 
         if len(self.chat_history) == 0:
-            await self._post_to_slack(f"[view workflow]({settings.temporal_ui_url}/namespaces/{settings.temporal_namespace}/workflows/{workflow.info().workflow_id})")
+            await self._post_status(f"[view workflow]({settings.temporal_ui_url}/namespaces/{settings.temporal_namespace}/workflows/{workflow.info().workflow_id})")
 
+        # Follow-ups lean on earlier turns, so only opening questions share cached plans
+        first_question = not self.input_items
         self.chat_history.append(f"User: {input.user_input}")
         with trace(self.trace_name, group_id=workflow.info().workflow_id):
             self.input_items.append({"content": input.user_input, "role": "user"})
             
             if self.research_mode == "with_judge":
-                result = await self._run_with_judge()
+                result = await self._run_with_judge(input.user_input, cache_plan=first_question)
             else:
                 result = await self._run_without_judge()
             
             self._build_chat_history(result)
             self.input_items = result.to_input_list()
 
+        await self._flush_status_posts()
         if isinstance(result.final_output, PlanningResult):
             await self._post_to_slack(result.final_output.clarifying_questions)
         elif isinstance(result.final_output, MessageOutputItem):
@@ -86,23 +199,50 @@ class ConversationWorkflow:
         else:
             await self._post_to_slack(str(result.final_output))
             
-        workflow.set_current_details("\n\n".join(self.chat_history))
+        details = self.chat_history.pending_details()
+        if details is not None:
+            workflow.set_current_details(details)
+
+        # After posting, so summarizing older turns doesn't hold up the answer
+        if workflow.patched("compact-memory"):
+            with trace(self.trace_name, group_id=workflow.info().workflow_id):
+                await self._compact_memory()
+
+    async def _run_with_judge(self, question: str, cache_plan: bool = False) -> RunResult:
+        """Run with explicit evaluation flow control.
 
-    async def _run_with_judge(self) -> RunResult:
-        """Run with explicit evaluation flow control."""
+        Status posts go out in the background while the next agent step runs. The optional
+        steps follow self.config: with speculative_search_enabled, the plan's global searches
+        run while the plan is judged and the results are handed to the executor if it passes.
+        With plan_cache_enabled and cache_plan, a question matching one whose plan passed
+        review skips planning and review; plans that pass are cached under question. With
+        plan_prejudge_enabled, plans that meet every checkable review rule skip the LLM
+        judge. With structured_execution_enabled, a plan with keyword groups is searched by
+        the workflow and only the report is written by a model.
+        """
 
         plan_result = None
         exec_result = None
         plan = ""
+        speculative_search = None
+
+        cached = await self._lookup_plan(question) if cache_plan else None
+        planning: Optional[PlanningResult] = cached
+        if cached:
+            plan = cached.plan
+            await self._post_status(f"I've answered a similar question before, so I'm reusing its reviewed plan: \n{plan}")
+            speculative_search = self._start_speculative_search(cached)
 
         # 1. Planning phase with LLM-as-a-judge
-        for _ in range(self.max_evaluation_loops):
+        plan_input = self.input_items
+        plan_agent = self.plan_agent
+        for _ in range(0 if cached else self.max_evaluation_loops):
             # Run plan agent
-            plan_input = self.input_items
             plan_result = await Runner.run(
-                self.plan_agent,
+                plan_agent,
                 plan_input,
                 run_config=self.run_config,
+                context=self.research_context,
             )
             result: PlanningResult = plan_result.final_output
             if result.human_input_required:
@@ -110,53 +250,235 @@ class ConversationWorkflow:
             else:
                 message = f"This is what I'm planning to do: \n{result.plan}"
                 plan = result.plan
-                await self._post_to_slack(message)
+                planning = result
+                await self._post_status(message)
+                speculative_search = self._start_speculative_search(result)
 
-            # Evaluate plan
-            eval_result = await Runner.run(
-                self.plan_eval_agent,
-                plan_result.to_input_list(),
-                run_config=self.run_config,
-            )
-            result: EvaluationFeedback = eval_result.final_output
-            message = f'The plan has been reviewed by my team mate with the following comments: \n{result.feedback}'
-            await self._post_to_slack(message)
+            # Evaluate plan, by rule checks when they are conclusive
+            prejudged = await self._prejudge_plan(question, result)
+            if prejudged and prejudged.passed:
+                result = prejudged
+                message = f"The plan passed my quick checks, so I skipped the full review: \n{result.scores}"
+            else:
+                eval_input = plan_result.to_input_list()
+                if prejudged:
+                    eval_input.append(note_item(f"Automated checks of the plan:\n{prejudged.scores}"))
+                eval_result = await Runner.run(
+                    self.plan_eval_agent,
+                    eval_input,
+                    run_config=self.run_config,
+                    context=self.research_context,
+                )
+                result: EvaluationFeedback = eval_result.final_output
+                message = f'The plan has been reviewed by my team mate with the following comments: \n{result.feedback}'
+            await self._post_status(message)
             
             # Move on if passed
+            if result.passed and cache_plan:
+                self._store_plan(question, plan_result.final_output)
             if not self.evaluation_enabled or result.passed:
                 break
+
+            for search in speculative_search or []:
+                search.cancel()
+            speculative_search = None
             
+            if self.escalation_plan_agent:
+                plan_agent = self.escalation_plan_agent
+
             # Provide feedback
             plan_input = plan_result.to_input_list()
-            plan_input.append({"content": f"Plan evaluation feedback: {result.feedback}", "role": "user"})
+            plan_input.append(note_item(f"Plan evaluation feedback: {result.feedback}"))
 
         # 2. Execution phase
         message = "Ok, let me take the feedback and execute the plan. This may take a few moments."
-        await self._post_to_slack(message)
-        exec_input = plan_result.to_input_list()
-        exec_input.append({"content": f'Final plan to execute: {plan}', "role": "user"})
+        await self._post_status(message)
+        exec_input = plan_result.to_input_list() if plan_result else list(self.input_items)
+        exec_input.append(note_item(f"Final plan to execute: {plan}"))
+        if self.config.structured_execution_enabled and planning.keyword_groups:
+            exec_result = await self._run_structured_plan(planning, exec_input, speculative_search)
+            if exec_result:
+                return exec_result
+        if speculative_search:
+            exec_input.append(note_item(await self._speculative_results(speculative_search)))
         exec_result = await Runner.run(
             self.execution_agent,
             exec_input,
             run_config=self.run_config,
+            context=self.research_context,
             max_turns=30,
         )
         
         return exec_result
 
+    async def _run_structured_plan(
+        self,
+        planning: PlanningResult,
+        exec_input: list,
+        speculative_search: Optional[list[workflow.ActivityHandle[str]]] = None,
+    ) -> Optional[RunResult]:
+        """Run the plan's searches as parallel activities, then write the report in one model call.
+
+        Speculative searches already running the plan's global searches are awaited alongside
+        the rest instead of being repeated. Returns None if the searches failed, so the
+        execution agent can take over.
+        """
+        searches = plan_searches(planning)
+        running = []
+        if speculative_search:
+            searches = [search for search in searches if search.channels]
+            running.extend(speculative_search)
+        try:
+            outputs = await asyncio.gather(*running, *[
+                workflow.execute_activity(
+                    search_slack_batch,
+                    SlackSearchBatchRequest(requests=batch),
+                    start_to_close_timeout=workflow.timedelta(seconds=30),
+                )
+                for batch in _search_batches(searches)
+            ])
+        except ActivityError as e:
+            workflow.logger.warning(f"Structured plan searches failed: {e}")
+            return None
+        results = []
+        for output in outputs:
+            text, references = split_references(output)
+            self.research_context.references.update(references)
+            results.append(text)
+        results_text = "\n\n".join(results)
+        return await Runner.run(
+            self.report_agent,
+            [*exec_input, note_item(f"The plan's searches already ran. Results:\n{results_text}")],
+            run_config=self.run_config,
+            context=self.research_context,
+        )
+
+    async def _lookup_plan(self, question: str) -> Optional[PlanningResult]:
+        if not self.config.plan_cache_enabled:
+            return None
+        try:
+            cached = await workflow.execute_activity(
+                lookup_plan,
+                LookupPlanInput(question=question),
+                start_to_close_timeout=workflow.timedelta(seconds=30),
+            )
+        except ActivityError as e:
+            workflow.logger.warning(f"Plan cache lookup failed: {e}")
+            return None
+        if cached is None:
+            return None
+        workflow.logger.info(f"Reusing a cached plan (similarity {cached.similarity:.2f})")
+        return cached.plan
+
+    async def _prejudge_plan(self, question: str, plan: PlanningResult) -> Optional[EvaluationFeedback]:
+        """Rule-check the plan on the worker, which has the channel list; None if not enabled or possible."""
+        if not self.config.plan_prejudge_enabled or not plan.keyword_groups:
+            return None
+        try:
+            return await workflow.execute_activity(
+                prejudge_plan,
+                PrejudgePlanInput(question=question, plan=plan),
+                start_to_close_timeout=workflow.timedelta(seconds=30),
+            )
+        except ActivityError as e:
+            workflow.logger.warning(f"Plan pre-judge failed: {e}")
+            return None
+
+    def _store_plan(self, question: str, plan: PlanningResult) -> None:
+        """Cache the plan in the background; the answer doesn't wait for it."""
+        if self.config.plan_cache_enabled:
+            workflow.start_activity(
+                store_plan,
+                StorePlanInput(question=question, plan=plan),
+                start_to_close_timeout=workflow.timedelta(seconds=30),
+            )
+
+    def _start_speculative_search(self, plan: PlanningResult) -> Optional[list[workflow.ActivityHandle[str]]]:
+        """Start the plan's global searches, with its time range, if enabled; one activity per batch."""
+        if not self.config.speculative_search_enabled or not plan.keyword_groups:
+            return None
+        searches = [search for search in plan_searches(plan) if not search.channels]
+        batches = _search_batches(searches)
+        if len(batches) > 1 and not workflow.patched("chunked-speculative-search"):
+            # Conversations from before chunking sent them as one batch
+            batches = [searches]
+        return [
+            workflow.start_activity(
+                search_slack_batch,
+                SlackSearchBatchRequest(requests=batch),
+                start_to_close_timeout=workflow.timedelta(seconds=30),
+            )
+            for batch in batches
+        ]
+
+    async def _speculative_results(self, searches: list[workflow.ActivityHandle[str]]) -> str:
+        try:
+            outputs = await asyncio.gather(*searches)
+        except ActivityError as e:
+            workflow.logger.warning(f"Speculative search failed: {e}")
+            return "The global searches for the plan's keyword groups failed; run them yourself."
+        results = []
+        for output in outputs:
+            text, references = split_references(output)
+            self.research_context.references.update(references)
+            results.append(text)
+        results_text = "\n\n".join(results)
+        return f"Global searches for the plan's keyword groups already ran; don't repeat them. Results:\n{results_text}"
+
+    async def _post_status(self, message: str) -> None:
+        """Post to Slack in the background, after any status posts still in flight."""
+        if not workflow.patched("background-status-posts"):
+            # Conversations from before background posts wait for each one
+            await self._post_to_slack(message)
+            return
+        previous = self.status_posts
+
+        async def post() -> None:
+            if previous:
+                await previous
+            await self._post_to_slack(message)
+
+        self.status_posts = asyncio.create_task(post())
+
+    async def _flush_status_posts(self) -> None:
+        if self.status_posts:
+            await self.status_posts
+            self.status_posts = None
+
     async def _run_without_judge(self) -> RunResult:
         """Run with combined agent (no evaluation)."""
         return await Runner.run(
             self.combined_agent,
             self.input_items,
             run_config=self.run_config,
+            context=self.research_context,
         )
 
+    async def _compact_memory(self, force: bool = False) -> None:
+        """Shrink input_items: elide old tool outputs, then summarize older turns once over the token budget.
+
+        With force, older turns are summarized regardless of size, e.g. before continue-as-new.
+        """
+        snapshot, size = self.input_items, len(self.input_items)
+        items = elide_tool_outputs(snapshot, self.config.memory_keep_turns, self.config.memory_tool_preview_chars)
+        if force or estimate_items_tokens(items) > self.config.memory_max_tokens:
+            older, recent = split_recent_turns(items, self.config.memory_keep_turns)
+            if older:
+                result = await Runner.run(
+                    self.summary_agent,
+                    [{"content": render_transcript(older, self.config.memory_tool_preview_chars), "role": "user"}],
+                    run_config=self.run_config,
+                )
+                items = [summary_item(str(result.final_output)), *recent]
+        # Leave the items alone if another message was handled while the summary was written
+        if self.input_items is snapshot and len(snapshot) == size:
+            self.input_items = items
+
     async def _post_to_slack(self, message: str) -> None:
         await workflow.execute_activity(
             post_to_slack,
             PostToSlackInput(
-                message=message,
+                message=expand_references(message, self.research_context.references),
                 channel_id=self.channel_id,
                 thread_ts=self.thread_ts
             ),
@@ -177,8 +499,8 @@ class ConversationWorkflow:
                 elif isinstance(new_item, ToolCallItem):
                     self.chat_history.append(f"{agent_name}: Calling a tool")
                 elif isinstance(new_item, ToolCallOutputItem):
-                    self.chat_history.append(
-                        f"{agent_name}: Tool call output: {new_item.output}"
+                    self.chat_history.append_tool_output(
+                        f"{agent_name}: Tool call output: ", new_item.output
                     )
                 else:
                     self.chat_history.append(
@@ -0,0 +1,61 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import patch
+
+from temporal.activities import (
+    post_to_slack,
+    sanitize_message,
+    PostToSlackInput,
+)
+
+class SlowSlackClient:
+    """Fake AsyncWebClient whose chat_postMessage takes a fixed time on the network."""
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.posts = []
+
+    async def chat_postMessage(self, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.latency)
+        self.in_flight -= 1
+        self.posts.append(kwargs)
+
+class TestPostToSlack:
+    def test_sanitize_message(self):
+        assert sanitize_message("a<hr>b<br>c") == "a---b\tc"
+
+    @pytest.mark.asyncio
+    @patch('temporal.activities.get_shared_async_web_client')
+    async def test_post_to_slack(self, mock_get_client):
+        client = SlowSlackClient(latency=0)
+        mock_get_client.return_value = client
+
+        await post_to_slack(PostToSlackInput(message="**hello**", channel_id="C123", thread_ts="123.456"))
+
+        assert client.posts[0]["channel"] == "C123"
+        assert client.posts[0]["thread_ts"] == "123.456"
+        assert client.posts[0]["text"].startswith("🧠 *hello*")
+
+    @pytest.mark.asyncio
+    @patch('temporal.activities.get_shared_async_web_client')
+    async def test_concurrent_posts_do_not_serialize(self, mock_get_client):
+        latency = 0.2
+        posts = 20
+        client = SlowSlackClient(latency=latency)
+        mock_get_client.return_value = client
+
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            post_to_slack(PostToSlackInput(message=f"message {i}", channel_id="C123", thread_ts="123.456"))
+            for i in range(posts)
+        ])
+        elapsed = time.perf_counter() - start
+
+        # Serialized posts would take posts * latency (4s)
+        assert len(client.posts) == posts
+        assert client.max_in_flight == posts
+        assert elapsed < latency * 3
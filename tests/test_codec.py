@@ -0,0 +1,48 @@
+import json
+
+import pytest
+from temporalio.api.common.v1 import Payload
+
+from temporal.codec import EncryptionCodec
+
+KEY = b"0" * 32
+
+def payload(size: int) -> Payload:
+    items = [{"role": "user", "content": f"message {i} about the deploy"} for i in range(size)]
+    return Payload(metadata={"encoding": b"json/plain"}, data=json.dumps(items).encode())
+
+class TestEncryptionCodec:
+    @pytest.mark.asyncio
+    async def test_compresses_large_payloads_before_encrypting(self):
+        codec = EncryptionCodec(KEY, compression="zlib")
+        large, small = payload(500), payload(1)
+
+        encoded = await codec.encode([large, small])
+
+        assert encoded[0].metadata["encryption-compression"] == b"zlib"
+        assert len(encoded[0].data) < len(large.data) / 5
+        assert "encryption-compression" not in encoded[1].metadata
+        assert await codec.decode(encoded) == [large, small]
+
+    @pytest.mark.asyncio
+    async def test_decodes_payloads_from_before_compression(self):
+        plain = payload(500)
+        encrypted_only = await EncryptionCodec(KEY).encode([plain])
+
+        decoded = await EncryptionCodec(KEY, compression="zlib").decode([*encrypted_only, plain])
+
+        assert decoded == [plain, plain]
+
+    @pytest.mark.asyncio
+    async def test_offloads_large_batches_to_a_thread_pool(self):
+        codec = EncryptionCodec(KEY, compression="zlib", offload_threshold=10_000)
+        small, large = [payload(1)], [payload(500), payload(2)]
+
+        assert await codec.decode(await codec.encode(small)) == small
+        assert codec.executor is None
+        assert await codec.decode(await codec.encode(large)) == large
+        assert codec.executor is not None
+
+    def test_rejects_unknown_compression(self):
+        with pytest.raises(ValueError):
+            EncryptionCodec(KEY, compression="lz4")
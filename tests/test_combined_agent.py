@@ -14,7 +14,7 @@ from temporalio.contrib.openai_agents import (
     TestModelProvider,
 )
 from research_agents.tools import (
-    GetChannelsRequest,
+    FindChannelsRequest,
 )
 from tests.test_models import (
     CombinedAgentTestModel
@@ -33,8 +33,8 @@ async def test_combined_agent(client: Client):
     async def mock_post_to_slack(input: PostToSlackInput) -> str:
         slack_posts.append(input)
     
-    @activity.defn(name="get_slack_channels")
-    async def mock_get_slack_channels(request: GetChannelsRequest) -> List[Dict[str, Any]]:
+    @activity.defn(name="find_relevant_channels")
+    async def mock_find_relevant_channels(request: FindChannelsRequest) -> List[Dict[str, Any]]:
         []
 
     new_config = client.config()
@@ -51,7 +51,7 @@ async def test_combined_agent(client: Client):
         activity_executor=ThreadPoolExecutor(5),
         activities=[
             mock_post_to_slack,
-            mock_get_slack_channels,
+            mock_find_relevant_channels,
         ],
     ) as worker:
         handle = await client.start_workflow(
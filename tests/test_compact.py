@@ -0,0 +1,95 @@
+import pytest
+from unittest.mock import patch, MagicMock
+
+from agents import FunctionTool, RunContextWrapper
+
+from research_agents.compact import (
+    ResearchContext,
+    clip_text,
+    expand_references,
+    relative_age,
+    render_matches,
+    short_ref,
+    split_references,
+    with_references,
+)
+from research_agents.search_cache import search_cache
+from research_agents.tools import search_slack, SlackSearchRequest
+
+NOW = 1704283200.0
+
+def match(i: int, channel: str = "general", user: str = "alice", text: str = "Deploy finished") -> dict:
+    return {
+        "channel": {"id": f"C{channel}", "name": channel},
+        "username": user,
+        "ts": f"{NOW - i * 3600:.6f}",
+        "text": text,
+        "permalink": f"https://acme.slack.com/archives/C{channel}/p{i}",
+    }
+
+class TestCompactOutput:
+    def test_clip_text(self):
+        assert clip_text("short", 10) == "short"
+        assert clip_text("deploy failed :white_check_mark: again", 30) == "deploy failed…"
+        # No dangling zero-width joiner from a split emoji sequence
+        assert clip_text("ok 👩‍💻 done", 5) == "ok 👩…"
+
+    def test_relative_age(self):
+        assert relative_age(f"{NOW - 30}", NOW) == "now"
+        assert relative_age(f"{NOW - 3 * 3600}", NOW) == "3h"
+        assert relative_age(f"{NOW - 10 * 86400}", NOW) == "1w"
+        assert relative_age(None, NOW) == "?"
+
+    def test_render_matches(self):
+        matches = [match(1), match(2, user="Bob"), match(3, channel="eng", text="Line one\n\nline two")]
+        output, references = split_references(render_matches(["Found 3 messages"], matches, budget_tokens=500, now=NOW))
+
+        lines = output.splitlines()
+        assert lines[1] == "channels: c1=#general c2=#eng"
+        assert lines[2] == "users: u1=alice u2=Bob"
+        assert lines[4] == f"{short_ref(matches[0])} c1 u1 1h: Deploy finished"
+        assert lines[6].endswith("c2 u1 3h: Line one line two")
+        assert "https://" not in output
+        assert references[short_ref(matches[1])] == matches[1]["permalink"]
+
+    def test_render_matches_respects_budget(self):
+        matches = [match(i, text="word " * 60) for i in range(50)]
+        output, references = split_references(render_matches(["Found 50 messages"], matches, budget_tokens=400, now=NOW))
+
+        assert len(output) / 4 <= 400
+        assert 0 < len(references) < 50
+        assert output.endswith(f"(+{50 - len(references)} more matches cut to fit the output budget)")
+
+    def test_expand_references(self):
+        references = {"abcde": "https://acme.slack.com/archives/C1/p1"}
+        text = "See [the outage](ref:abcde) and [this](ref:zzzzz)"
+        assert expand_references(text, references) == "See [the outage](https://acme.slack.com/archives/C1/p1) and [this](ref:zzzzz)"
+
+    @pytest.mark.asyncio
+    async def test_with_references_keeps_permalinks_out_of_the_model_input(self):
+        output = render_matches(["Found 1 messages"], [match(1)], budget_tokens=500, now=NOW)
+
+        async def invoke(ctx, input):
+            return output
+
+        tool = with_references(FunctionTool(name="search_slack", description="", params_json_schema={}, on_invoke_tool=invoke))
+        context = ResearchContext()
+        text = await tool.on_invoke_tool(RunContextWrapper(context=context), "{}")
+
+        assert "<<references>>" not in text
+        assert context.references == {short_ref(match(1)): match(1)["permalink"]}
+
+    @patch('research_agents.tools.get_slack_client')
+    def test_search_slack_compact_format(self, mock_get_client):
+        search_cache.clear()
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.search_messages.return_value = {"messages": {"matches": [match(1)], "total": 1}}
+
+        with patch('research_agents.tools.settings.tool_output_format', "compact"):
+            result = search_slack(SlackSearchRequest(query="deploy", resolve_user_names=False))
+
+        text, references = split_references(result)
+        assert text.startswith("Found 1 messages for query:")
+        assert "c1=#general" in text
+        assert list(references.values()) == [match(1)["permalink"]]
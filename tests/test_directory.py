@@ -0,0 +1,97 @@
+import contextvars
+import threading
+import pytest
+from unittest.mock import patch
+
+from research_agents.directory import DirectoryCache
+
+caller = contextvars.ContextVar("caller", default=None)
+
+class TestDirectoryCache:
+    def test_loads_once_and_serves_from_memory(self):
+        directory = DirectoryCache("test", ttl_seconds=60)
+        calls = []
+
+        def load():
+            calls.append(1)
+            return {"C1": {"name": "general"}}
+
+        assert directory.get(load) == {"C1": {"name": "general"}}
+        assert directory.get(load) == {"C1": {"name": "general"}}
+        assert len(calls) == 1
+        assert directory.version == 1
+
+    def test_stale_snapshot_served_while_refreshing_in_background(self):
+        directory = DirectoryCache("test", ttl_seconds=60)
+        release = threading.Event()
+        reloads = []
+
+        def reload():
+            reloads.append(1)
+            release.wait(timeout=1)
+            return {"C2": {"name": "new"}}
+
+        with patch('research_agents.directory.time.monotonic', return_value=0):
+            directory.get(lambda: {"C1": {"name": "old"}})
+
+        with patch('research_agents.directory.time.monotonic', return_value=120):
+            # The stale snapshot is returned immediately while one refresh runs in a thread
+            assert "C1" in directory.get(reload)
+            assert "C1" in directory.get(reload)
+            release.set()
+            for _ in range(100):
+                if "C2" in directory.entries():
+                    break
+                threading.Event().wait(0.01)
+
+        assert directory.entries() == {"C2": {"name": "new"}}
+        assert len(reloads) == 1
+
+    def test_failed_refresh_keeps_snapshot(self):
+        directory = DirectoryCache("test", ttl_seconds=60)
+        directory.replace({"C1": {"name": "old"}})
+
+        def broken():
+            raise RuntimeError("slack down")
+
+        directory._refreshing = True
+        directory._refresh(broken)
+
+        assert directory.entries() == {"C1": {"name": "old"}}
+        assert directory._refreshing is False
+
+    @pytest.mark.asyncio
+    async def test_async_refresh_in_background(self):
+        directory = DirectoryCache("test", ttl_seconds=60)
+
+        async def load_old():
+            return {"C1": {"name": "old"}}
+
+        async def load_new():
+            return {"C2": {"name": "new"}}
+
+        with patch('research_agents.directory.time.monotonic', return_value=0):
+            await directory.aget(load_old)
+        with patch('research_agents.directory.time.monotonic', return_value=120):
+            assert "C1" in await directory.aget(load_new)
+        await directory._background
+
+        assert directory.entries() == {"C2": {"name": "new"}}
+
+    @pytest.mark.asyncio
+    async def test_async_loads_run_outside_the_callers_context(self):
+        directory = DirectoryCache("test", ttl_seconds=60)
+        seen = []
+
+        async def load():
+            seen.append(caller.get())
+            return {"C1": {"name": "general"}}
+
+        caller.set("activity")
+        with patch('research_agents.directory.time.monotonic', return_value=0):
+            await directory.aget(load)
+        with patch('research_agents.directory.time.monotonic', return_value=120):
+            await directory.aget(load)
+        await directory._background
+
+        assert seen == [None, None]
@@ -0,0 +1,29 @@
+from temporal.history import ChatHistory
+
+class TestChatHistory:
+    def test_drops_oldest_entries_past_the_byte_cap(self):
+        history = ChatHistory(max_bytes=100, preview_chars=20)
+        for i in range(10):
+            history.append(f"User: message number {i}")
+
+        rendered = history.render()
+        assert len(rendered.encode()) <= 130
+        assert rendered.startswith(f"[{history.dropped} earlier entries dropped]")
+        assert rendered.endswith("User: message number 9")
+        assert "message number 0" not in rendered
+        assert len(history) == 10
+
+    def test_tool_outputs_are_previews(self):
+        history = ChatHistory(max_bytes=10_000, preview_chars=20)
+        history.append_tool_output("agent: Tool call output: ", "word " * 1000)
+
+        assert history.render() == "agent: Tool call output: word word word…"
+
+    def test_pending_details_only_when_changed(self):
+        history = ChatHistory(max_bytes=10_000, preview_chars=20)
+        history.append("User: hi")
+
+        assert history.pending_details() == "User: hi"
+        assert history.pending_details() is None
+        history.append("agent: hello")
+        assert history.pending_details() == "User: hi\n\nagent: hello"
@@ -0,0 +1,94 @@
+from unittest.mock import patch
+
+from temporal.memory import (
+    NOTE_PREFIX,
+    SUMMARY_PREFIX,
+    elide_tool_outputs,
+    estimate_items_tokens,
+    render_transcript,
+    note_item,
+    split_recent_turns,
+    summary_item,
+)
+from temporal.workflow import ConversationConfig
+
+def turn(i: int, output: str) -> list:
+    return [
+        {"content": f"question {i}", "role": "user"},
+        {"type": "function_call", "call_id": f"call{i}", "name": "search_slack", "arguments": '{"query": "deploy"}'},
+        {"type": "function_call_output", "call_id": f"call{i}", "output": output},
+        {"type": "message", "role": "assistant", "content": [{"type": "output_text", "text": f"answer {i}"}]},
+    ]
+
+def structured_turn(i: int, results: str) -> list:
+    """A turn as the structured plan leaves it: the plan, the workflow's notes and the report."""
+    return [
+        {"content": f"question {i}", "role": "user"},
+        {"type": "message", "role": "assistant", "content": [{"type": "output_text", "text": f"plan {i}"}]},
+        note_item(f"Final plan to execute: plan {i}"),
+        note_item(f"The plan's searches already ran. Results:\n{results}"),
+        {"type": "message", "role": "assistant", "content": [{"type": "output_text", "text": f"report {i}"}]},
+    ]
+
+class TestMemory:
+    def test_split_recent_turns(self):
+        items = turn(1, "a") + turn(2, "b") + turn(3, "c")
+
+        older, recent = split_recent_turns(items, keep_turns=2)
+
+        assert older == turn(1, "a")
+        assert recent == turn(2, "b") + turn(3, "c")
+        assert split_recent_turns(items, keep_turns=3) == ([], items)
+
+    def test_summary_is_not_a_turn(self):
+        items = [summary_item("earlier findings")] + turn(2, "b") + turn(3, "c")
+
+        assert split_recent_turns(items, keep_turns=2) == ([], items)
+
+    def test_elide_tool_outputs_keeps_recent_turns(self):
+        bulky = "word " * 1000
+        items = turn(1, bulky) + turn(2, bulky)
+
+        elided = elide_tool_outputs(items, keep_turns=1, preview_chars=20)
+
+        assert elided[2]["output"] == "[elided search_slack output of 5000 chars] word word word…"
+        assert elided[6]["output"] == bulky
+        assert items[2]["output"] == bulky
+        assert estimate_items_tokens(elided) < estimate_items_tokens(items)
+        # Already elided outputs are left as they are
+        assert elide_tool_outputs(elided, keep_turns=1, preview_chars=20) == elided
+
+    def test_render_transcript(self):
+        transcript = render_transcript(turn(1, "Found 3 messages"), preview_chars=100)
+
+        assert transcript.split("\n\n") == [
+            "User: question 1",
+            'Tool call: search_slack({"query": "deploy"})',
+            "search_slack returned: Found 3 messages",
+            "Assistant: answer 1",
+        ]
+        assert summary_item("x")["content"] == f"{SUMMARY_PREFIX}x"
+
+    def test_workflow_notes_are_part_of_the_turn(self):
+        bulky = "word " * 1000
+        items = structured_turn(1, bulky) + structured_turn(2, bulky) + structured_turn(3, bulky)
+
+        # The notes don't start turns, so keeping two turns cuts at the second question
+        older, recent = split_recent_turns(items, keep_turns=2)
+        assert older == structured_turn(1, bulky)
+
+        elided = elide_tool_outputs(items, keep_turns=2, preview_chars=20)
+        assert elided[3]["content"] == f"{NOTE_PREFIX}[elided note of 5042 chars] The plan's searches…"
+        assert elided[2] == items[2]
+        assert elided[5:] == items[5:]
+        assert elide_tool_outputs(elided, keep_turns=2, preview_chars=20) == elided
+
+        transcript = render_transcript(structured_turn(1, bulky), preview_chars=20).split("\n\n")
+        assert transcript[2:4] == ["Workflow: Final plan to…", "Workflow: The plan's searches…"]
+
+    def test_config_is_read_once_from_settings(self):
+        assert ConversationConfig() == ConversationConfig(memory_max_tokens=20_000, memory_keep_turns=2, memory_tool_preview_chars=300)
+        with patch('temporal.workflow.settings.memory_keep_turns', 5):
+            config = ConversationConfig.from_settings()
+        assert config.memory_keep_turns == 5
+        assert ConversationConfig.model_validate(config.model_dump()) == config
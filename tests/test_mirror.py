@@ -0,0 +1,171 @@
+import time
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from research_agents.directory import channel_directory
+from research_agents.mirror import MessageMirror, parse_search_query, sync_mirror
+from research_agents.search_cache import search_cache
+from research_agents.tools import search_slack, SlackSearchRequest
+
+# 2024-01-02 and 2024-01-03 12:00 UTC
+JAN_2 = "1704196800.000100"
+JAN_3 = "1704283200.000200"
+JAN_1_START = 1704067200.0
+
+def seeded_mirror() -> MessageMirror:
+    mirror = MessageMirror(":memory:")
+    mirror.set_workspace_url("https://acme.slack.com/")
+    mirror.store("C1", "support-acme", [
+        {"ts": JAN_2, "user": "U1", "text": "Deploy failed with an expired certificate", "reply_count": 1, "thread_ts": JAN_2},
+        {"ts": "1704196900.000000", "user": "U2", "text": "Renewing the certificate now", "thread_ts": JAN_2},
+        {"ts": "1704196950.000000", "user": "U2", "subtype": "channel_join", "text": "<@U2> has joined"},
+    ], latest_ts=JAN_2, window_start=JAN_1_START)
+    mirror.store("C2", "eng-releases", [
+        {"ts": JAN_3, "user": "U1", "text": "Deploying the certificates rotation to production"},
+    ], latest_ts=JAN_3, window_start=JAN_1_START)
+    return mirror
+
+class TestMessageMirror:
+    def test_parse_search_query(self):
+        query = parse_search_query('deploy "expired cert" -flaky rotat* in:#Support-Acme -is:dm from:<@U1> after:2024-01-01')
+        assert query.terms == ["deploy", "expired cert"]
+        assert query.prefixes == ["rotat"]
+        assert query.excluded_terms == ["flaky"]
+        assert query.channels == ["support-acme"]
+        assert query.users == ["U1"]
+        assert query.after == 1704153600  # 2024-01-02 00:00 UTC
+        assert query.match_expression() == '"deploy" "expired cert" "rotat"* NOT "flaky"'
+
+        # Modifiers the mirror can't answer fall back to Slack
+        assert parse_search_query("deploy has:link") is None
+        assert parse_search_query("deploy after:yesterday") is None
+        assert parse_search_query("-flaky") is None
+
+    def test_search_filters_and_ranks(self):
+        mirror = seeded_mirror()
+
+        total, matches = mirror.search(parse_search_query("certificate"), sort="timestamp", limit=10)
+        assert total == 3
+        assert [match["ts"] for match in matches] == [JAN_3, "1704196900.000000", JAN_2]
+        assert matches[1]["permalink"] == (
+            f"https://acme.slack.com/archives/C1/p1704196900000000?thread_ts={JAN_2}&cid=C1"
+        )
+
+        total, matches = mirror.search(parse_search_query("certificate in:#support-acme before:2024-01-03"), sort="score", limit=1)
+        assert total == 2
+        assert matches[0]["channel"] == {"id": "C1", "name": "support-acme"}
+
+        total, _ = mirror.search(parse_search_query("certificate on:2024-01-03"), sort="timestamp", limit=10)
+        assert total == 1
+        total, _ = mirror.search(parse_search_query("joined"), sort="timestamp", limit=10)
+        assert total == 0
+
+    def test_covers(self):
+        mirror = seeded_mirror()
+        assert mirror.covers(["support-acme", "eng-releases"], after=JAN_1_START)
+        assert not mirror.covers(["support-acme", "general"], after=JAN_1_START)
+        assert not mirror.covers([], after=JAN_1_START)
+        # Searches reaching back before the mirrored window, or with no start, go to Slack
+        assert not mirror.covers(["support-acme"])
+        assert not mirror.covers(["support-acme"], after=JAN_1_START - 86400)
+
+    def test_covers_needs_a_recent_sync(self):
+        mirror = seeded_mirror()
+        later = time.time() + 3 * 3600
+        with patch('research_agents.mirror.time.time', return_value=later), \
+                patch('research_agents.mirror.settings.mirror_sync_interval_seconds', 300):
+            assert not mirror.covers(["support-acme"], after=JAN_1_START)
+            # Ranges that end before the last sync are still complete
+            assert mirror.covers(["support-acme"], after=JAN_1_START, before=JAN_1_START + 86400)
+
+    def test_sync_is_incremental(self):
+        channel_directory.clear()
+        mirror = MessageMirror(":memory:")
+        client = MagicMock()
+        client.auth_test.return_value = {"url": "https://acme.slack.com/"}
+        client.conversations_list.return_value = {"channels": [{"id": "C1", "name": "support-acme"}]}
+        parent = {"ts": JAN_2, "text": "First", "reply_count": 1, "latest_reply": "1704196900.000000"}
+        client.conversations_history.side_effect = [
+            {"messages": [{"ts": JAN_3, "text": "Second"}], "response_metadata": {"next_cursor": "page2"}},
+            {"messages": [parent]},
+            {"messages": []},
+            {"messages": [{"ts": JAN_3, "text": "Second"}, parent]},
+        ]
+        client.conversations_replies.return_value = {
+            "messages": [{"ts": JAN_2, "text": "First"}, {"ts": "1704196900.000000", "text": "Reply", "thread_ts": JAN_2}]
+        }
+        now = JAN_1_START + 20 * 86400
+
+        def oldest(call: int) -> float:
+            return float(client.conversations_history.call_args_list[call].kwargs["oldest"])
+
+        with patch('research_agents.mirror.time.time', return_value=now):
+            assert sync_mirror(client, mirror, ["support-acme", "missing"]) == {"support-acme": 3}
+            assert mirror.sync_cursor("C1") == JAN_3
+            assert oldest(0) == pytest.approx(now - 90 * 86400)
+
+            # The next sync lists from the cursor, which is older than the thread refresh window
+            assert sync_mirror(client, mirror, ["support-acme"]) == {"support-acme": 0}
+            assert oldest(2) == float(JAN_3)
+            assert mirror.covers(["support-acme"], after=now - 30 * 86400)
+
+        # A day later the whole window is listed again, but no message or thread is re-read
+        with patch('research_agents.mirror.time.time', return_value=now + 86400):
+            assert sync_mirror(client, mirror, ["support-acme"]) == {"support-acme": 0}
+            assert oldest(3) == pytest.approx(now + 86400 - 90 * 86400)
+        client.conversations_replies.assert_called_once()
+        assert mirror.sync_cursor("C1") == JAN_3
+        client.auth_test.assert_called_once()
+        channel_directory.clear()
+
+    def test_sync_fetches_late_replies_to_recent_threads(self):
+        channel_directory.clear()
+        mirror = MessageMirror(":memory:")
+        client = MagicMock()
+        client.auth_test.return_value = {"url": "https://acme.slack.com/"}
+        client.conversations_list.return_value = {"channels": [{"id": "C1", "name": "support-acme"}]}
+        first_reply, late_reply = "1704196900.000000", "1704300000.000000"
+        client.conversations_history.side_effect = [
+            {"messages": [{"ts": JAN_2, "text": "Ticket", "reply_count": 1, "latest_reply": first_reply}]},
+            # The thread got a reply after the last sync; its parent is older than the cursor
+            {"messages": [{"ts": JAN_2, "text": "Ticket", "reply_count": 2, "latest_reply": late_reply}]},
+        ]
+        client.conversations_replies.side_effect = [
+            {"messages": [{"ts": JAN_2}, {"ts": first_reply, "text": "Looking", "thread_ts": JAN_2}]},
+            {"messages": [{"ts": JAN_2}, {"ts": first_reply, "text": "Looking", "thread_ts": JAN_2},
+                          {"ts": late_reply, "text": "Fixed the certificate", "thread_ts": JAN_2}]},
+        ]
+        now = float(JAN_3) + 86400
+
+        with patch('research_agents.mirror.time.time', return_value=now):
+            sync_mirror(client, mirror, ["support-acme"])
+            assert sync_mirror(client, mirror, ["support-acme"]) == {"support-acme": 1}
+        # Threads started in the last week are re-listed on every sync
+        assert float(client.conversations_history.call_args.kwargs["oldest"]) == pytest.approx(now - 7 * 86400)
+        assert client.conversations_replies.call_args.kwargs["oldest"] == first_reply
+        total, _ = mirror.search(parse_search_query("certificate"), sort="timestamp", limit=10)
+        assert total == 1
+        channel_directory.clear()
+
+    @patch('research_agents.tools.get_slack_client')
+    def test_search_slack_uses_mirror(self, mock_get_client):
+        search_cache.clear()
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.search_messages.return_value = {"messages": {"matches": [], "total": 0}}
+
+        with patch('research_agents.tools.message_mirror', seeded_mirror()), \
+                patch('research_agents.tools.settings.search_backend', "auto"):
+            result = search_slack(SlackSearchRequest(query="certificate", channels="support-acme", start_time="2024-01-01", resolve_user_names=False))
+            assert "Found 2 messages" in result
+            assert "Renewing the certificate now" in result
+            mock_client.search_messages.assert_not_called()
+
+            # Without a start date the search may reach past the mirrored window
+            search_slack(SlackSearchRequest(query="certificate", channels="support-acme", resolve_user_names=False))
+            assert mock_client.search_messages.call_count == 1
+
+            # Channels the mirror doesn't cover still go to Slack
+            search_slack(SlackSearchRequest(query="certificate", channels="general", start_time="2024-01-01", resolve_user_names=False))
+            assert mock_client.search_messages.call_count == 2
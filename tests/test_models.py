@@ -37,8 +37,8 @@ class CombinedAgentTestModel(StaticTestModel):
             output=[
                 ResponseFunctionToolCall(
                     type="function_call",
-                    name="get_slack_channels",
-                    arguments='{"request": {"include_archived": false}}',
+                    name="find_relevant_channels",
+                    arguments='{"request": {"query": "test message"}}',
                     call_id="call",
                     id="id",
                     status="completed",
@@ -74,8 +74,8 @@ class MultiAgentTestModel(StaticTestModel):
             output=[
                 ResponseFunctionToolCall(
                     type="function_call",
-                    name="get_slack_channels",
-                    arguments='{"request": {"include_archived": false}}',
+                    name="find_relevant_channels",
+                    arguments='{"request": {"query": "test message"}}',
                     call_id="call",
                     id="id",
                     status="completed",
@@ -151,3 +151,107 @@ class MultiAgentTestModel(StaticTestModel):
             response_id=None,
         ),        
     ]
+
+class StructuredPlanTestModel(StaticTestModel):
+    responses = [
+        ModelResponse(
+            output=[
+                ResponseOutputMessage(
+                    id="",
+                    content=[
+                        ResponseOutputText(
+                            text=PlanningResult(
+                                clarifying_questions="",
+                                human_input_required=False,
+                                plan="search go sdk and release in #eng-releases since 2025-06-01",
+                                keyword_groups=["go sdk", "release"],
+                                channels=["eng-releases"],
+                                start_time="2025-06-01",
+                            ).model_dump_json(),
+                            annotations=[],
+                            type="output_text",
+                        )
+                    ],
+                    role="assistant",
+                    status="completed",
+                    type="message",
+                )
+            ],
+            usage=Usage(),
+            response_id=None,
+        ),
+        ModelResponse(
+            output=[
+                ResponseOutputMessage(
+                    id="",
+                    content=[
+                        ResponseOutputText(
+                            text=EvaluationFeedback(
+                                scores="5",
+                                total_score=20,
+                                passed=True,
+                                feedback="very good plan"
+                            ).model_dump_json(),
+                            annotations=[],
+                            type="output_text",
+                        )
+                    ],
+                    role="assistant",
+                    status="completed",
+                    type="message",
+                )
+            ],
+            usage=Usage(),
+            response_id=None,
+        ),
+        ModelResponse(
+            output=[
+                ResponseOutputMessage(
+                    id="",
+                    content=[
+                        ResponseOutputText(
+                            text="my summary is blah",
+                            annotations=[],
+                            type="output_text",
+                        )
+                    ],
+                    role="assistant",
+                    status="completed",
+                    type="message",
+                )
+            ],
+            usage=Usage(),
+            response_id=None,
+        ),
+    ]
+
+class WidePlanTestModel(StaticTestModel):
+    """A structured plan with more global searches than one batch holds."""
+    responses = [
+        ModelResponse(
+            output=[
+                ResponseOutputMessage(
+                    id="",
+                    content=[
+                        ResponseOutputText(
+                            text=PlanningResult(
+                                clarifying_questions="",
+                                human_input_required=False,
+                                plan="search twelve release topics since 2025-06-01",
+                                keyword_groups=[f"topic {i}" for i in range(12)],
+                                start_time="2025-06-01",
+                            ).model_dump_json(),
+                            annotations=[],
+                            type="output_text",
+                        )
+                    ],
+                    role="assistant",
+                    status="completed",
+                    type="message",
+                )
+            ],
+            usage=Usage(),
+            response_id=None,
+        ),
+        *StructuredPlanTestModel.responses[1:],
+    ]
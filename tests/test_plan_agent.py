@@ -0,0 +1,30 @@
+from research_agents.plan_agent import MAX_PLAN_SEARCHES, PlanningResult, plan_searches
+
+
+def make_plan(keyword_groups=None, **fields) -> PlanningResult:
+    return PlanningResult(
+        clarifying_questions="",
+        human_input_required=False,
+        plan="",
+        keyword_groups=keyword_groups,
+        **fields,
+    )
+
+
+class TestPlanSearches:
+    def test_channel_and_global_search_per_group(self):
+        plan = make_plan(["go sdk", "release"], channels=["eng-releases", "support-acme"], start_time="2025-06-01")
+        searches = plan_searches(plan)
+
+        assert [(search.query, search.channels) for search in searches] == [
+            ("go sdk", "eng-releases,support-acme"),
+            ("go sdk", None),
+            ("release", "eng-releases,support-acme"),
+            ("release", None),
+        ]
+        assert all(search.start_time == "2025-06-01" and search.end_time is None for search in searches)
+
+    def test_global_only_and_capped(self):
+        assert [search.channels for search in plan_searches(make_plan(["go sdk"]))] == [None]
+        plan = make_plan([f"topic {i}" for i in range(15)], channels=["eng-releases"])
+        assert len(plan_searches(plan)) == MAX_PLAN_SEARCHES
@@ -0,0 +1,49 @@
+from unittest.mock import patch
+
+from research_agents.embeddings import HashingEmbedder
+from research_agents.plan_cache import PlanCache, normalize_question
+
+PLAN = {"plan": "Search #eng-releases for 'go sdk release'", "human_input_required": False}
+
+
+def make_cache(**kwargs) -> PlanCache:
+    options = {"max_entries": 10, "ttl_seconds": 60, "min_similarity": 0.9, "embedder": HashingEmbedder(256)}
+    options.update(kwargs)
+    return PlanCache(**options)
+
+
+class TestPlanCache:
+    def test_normalize_question(self):
+        assert normalize_question("When was the latest Go SDK release?") == normalize_question("go sdk releases latest, when?")
+        assert normalize_question("the a of") == ""
+
+    def test_exact_and_similar_questions_hit(self):
+        cache = make_cache()
+        cache.put("When was the latest Go SDK release?", PLAN)
+
+        assert cache.get("when was the latest go sdk release") == (PLAN, 1.0)
+        plan, similarity = cache.get("latest Go SDK release date")
+        assert plan == PLAN and 0.9 <= similarity < 1.0
+        # Close wording about another subject needs its own plan
+        assert cache.get("When was the latest Python SDK release?") is None
+        assert cache.stats() == {"hits": 2, "misses": 1, "size": 1, "hit_rate": 0.667}
+
+    def test_ttl_expiry(self):
+        cache = make_cache()
+        with patch('research_agents.plan_cache.time.time', return_value=1000):
+            cache.put("latest go sdk release", PLAN)
+        with patch('research_agents.plan_cache.time.time', return_value=1059):
+            assert cache.get("latest go sdk release") is not None
+        with patch('research_agents.plan_cache.time.time', return_value=1061):
+            assert cache.get("latest go sdk release") is None
+        assert cache.stats()["size"] == 0
+
+    def test_lru_eviction(self):
+        cache = make_cache(max_entries=2)
+        cache.put("go sdk release", PLAN)
+        cache.put("python sdk release", PLAN)
+        cache.get("go sdk release")
+        cache.put("java sdk release", PLAN)
+
+        assert normalize_question("python sdk release") not in cache._entries
+        assert cache.stats()["size"] == 2
@@ -0,0 +1,63 @@
+from research_agents.plan_agent import PlanningResult
+from research_agents.prejudge import group_keywords, planned_channels, score_plan
+
+CHANNELS = {
+    "C1": {"id": "C1", "name": "eng-releases", "is_archived": False},
+    "C2": {"id": "C2", "name": "support-acme", "is_archived": False},
+    "C3": {"id": "C3", "name": "old-releases", "is_archived": True},
+}
+
+
+def make_plan(plan: str, keyword_groups=None, **fields) -> PlanningResult:
+    return PlanningResult(
+        clarifying_questions="",
+        human_input_required=False,
+        plan=plan,
+        keyword_groups=keyword_groups,
+        **fields,
+    )
+
+
+class TestPrejudge:
+    def test_group_keywords_and_channels(self):
+        assert group_keywords('"go sdk" release in:#eng-releases after:2025-01-01') == ['"go sdk"', "release"]
+        plan = make_plan("Step #1: search #eng-releases, then #Support-Acme", ["release in:#eng-releases"])
+        assert planned_channels(plan) == ["eng-releases", "support-acme"]
+
+    def test_clear_plan_passes(self):
+        plan = make_plan(
+            "Search #eng-releases for the last 30 days. Confidence: 🟢",
+            ["go sdk", "sdk release after:2025-01-01"],
+        )
+        feedback = score_plan("What was in the latest Go SDK release?", plan, CHANNELS)
+        assert feedback.passed
+        assert feedback.total_score == 4
+
+    def test_borderline_plans_go_to_the_judge(self):
+        question = "Which customers escalated this month?"
+        good = make_plan("Search #support-acme since 2025-06-01. Confidence: 🟢", ["escalation", "urgent outage"])
+        assert score_plan(question, good, CHANNELS).passed
+
+        cases = [
+            make_plan(good.plan, ["too many keywords here"]),
+            make_plan(good.plan.replace("#support-acme", "#old-releases"), good.keyword_groups),
+            make_plan(good.plan.replace("#support-acme", "#eng-releases"), good.keyword_groups),
+            make_plan(good.plan.replace(" since 2025-06-01", ""), good.keyword_groups),
+            make_plan(good.plan.replace("🟢", "🟡"), good.keyword_groups),
+        ]
+        for plan in cases:
+            feedback = score_plan(question, plan, CHANNELS)
+            assert not feedback.passed
+            assert feedback.total_score < 5
+            assert "❌" in feedback.scores
+
+    def test_structured_fields(self):
+        plan = make_plan(
+            "Search the release channel. Confidence: 🟢",
+            ["go sdk"],
+            channels=["eng-releases"],
+            start_time="2025-06-01",
+        )
+        assert planned_channels(plan) == ["eng-releases"]
+        assert score_plan("What shipped since June?", plan, CHANNELS).passed
+
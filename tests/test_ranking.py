@@ -0,0 +1,29 @@
+from research_agents.ranking import BM25Index, hamming, simhash, tokenize
+
+class TestRanking:
+    def test_tokenize(self):
+        assert tokenize("What are the Go-SDK releases?") == ["go", "sdk", "release"]
+        assert tokenize("") == []
+
+    def test_bm25_prefers_rare_and_dense_matches(self):
+        index = BM25Index([
+            tokenize("general company announcements"),
+            tokenize("sdk go release go sdk"),
+            tokenize("sdk python release"),
+        ])
+
+        ranked = index.top_k(tokenize("go sdk"), 3)
+
+        assert ranked[0][0] == 1
+        assert [doc_id for doc_id, _ in ranked] == [1, 2]
+
+    def test_bm25_empty_index(self):
+        assert BM25Index([]).top_k(["go"], 5) == []
+
+    def test_simhash_near_duplicates(self):
+        text = tokenize("The deploy to production failed because the certificate expired last night")
+        echo = tokenize("The deploy to production failed because the certificate expired last night!")
+        other = tokenize("Lunch plans for the offsite are in the shared calendar now")
+
+        assert simhash(text) == simhash(echo)
+        assert hamming(simhash(text), simhash(other)) > 6
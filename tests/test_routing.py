@@ -0,0 +1,57 @@
+from datetime import datetime
+from unittest.mock import patch
+
+from research_agents.routing import model_for
+from research_agents.execution_agent import init_execution_agent
+from research_agents.plan_agent import init_plan_agent
+from temporal.workflow import ConversationConfig
+
+NOW = datetime(2024, 1, 3)
+
+class TestModelRouting:
+    def test_defaults_to_model_name(self):
+        with patch('research_agents.routing.settings.fast_model_name', ""):
+            assert model_for("plan") == model_for("report") == "gpt-4o"
+            assert init_execution_agent(NOW).handoffs == []
+
+    def test_fast_model_for_planning_and_tool_turns(self):
+        with patch('research_agents.routing.settings.fast_model_name', "gpt-4o-mini"), \
+                patch('research_agents.routing.settings.plan_model_name', "o4-mini"):
+            assert model_for("plan") == "o4-mini"
+            assert model_for("execution") == model_for("summary") == model_for("eval") == "gpt-4o-mini"
+            assert model_for("report") == model_for("combined") == "gpt-4o"
+
+            agent = init_execution_agent(NOW)
+            assert agent.model == "gpt-4o-mini"
+            assert [handoff.name for handoff in agent.handoffs] == ["Report Agent"]
+            assert agent.handoffs[0].model == "gpt-4o"
+            assert "hand off to the Report Agent" in agent.instructions
+
+    def test_escalation_model(self):
+        assert init_plan_agent(NOW, model="gpt-4o").model == "gpt-4o"
+
+    def test_config_fixes_the_agent_graph(self):
+        with patch('research_agents.routing.settings.fast_model_name', "gpt-4o-mini"):
+            config = ConversationConfig.from_settings()
+        assert config.model_for("execution") == config.model_for("eval") == "gpt-4o-mini"
+        assert config.model_for("report") == config.model_for("escalation") == "gpt-4o"
+
+        # The workflow builds its agents from the config, not from the replaying worker's settings
+        with patch('research_agents.routing.settings.fast_model_name', ""):
+            agent = init_execution_agent(
+                NOW,
+                model=config.model_for("execution"),
+                report_model=config.model_for("report"),
+                semantic_search=True,
+                compact_output=True,
+            )
+        assert [handoff.model for handoff in agent.handoffs] == ["gpt-4o"]
+        assert "semantic_search_slack" in [tool.name for tool in agent.tools]
+        assert "ref:k3x9q" in agent.instructions and "ref:k3x9q" in agent.handoffs[0].instructions
+
+    def test_configs_without_models_use_one_model(self):
+        config = ConversationConfig()
+        assert config.model_for("plan") == config.model_for("report") == "gpt-4o"
+        agent = init_execution_agent(NOW, model=config.model_for("execution"), report_model=config.model_for("report"))
+        assert agent.handoffs == []
+        assert "semantic_search_slack" not in [tool.name for tool in agent.tools]
@@ -0,0 +1,57 @@
+from unittest.mock import patch
+
+from research_agents.search_cache import (
+    SearchCache,
+    SqliteCacheStore,
+    cache_key,
+    normalize_query,
+)
+
+class TestSearchCache:
+    def test_normalize_query(self):
+        assert normalize_query("Deploy  Failure in:#b in:#a after:2024-01-01") == "deploy failure after:2024-01-01 in:#a in:#b"
+        assert cache_key("x in:#a", "score", 40) != cache_key("x in:#a", "timestamp", 40)
+        assert cache_key("x", "score", 40, page=2) != cache_key("x", "score", 40)
+
+    def test_lru_eviction(self):
+        cache = SearchCache(max_entries=2, ttl_seconds=60)
+        cache.put("a", {"v": 1})
+        cache.put("b", {"v": 2})
+        cache.get("a")
+        cache.put("c", {"v": 3})
+
+        assert cache.get("b") is None
+        assert cache.get("a") == {"v": 1}
+        assert cache.get("c") == {"v": 3}
+        assert cache.stats() == {"hits": 3, "misses": 1, "evictions": 1, "size": 2, "hit_rate": 0.75}
+
+    def test_ttl_expiry(self):
+        cache = SearchCache(max_entries=10, ttl_seconds=60)
+        with patch('research_agents.search_cache.time.time', return_value=1000):
+            cache.put("a", {"v": 1})
+        with patch('research_agents.search_cache.time.time', return_value=1059):
+            assert cache.get("a") == {"v": 1}
+        with patch('research_agents.search_cache.time.time', return_value=1061):
+            assert cache.get("a") is None
+
+    def test_sqlite_store_survives_restart(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        cache = SearchCache(max_entries=10, ttl_seconds=60, store=SqliteCacheStore(path))
+        cache.put("a", {"messages": {"total": 1}})
+
+        restarted = SearchCache(max_entries=10, ttl_seconds=60, store=SqliteCacheStore(path))
+
+        assert restarted.get("a") == {"messages": {"total": 1}}
+        assert restarted.stats()["hits"] == 1
+
+    def test_sqlite_store_prune(self, tmp_path):
+        store = SqliteCacheStore(str(tmp_path / "cache.db"))
+        store.put("old", {"v": 0}, stored_at=10)
+        store.put("a", {"v": 1}, stored_at=100)
+        store.put("b", {"v": 2}, stored_at=200)
+
+        store.prune(max_entries=1, oldest_allowed=50)
+
+        assert store.get("old") is None
+        assert store.get("a") is None
+        assert store.get("b") == ({"v": 2}, 200)
@@ -0,0 +1,71 @@
+from unittest.mock import patch
+
+import numpy as np
+
+from research_agents.embeddings import HashingEmbedder
+from research_agents.mirror import MessageMirror, parse_search_query
+from research_agents.semantic import SemanticIndex, VectorIndex, reciprocal_rank_fusion
+from research_agents.tools import semantic_search_slack, SemanticSearchRequest
+
+def seeded_index() -> SemanticIndex:
+    mirror = MessageMirror(":memory:")
+    mirror.store("C1", "support-acme", [
+        {"ts": "1704196800.000000", "user": "U1", "text": "The deployment failed after the certificate expired"},
+        {"ts": "1704196900.000000", "user": "U2", "text": "Lunch menu for Friday is pizza"},
+        {"ts": "1704197000.000000", "user": "U2", "text": "Rolled back the deploy and renewed certificates"},
+    ], latest_ts="1704197000.000000")
+    mirror.store("C2", "eng-releases", [
+        {"ts": "1704283200.000000", "user": "U1", "text": "Deployments are frozen until the certificate rotation lands"},
+    ], latest_ts="1704283200.000000")
+    index = SemanticIndex(mirror, HashingEmbedder(256))
+    assert index.embed_pending() == 4
+    assert index.embed_pending() == 0
+    return index
+
+class TestSemanticSearch:
+    def test_hashing_embedder_matches_word_forms(self):
+        embedder = HashingEmbedder(256)
+        query, related, unrelated = embedder.embed(["deploy failed", "deployment failures", "pizza for lunch"])
+        assert np.isclose(np.linalg.norm(query), 1.0)
+        assert query @ related > embedder.min_similarity > query @ unrelated
+
+    def test_vector_index_filters_and_updates(self):
+        index = VectorIndex()
+        vectors = np.eye(3, dtype=np.float32)
+        index.add([10, 11, 12], vectors, ["a", "b", "a"], [1.0, 2.0, 3.0], ["U1", "U2", "U1"], [None, None, None])
+
+        assert index.search(np.array([1, 0, 0], dtype=np.float32), k=5, min_score=0.5) == [(10, 1.0)]
+        query = parse_search_query("x in:#b")
+        assert [message_id for message_id, _ in index.search(np.ones(3, dtype=np.float32), 5, index.mask(query))] == [11]
+
+        # A re-embedded message replaces its row instead of adding one
+        index.add([10], np.array([[0, 0, 1]], dtype=np.float32), ["a"], [1.0], ["U1"], [None])
+        assert len(index) == 3
+        assert index.search(np.array([0, 0, 1], dtype=np.float32), k=1) in ([(10, 1.0)], [(12, 1.0)])
+
+    def test_reciprocal_rank_fusion(self):
+        assert reciprocal_rank_fusion([[1, 2, 3], [2, 3, 4]]) == [2, 3, 1, 4]
+
+    def test_search_modes(self):
+        index = seeded_index()
+
+        total, matches = index.search(parse_search_query("deploy certificate problems"), limit=10, mode="semantic")
+        assert "Lunch menu for Friday is pizza" not in [match["text"] for match in matches]
+        assert total == 3
+
+        total, matches = index.search(parse_search_query("deploy certificate in:#support-acme"), limit=1, mode="hybrid")
+        assert total == 2
+        assert matches[0]["channel"]["name"] == "support-acme"
+
+    def test_semantic_search_slack(self):
+        with patch('research_agents.tools.semantic_index', None):
+            assert "not enabled" in semantic_search_slack(SemanticSearchRequest(query="deploy"))
+
+        with patch('research_agents.tools.semantic_index', seeded_index()):
+            result = semantic_search_slack(SemanticSearchRequest(
+                query="deployment certificate", channels="eng-releases", resolve_user_names=False
+            ))
+            assert "Found 1 messages" in result
+            assert "Deployments are frozen" in result
+            assert "Mode must be" in semantic_search_slack(SemanticSearchRequest(query="deploy", mode="fuzzy"))
+            assert "Error searching Slack" in semantic_search_slack(SemanticSearchRequest(query="deploy has:link"))
@@ -0,0 +1,141 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch, MagicMock
+
+from temporalio.exceptions import ApplicationError
+
+from research_agents.slack_client import (
+    REQUEST_ALLOWANCE_SECONDS,
+    RateLimiter,
+    RateLimitedWebClient,
+    PacedRateLimitErrorRetryHandler,
+    get_shared_web_client,
+    get_indexer_web_client,
+    _activity_wait_budget,
+    get_rate_limiter,
+    reset_shared_clients,
+)
+
+@pytest.fixture(autouse=True)
+def clean_clients():
+    reset_shared_clients()
+    yield
+    reset_shared_clients()
+
+class TestRateLimiter:
+    @patch('research_agents.slack_client.time.monotonic', return_value=100.0)
+    def test_burst_then_paced(self, _):
+        limiter = RateLimiter(limits={"search.messages": 20}, burst_ratio=0.1)
+
+        # Tier 2 allows a burst of 2, then one call every 3 seconds
+        assert limiter.reserve("search.messages") == 0
+        assert limiter.reserve("search.messages") == 0
+        assert limiter.reserve("search.messages") == pytest.approx(3.0)
+        assert limiter.reserve("search.messages") == pytest.approx(6.0)
+
+    @patch('research_agents.slack_client.time.monotonic', return_value=100.0)
+    def test_methods_have_independent_budgets(self, _):
+        limiter = RateLimiter(limits={"search.messages": 20, "users.info": 100}, burst_ratio=0.05)
+
+        assert limiter.reserve("search.messages") == 0
+        assert limiter.reserve("search.messages") > 0
+        assert limiter.reserve("users.info") == 0
+
+    @patch('research_agents.slack_client.time.monotonic', return_value=100.0)
+    def test_penalize_pushes_back_next_call(self, _):
+        limiter = RateLimiter(limits={"users.info": 60})
+        limiter.penalize("users.info", retry_after=5)
+
+        assert limiter.reserve("users.info") == pytest.approx(6.0)
+
+    @patch('research_agents.slack_client.time.monotonic', return_value=100.0)
+    def test_post_message_budget_is_per_channel(self, _):
+        limiter = RateLimiter(limits={"chat.postMessage": 60}, burst_ratio=1 / 60)
+
+        assert limiter.reserve("chat.postMessage", "C1") == 0
+        assert limiter.reserve("chat.postMessage", "C1") == pytest.approx(1.0)
+        assert limiter.reserve("chat.postMessage", "C2") == 0
+        # Other methods share one workspace budget whatever the channel
+        assert limiter.reserve("conversations.history", "C1") == 0
+        assert limiter.reserve("conversations.history", "C2") > 0
+
+    def test_idle_channel_buckets_are_evicted(self):
+        limiter = RateLimiter(limits={"chat.postMessage": 60}, burst_ratio=1 / 60)
+        with patch('research_agents.slack_client.time.monotonic', return_value=100.0):
+            for i in range(100):
+                limiter.reserve("chat.postMessage", f"C{i}")
+            limiter.reserve("conversations.history")
+            assert len(limiter._buckets) == 101
+        with patch('research_agents.slack_client.time.monotonic', return_value=102.0):
+            limiter.reserve("chat.postMessage", "C100")
+            # Refilled channel buckets go when another is added; workspace-wide ones stay
+            assert sorted(limiter._buckets) == ["chat.postMessage:C100", "conversations.history"]
+            assert limiter.reserve("chat.postMessage", "C100") == pytest.approx(1.0)
+            assert limiter.reserve("chat.postMessage", "C1") == 0
+
+    @patch('research_agents.slack_client.time.monotonic', return_value=100.0)
+    def test_wait_longer_than_max_wait_raises_and_refunds(self, _):
+        limiter = RateLimiter(limits={"search.messages": 20}, burst_ratio=0.1)
+        limiter.reserve("search.messages")
+        limiter.reserve("search.messages")
+
+        with pytest.raises(ApplicationError) as error:
+            limiter.reserve("search.messages", max_wait=2.0)
+        assert error.value.type == "SlackRateLimited"
+        assert error.value.next_retry_delay.total_seconds() == pytest.approx(3.0)
+        # The refused slot was handed back
+        assert limiter.reserve("search.messages", max_wait=3.0) == pytest.approx(3.0)
+
+    def test_wait_budget_follows_activity_deadline(self):
+        started = datetime.now(timezone.utc) - timedelta(seconds=4)
+        info = MagicMock(started_time=started, start_to_close_timeout=timedelta(seconds=10), schedule_to_close_timeout=None)
+        with patch('research_agents.slack_client.activity.in_activity', return_value=True), \
+                patch('research_agents.slack_client.activity.info', return_value=info):
+            assert _activity_wait_budget() == pytest.approx(10 - 4 - REQUEST_ALLOWANCE_SECONDS, abs=0.5)
+        assert _activity_wait_budget() is None
+
+    def test_retry_handler_penalizes_method_from_url(self):
+        limiter = MagicMock()
+        handler = PacedRateLimitErrorRetryHandler(limiter)
+        request = MagicMock(url="https://slack.com/api/search.messages")
+        response = MagicMock(status_code=429, headers={"Retry-After": ["0"]})
+        state = MagicMock()
+
+        with patch('slack_sdk.http_retry.builtin_handlers.time.sleep'):
+            handler.prepare_for_next_attempt(state=state, request=request, response=response)
+
+        limiter.penalize.assert_called_once_with("search.messages", 0.0, None)
+
+class TestSharedWebClient:
+    def test_client_is_shared_per_token(self):
+        first = get_shared_web_client("xoxp-one")
+        assert get_shared_web_client("xoxp-one") is first
+        assert get_shared_web_client("xoxb-two") is not first
+        assert isinstance(first, RateLimitedWebClient)
+        assert first.limiter is get_rate_limiter("xoxp-one")
+
+    @patch('research_agents.slack_client.settings')
+    def test_indexer_has_its_own_budget(self, mock_settings):
+        mock_settings.mirror_path = "mirror.db"
+        mock_settings.mirror_channels = "support-acme"
+        mock_settings.mirror_rate_limit_share = 0.2
+        mock_settings.slack_max_retries = 2
+        mock_settings.slack_rate_limit_enabled = True
+
+        indexer = get_indexer_web_client("xoxp-one")
+        shared = get_shared_web_client("xoxp-one")
+
+        # The two limiters split conversations.history's tier 3 budget of 50 per minute
+        assert indexer.limiter is not shared.limiter
+        assert indexer.limiter.limits["conversations.history"] == 10
+        assert shared.limiter.limits["conversations.history"] == 40
+
+    def test_api_call_waits_for_budget(self):
+        client = get_shared_web_client("xoxp-one")
+        client.limiter = MagicMock()
+
+        with patch('slack_sdk.WebClient.api_call', return_value={"ok": True}) as api_call:
+            client.users_info(user="U123")
+
+        client.limiter.acquire.assert_called_once_with("users.info", None)
+        api_call.assert_called_once()
@@ -0,0 +1,150 @@
+import pytest
+import uuid
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from temporal.workflow import ConversationConfig, ConversationWorkflow, ProcessUserMessageInput
+from temporal.activities import PostToSlackInput
+from temporalio.client import Client
+from temporalio.worker import Worker
+from temporalio import activity
+from temporalio.contrib.openai_agents import (
+    OpenAIAgentsPlugin,
+    TestModelProvider,
+)
+from research_agents.tools import (
+    SlackSearchBatchRequest,
+)
+from tests.test_models import (
+    StructuredPlanTestModel,
+    WidePlanTestModel,
+)
+
+
+@pytest.mark.asyncio
+async def test_speculative_search(client: Client):
+    slack_posts: list[PostToSlackInput] = []
+    searches: list[SlackSearchBatchRequest] = []
+
+    # Mock activities
+    @activity.defn(name="post_to_slack")
+    async def mock_post_to_slack(input: PostToSlackInput) -> str:
+        slack_posts.append(input)
+
+    @activity.defn(name="search_slack_batch")
+    async def mock_search_slack_batch(request: SlackSearchBatchRequest) -> str:
+        searches.append(request)
+        return "Found 1 message: go sdk 1.2 released"
+
+    new_config = client.config()
+    new_config["plugins"] = [
+        OpenAIAgentsPlugin(
+            model_provider=TestModelProvider(StructuredPlanTestModel())
+        )
+    ]
+    client = Client(**new_config)
+    async with Worker(
+        client,
+        task_queue=str(uuid.uuid4()),
+        workflows=[ConversationWorkflow],
+        activity_executor=ThreadPoolExecutor(5),
+        activities=[
+            mock_post_to_slack,
+            mock_search_slack_batch,
+        ],
+    ) as worker:
+        handle = await client.start_workflow(
+            ConversationWorkflow.run,
+            args=["with_judge", ConversationConfig(speculative_search_enabled=True)],
+            id=str(uuid.uuid4()),
+            task_queue=worker.task_queue,
+        )
+
+        input = ProcessUserMessageInput(
+            user_input="What's in the latest Go SDK release?",
+            channel_id="C123456",
+            thread_ts="123.456"
+        )
+
+        await handle.signal(ConversationWorkflow.process_user_message, input)
+
+        expected_messages = [
+            "[view workflow](http://localhost:8233/namespaces/default/workflows",
+            "This is what I'm planning to do: \nsearch go sdk and release",
+            "The plan has been reviewed by my team mate with the following comments: \nvery good plan",
+            "Ok, let me take the feedback and execute the plan. This may take a few moments.",
+            "my summary is blah"
+        ]
+        for _ in range(50):
+            if len(slack_posts) >= len(expected_messages):
+                break
+            await asyncio.sleep(0.1)
+
+        # Background status posts keep their order and land before the answer
+        assert len(slack_posts) == len(expected_messages)
+        for i, message in enumerate(expected_messages, start=0):
+            assert slack_posts[i].message.startswith(message)
+
+        # Only the plan's global searches ran early, with its time range
+        assert len(searches) == 1
+        assert [(search.query, search.channels, search.start_time) for search in searches[0].requests] == [
+            ("go sdk", None, "2025-06-01"),
+            ("release", None, "2025-06-01"),
+        ]
+
+
+@pytest.mark.asyncio
+async def test_speculative_search_is_split_into_batches(client: Client):
+    slack_posts: list[PostToSlackInput] = []
+    searches: list[SlackSearchBatchRequest] = []
+
+    @activity.defn(name="post_to_slack")
+    async def mock_post_to_slack(input: PostToSlackInput) -> str:
+        slack_posts.append(input)
+
+    @activity.defn(name="search_slack_batch")
+    async def mock_search_slack_batch(request: SlackSearchBatchRequest) -> str:
+        searches.append(request)
+        return f"Found 1 message for {request.requests[0].query}"
+
+    new_config = client.config()
+    new_config["plugins"] = [
+        OpenAIAgentsPlugin(
+            model_provider=TestModelProvider(WidePlanTestModel())
+        )
+    ]
+    client = Client(**new_config)
+    async with Worker(
+        client,
+        task_queue=str(uuid.uuid4()),
+        workflows=[ConversationWorkflow],
+        activity_executor=ThreadPoolExecutor(5),
+        activities=[
+            mock_post_to_slack,
+            mock_search_slack_batch,
+        ],
+    ) as worker:
+        handle = await client.start_workflow(
+            ConversationWorkflow.run,
+            args=["with_judge", ConversationConfig(speculative_search_enabled=True)],
+            id=str(uuid.uuid4()),
+            task_queue=worker.task_queue,
+        )
+
+        await handle.signal(ConversationWorkflow.process_user_message, ProcessUserMessageInput(
+            user_input="What happened with our releases?",
+            channel_id="C123456",
+            thread_ts="123.456"
+        ))
+
+        for _ in range(50):
+            if len(slack_posts) >= 5:
+                break
+            await asyncio.sleep(0.1)
+
+        # Twelve global searches don't fit the batch activity's limit of ten
+        assert len(slack_posts) == 5
+        assert sorted(len(batch.requests) for batch in searches) == [2, 10]
+        assert sorted(search.query for batch in searches for search in batch.requests) == sorted(
+            f"topic {i}" for i in range(12)
+        )
@@ -0,0 +1,115 @@
+import pytest
+import uuid
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from temporal.workflow import ConversationConfig, ConversationWorkflow, ProcessUserMessageInput
+from temporal.activities import PostToSlackInput
+from temporalio.client import Client
+from temporalio.exceptions import ApplicationError
+from temporalio.worker import Worker
+from temporalio import activity
+from temporalio.contrib.openai_agents import (
+    OpenAIAgentsPlugin,
+    TestModelProvider,
+)
+from research_agents.tools import (
+    SlackSearchBatchRequest,
+)
+from tests.test_models import (
+    StructuredPlanTestModel
+)
+
+EXPECTED_MESSAGES = [
+    "[view workflow](http://localhost:8233/namespaces/default/workflows",
+    "This is what I'm planning to do: \nsearch go sdk and release",
+    "The plan has been reviewed by my team mate with the following comments: \nvery good plan",
+    "Ok, let me take the feedback and execute the plan. This may take a few moments.",
+    "my summary is blah"
+]
+
+
+async def run_conversation(client: Client, config: ConversationConfig, search_fails: bool = False):
+    slack_posts: list[PostToSlackInput] = []
+    searches: list[SlackSearchBatchRequest] = []
+
+    # Mock activities
+    @activity.defn(name="post_to_slack")
+    async def mock_post_to_slack(input: PostToSlackInput) -> str:
+        slack_posts.append(input)
+
+    @activity.defn(name="search_slack_batch")
+    async def mock_search_slack_batch(request: SlackSearchBatchRequest) -> str:
+        searches.append(request)
+        if search_fails:
+            raise ApplicationError("Slack is down", non_retryable=True)
+        return f"Found 1 message for {request.requests[0].query}"
+
+    new_config = client.config()
+    new_config["plugins"] = [
+        OpenAIAgentsPlugin(
+            model_provider=TestModelProvider(StructuredPlanTestModel())
+        )
+    ]
+    client = Client(**new_config)
+    async with Worker(
+        client,
+        task_queue=str(uuid.uuid4()),
+        workflows=[ConversationWorkflow],
+        activity_executor=ThreadPoolExecutor(5),
+        activities=[
+            mock_post_to_slack,
+            mock_search_slack_batch,
+        ],
+    ) as worker:
+        handle = await client.start_workflow(
+            ConversationWorkflow.run,
+            args=["with_judge", config],
+            id=str(uuid.uuid4()),
+            task_queue=worker.task_queue,
+        )
+
+        input = ProcessUserMessageInput(
+            user_input="What's in the latest Go SDK release?",
+            channel_id="C123456",
+            thread_ts="123.456"
+        )
+
+        await handle.signal(ConversationWorkflow.process_user_message, input)
+
+        for _ in range(50):
+            if len(slack_posts) >= len(EXPECTED_MESSAGES):
+                break
+            await asyncio.sleep(0.1)
+
+    return slack_posts, searches
+
+
+@pytest.mark.asyncio
+async def test_structured_plan_reuses_speculative_search(client: Client):
+    config = ConversationConfig(structured_execution_enabled=True, speculative_search_enabled=True)
+    slack_posts, searches = await run_conversation(client, config)
+
+    assert len(slack_posts) == len(EXPECTED_MESSAGES)
+    for i, message in enumerate(EXPECTED_MESSAGES, start=0):
+        assert slack_posts[i].message.startswith(message)
+
+    # The speculative global searches are awaited, not repeated; only the channel searches are added
+    batches = sorted([(search.query, search.channels) for search in batch.requests] for batch in searches)
+    assert batches == [
+        [("go sdk", None), ("release", None)],
+        [("go sdk", "eng-releases"), ("release", "eng-releases")],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_structured_plan_falls_back_to_execution_agent(client: Client):
+    config = ConversationConfig(structured_execution_enabled=True)
+    slack_posts, searches = await run_conversation(client, config, search_fails=True)
+
+    # The failed searches hand the plan to the execution agent, which still answers
+    assert len(searches) == 1
+    assert len(searches[0].requests) == 4
+    assert len(slack_posts) == len(EXPECTED_MESSAGES)
+    for i, message in enumerate(EXPECTED_MESSAGES, start=0):
+        assert slack_posts[i].message.startswith(message)
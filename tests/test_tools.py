@@ -1,48 +1,100 @@
+import contextvars
 import pytest
 from unittest.mock import patch, MagicMock
+from slack_sdk.errors import SlackApiError
+from temporalio.exceptions import ApplicationError
 
 from research_agents.tools import (
     get_slack_channels,
+    find_relevant_channels,
     search_slack,
+    search_slack_batch,
     get_thread_messages,
+    get_threads,
     get_user_name,
-    _format_search_results,
+    get_user_names,
+    _fan_out,
     get_slack_client,
     GetChannelsRequest,
+    FindChannelsRequest,
     SlackSearchRequest,
+    SlackSearchBatchRequest,
     SlackSearchResult,
     ThreadInput,
-    GetUserNameRequest
+    GetThreadsRequest,
+    GetUserNameRequest,
+    GetUserNamesRequest
 )
+from research_agents.directory import channel_directory, user_directory
+from research_agents.tool_logic import format_search_results
+from research_agents.search_cache import search_cache
+from research_agents.thread_cache import thread_cache
 
 class TestSlackTools:
+    def setup_method(self):
+        channel_directory.clear()
+        user_directory.clear()
+        search_cache.clear()
+        thread_cache.clear()
+
     @patch('research_agents.tools.get_slack_client')
     def test_get_slack_channels(self, mock_get_client):
         # Setup mock
         mock_client = MagicMock()
         mock_get_client.return_value = mock_client
         
-        # Mock response data
-        mock_response = {
-            "channels": [
-                {"id": "C123", "name": "general"},
-                {"id": "C456", "name": "random"}
-            ]
-        }
-        mock_client.conversations_list.return_value = mock_response
+        # Mock two pages of response data
+        mock_client.conversations_list.side_effect = [
+            {
+                "channels": [
+                    {"id": "C123", "name": "general", "topic": {"value": "Company-wide news"}, "purpose": {"value": ""}},
+                    {"id": "C456", "name": "random"}
+                ],
+                "response_metadata": {"next_cursor": "page2"}
+            },
+            {
+                "channels": [
+                    {"id": "C789", "name": "support-acme", "purpose": {"value": "Acme support tickets"}},
+                    {"id": "C000", "name": "old-project", "is_archived": True}
+                ],
+                "response_metadata": {"next_cursor": ""}
+            },
+        ]
         
         # Call function
         result = get_slack_channels(GetChannelsRequest(include_archived=False))
         
         # Assertions
-        mock_client.conversations_list.assert_called_once_with(
-            exclude_archived=True,
+        assert mock_client.conversations_list.call_count == 2
+        mock_client.conversations_list.assert_called_with(
+            exclude_archived=False,
             types="public_channel",
-            limit=1000
+            limit=1000,
+            cursor="page2"
         )
-        assert len(result) == 2
-        assert result[0]["name"] == "general"
-        assert result[1]["name"] == "random"
+        assert result == [
+            {"name": "general", "topic": "Company-wide news"},
+            {"name": "random"},
+            {"name": "support-acme", "purpose": "Acme support tickets"},
+        ]
+
+    @patch('research_agents.tools.get_slack_client')
+    def test_get_slack_channels_served_from_directory(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.conversations_list.return_value = {
+            "channels": [
+                {"id": "C123", "name": "general"},
+                {"id": "C000", "name": "old-project", "is_archived": True}
+            ]
+        }
+
+        get_slack_channels(GetChannelsRequest(include_archived=False))
+        result = get_slack_channels(GetChannelsRequest(include_archived=True))
+
+        # Second call, even with a different filter, doesn't list the workspace again
+        mock_client.conversations_list.assert_called_once()
+        assert [channel["name"] for channel in result] == ["general", "old-project"]
     
     @patch('research_agents.tools.get_slack_client')
     def test_get_slack_channels_with_error(self, mock_get_client):
@@ -55,6 +107,34 @@ class TestSlackTools:
         with pytest.raises(Exception, match="API Error"):
             get_slack_channels(GetChannelsRequest(include_archived=True))
     
+    @patch('research_agents.tools.get_slack_client')
+    def test_find_relevant_channels(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.conversations_list.return_value = {
+            "channels": [
+                {"id": "C1", "name": "general", "purpose": {"value": "Company-wide announcements"}},
+                {"id": "C2", "name": "sdk-go", "topic": {"value": "Go SDK releases and questions"}},
+                {"id": "C3", "name": "sdk-python", "topic": {"value": "Python SDK"}},
+                {"id": "C4", "name": "support-acme", "purpose": {"value": "Acme support tickets"}},
+                {"id": "C5", "name": "go-sdk-legacy", "is_archived": True},
+            ]
+        }
+
+        result = find_relevant_channels(FindChannelsRequest(query="latest Go SDK release", top_k=2))
+
+        assert [channel["name"] for channel in result] == ["sdk-go", "sdk-python"]
+        assert result[0]["topic"] == "Go SDK releases and questions"
+        assert result[0]["score"] > result[1]["score"]
+
+        result = find_relevant_channels(FindChannelsRequest(query="go sdk", include_archived=True))
+        assert "go-sdk-legacy" in [channel["name"] for channel in result]
+        mock_client.conversations_list.assert_called_once()
+
+    def test_find_relevant_channels_validation(self):
+        assert "Query parameter is required" in find_relevant_channels(FindChannelsRequest(query=" "))
+        assert "top_k must be between" in find_relevant_channels(FindChannelsRequest(query="go", top_k=0))
+
     @patch('research_agents.tools.get_slack_client')
     def test_search_slack_basic(self, mock_get_client):
         # Setup mock
@@ -120,6 +200,154 @@ class TestSlackTools:
         assert "after:2023-01-01" in call_args["query"]
         assert "before:2023-12-31" in call_args["query"]
     
+    @patch('research_agents.tools.get_slack_client')
+    def test_search_slack_max_results_fans_out_and_dedupes(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        def page(number, matches):
+            return {"messages": {"matches": matches, "total": 250, "pagination": {"page": number, "page_count": 3}}}
+
+        def match(channel_id, ts):
+            return {"channel": {"id": channel_id, "name": channel_id.lower()}, "ts": ts, "text": f"msg {channel_id}/{ts}"}
+
+        pages = {
+            1: page(1, [match("C1", "1.0"), match("C1", "2.0")]),
+            2: page(2, [match("C1", "2.0"), match("C2", "2.0")]),  # C1/2.0 shifted onto the next page
+            3: page(3, [match("C2", "3.0")]),
+        }
+        mock_client.search_messages.side_effect = lambda **kwargs: pages[kwargs["page"]]
+
+        result = search_slack(SlackSearchRequest(query="test", max_results=250, resolve_user_names=False))
+
+        assert mock_client.search_messages.call_count == 3
+        assert {call[1]["page"] for call in mock_client.search_messages.call_args_list} == {1, 2, 3}
+        assert all(call[1]["count"] == 100 for call in mock_client.search_messages.call_args_list)
+        assert "Showing top 4 results" in result
+        assert result.count("msg C1/2.0") == 1
+        assert result.count("msg C2/2.0") == 1
+
+    @patch('research_agents.tools.get_slack_client')
+    def test_search_slack_max_results_stops_at_limit(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.search_messages.return_value = {
+            "messages": {"matches": [{"channel": {"id": "C1"}, "ts": f"{i}.0"} for i in range(100)], "total": 5000, "pagination": {"page_count": 50}}
+        }
+
+        search_slack(SlackSearchRequest(query="test", max_results=150, resolve_user_names=False))
+
+        assert mock_client.search_messages.call_count == 2
+
+    @patch('research_agents.tools.get_slack_client')
+    def test_search_slack_refines_matches(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        def match(channel, ts, text, thread_ts=None):
+            permalink = f"https://acme.slack.com/archives/{channel}/p{ts.replace('.', '')}" + (f"?thread_ts={thread_ts}&cid={channel}" if thread_ts else "")
+            return {"channel": {"id": channel, "name": channel.lower()}, "ts": ts, "text": text, "permalink": permalink}
+
+        outage = "The deploy to production failed because the certificate expired last night"
+        mock_client.search_messages.return_value = {"messages": {"matches": [
+            match("C1", "6.0", "lunch plans for friday"),
+            match("C1", "5.0", outage),
+            match("C2", "4.0", outage + "!"),  # cross-post
+            match("C1", "3.0", "rolling back the deploy", thread_ts="1.0"),
+            match("C1", "2.0", "deploy rollback done", thread_ts="1.0"),
+            match("C1", "1.5", "deploy is green again", thread_ts="1.0"),
+        ], "total": 6}}
+
+        result = search_slack(SlackSearchRequest(query="deploy certificate", resolve_user_names=False))
+
+        assert "Showing top 4 results" in result
+        assert result.index(outage) < result.index("lunch plans")
+        assert "(+1 similar, also in #c2)" in result
+        assert "(+1 more in thread)" in result
+        assert "deploy is green again" not in result
+
+        with patch('research_agents.tools.settings.search_refine_enabled', False):
+            assert "Showing top 6 results" in search_slack(SlackSearchRequest(query="deploy certificate", resolve_user_names=False))
+
+    @patch('research_agents.tools.get_slack_client')
+    def test_search_slack_batch(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        shared = {"channel": {"id": "C1", "name": "general"}, "ts": "1.0", "text": "deploy failed", "username": "alice"}
+        only_scoped = {"channel": {"id": "C2", "name": "sdk-go"}, "ts": "2.0", "text": "go deploy", "username": "bob"}
+
+        def search_messages(**kwargs):
+            matches = [shared, only_scoped] if "in:#sdk-go" in kwargs["query"] else [shared]
+            return {"messages": {"matches": matches, "total": len(matches)}}
+        mock_client.search_messages.side_effect = search_messages
+
+        result = search_slack_batch(SlackSearchBatchRequest(requests=[
+            SlackSearchRequest(query="deploy", resolve_user_names=False),
+            SlackSearchRequest(query="deploy", channels="sdk-go", resolve_user_names=False),
+        ]))
+
+        assert mock_client.search_messages.call_count == 2
+        assert "Ran 2 searches: 2 unique messages (3 matches before deduplication)" in result
+        assert "1. [Q1,Q2] #general - alice" in result
+        assert "2. [Q2] #sdk-go - bob" in result
+        assert result.count("deploy failed") == 1
+
+    @patch('research_agents.tools.get_slack_client')
+    def test_search_slack_batch_reports_failed_query(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.search_messages.side_effect = [
+            {"messages": {"matches": [{"channel": {"id": "C1", "name": "general"}, "ts": "1.0", "text": "hi"}], "total": 1}},
+            SlackApiError("error", {"error": "ratelimited"}),
+        ]
+
+        with patch('research_agents.tools.settings.search_fanout_concurrency', 1):
+            result = search_slack_batch(SlackSearchBatchRequest(requests=[
+                SlackSearchRequest(query="one", resolve_user_names=False),
+                SlackSearchRequest(query="two", resolve_user_names=False),
+            ]))
+
+        assert "Q2: Slack API error: ratelimited" in result
+        assert "1. [Q1] #general" in result
+
+    @patch('research_agents.tools.get_slack_client')
+    def test_search_slack_batch_raises_rate_limit_retry(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.search_messages.side_effect = ApplicationError("wait", type="SlackRateLimited")
+
+        # Temporal retries the activity instead of the model reading an error string
+        with pytest.raises(ApplicationError):
+            search_slack_batch(SlackSearchBatchRequest(requests=[SlackSearchRequest(query="one")]))
+
+    def test_fan_out_keeps_caller_context(self):
+        current = contextvars.ContextVar("current")
+        current.set("activity")
+        assert _fan_out(lambda _: current.get(None), [1, 2, 3], 2) == ["activity"] * 3
+
+    def test_search_slack_batch_validation(self):
+        assert "At least one search" in search_slack_batch(SlackSearchBatchRequest(requests=[]))
+        result = search_slack_batch(SlackSearchBatchRequest(requests=[SlackSearchRequest(query="ok"), SlackSearchRequest(query="")]))
+        assert "Q2: Query parameter is required" in result
+
+    @patch('research_agents.tools.get_slack_client')
+    def test_search_slack_served_from_cache(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.search_messages.return_value = {
+            "messages": {"matches": [{"channel": {"name": "general"}, "text": "Hello world"}], "total": 1}
+        }
+
+        search_slack(SlackSearchRequest(query="Deploy  failure", channels="general,random"))
+        # Same normalized query: case, spacing and filter order don't matter
+        cached = search_slack(SlackSearchRequest(query="deploy failure", channels="random, general"))
+        search_slack(SlackSearchRequest(query="deploy failure", channels="general,random", sort="score"))
+
+        assert "Hello world" in cached
+        assert mock_client.search_messages.call_count == 2
+        assert search_cache.stats()["hits"] == 1
+
     def test_search_slack_validation(self):
         # Test empty query
         result = search_slack(SlackSearchRequest(query=""))
@@ -132,6 +360,10 @@ class TestSlackTools:
         # Test invalid sort
         result = search_slack(SlackSearchRequest(query="test", sort="invalid"))
         assert "Sort must be either" in result
+
+        # Test invalid max_results
+        result = search_slack(SlackSearchRequest(query="test", max_results=5000))
+        assert "max_results must be between" in result
     
     @patch('research_agents.tools.get_slack_client')
     def test_get_thread_messages(self, mock_get_client):
@@ -160,16 +392,159 @@ class TestSlackTools:
         
         # Call function
         thread_url = "https://workspace.slack.com/archives/C123/p1234567890000000"
-        result = get_thread_messages(ThreadInput(thread_url=thread_url))
+        result = get_thread_messages(ThreadInput(thread_url=thread_url, resolve_user_names=False))
         
         # Assertions
         mock_client.conversations_replies.assert_called_once_with(
             channel="C123", 
-            ts="1234567890.000000"
+            ts="1234567890.000000",
+            limit=200
         )
         assert len(result) == 2
         assert result[0]["text"] == "Thread starter"
         assert result[1]["text"] == "Reply 1"
+        assert result[0]["user"] == "U123"
+
+    @patch('research_agents.tools.get_slack_client')
+    def test_get_thread_messages_paginates_and_caches(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        parent = {"text": "Thread starter", "ts": "1234567890.000000", "reply_count": 2, "latest_reply": "1234567892.000000"}
+        mock_client.conversations_replies.side_effect = [
+            {"messages": [parent, {"text": "Reply 1", "ts": "1234567891.000000"}], "response_metadata": {"next_cursor": "page2"}},
+            {"messages": [parent, {"text": "Reply 2", "ts": "1234567892.000000"}]},
+            # Unchanged parent: served from cache
+            {"messages": [parent]},
+            # New reply: fetched again
+            {"messages": [{**parent, "reply_count": 3, "latest_reply": "1234567893.000000"}]},
+            {"messages": [parent, {"text": "Reply 3", "ts": "1234567893.000000"}]},
+        ]
+        thread_url = "https://workspace.slack.com/archives/C123/p1234567890000000"
+
+        result = get_thread_messages(ThreadInput(thread_url=thread_url, resolve_user_names=False))
+        assert [msg["text"] for msg in result] == ["Thread starter", "Reply 1", "Reply 2"]
+        assert mock_client.conversations_replies.call_args_list[1].kwargs["cursor"] == "page2"
+
+        result = get_thread_messages(ThreadInput(thread_url=thread_url, resolve_user_names=False))
+        assert [msg["text"] for msg in result] == ["Thread starter", "Reply 1", "Reply 2"]
+        assert mock_client.conversations_replies.call_args_list[2].kwargs["limit"] == 1
+
+        result = get_thread_messages(ThreadInput(thread_url=thread_url, resolve_user_names=False))
+        assert [msg["text"] for msg in result] == ["Thread starter", "Reply 3"]
+        assert mock_client.conversations_replies.call_count == 5
+
+    @patch('research_agents.tools.get_slack_client')
+    def test_get_thread_messages_max_chars(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        replies = [{"text": f"Reply {i} " + "filler " * 10, "ts": f"12345678{i:02d}.000000"} for i in range(1, 21)]
+        replies[4]["text"] = "The deploy failed because of the expired certificate"
+        mock_client.conversations_replies.return_value = {
+            "messages": [{"text": "Why did the deploy fail? " * 40, "ts": "1234567800.000000"}, *replies]
+        }
+
+        thread_url = "https://workspace.slack.com/archives/C123/p1234567800000000"
+        result = get_thread_messages(ThreadInput(
+            thread_url=thread_url, max_chars=600, query="certificate deploy", resolve_user_names=False
+        ))
+
+        texts = [msg["text"] for msg in result]
+        assert sum(len(text) for text in texts if not text.startswith("[")) <= 600
+        assert texts[0].startswith("Why did the deploy fail?") and texts[0].endswith("…")
+        assert texts[1] == "[4 replies omitted]"
+        assert texts[2] == "The deploy failed because of the expired certificate"
+        assert texts[-3:] == [replies[-3]["text"], replies[-2]["text"], replies[-1]["text"]]
+        assert texts[3] == "[12 replies omitted]"
+
+        # Short threads come back untouched
+        mock_client.conversations_replies.return_value = {"messages": replies[:2]}
+        thread_cache.clear()
+        result = get_thread_messages(ThreadInput(thread_url=thread_url, max_chars=600, resolve_user_names=False))
+        assert len(result) == 2
+
+    @patch('research_agents.tools.get_slack_client')
+    def test_get_threads(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.users_list.return_value = {
+            "members": [{"id": "U123", "profile": {"display_name": "alice"}}, {"id": "U456", "real_name": "Bob"}]
+        }
+
+        def replies(channel, ts, limit):
+            if channel == "C999":
+                raise SlackApiError("error", {"error": "channel_not_found"})
+            user = "U123" if channel == "C123" else "U456"
+            return {"messages": [{"text": f"Starter in {channel}", "user": user, "ts": ts}]}
+
+        mock_client.conversations_replies.side_effect = replies
+        first = "https://workspace.slack.com/archives/C123/p1234567890000000"
+        second = "https://workspace.slack.com/archives/C456/p1234567891000000"
+        missing = "https://workspace.slack.com/archives/C999/p1234567892000000"
+
+        result = get_threads(GetThreadsRequest(thread_urls=[first, second, first, missing, "https://invalid.url"]))
+
+        assert list(result) == [first, second, missing, "https://invalid.url"]
+        assert result[first][0]["text"] == "Starter in C123"
+        assert result[first][0]["user"] == "alice"
+        assert result[second][0]["user"] == "Bob"
+        assert result[missing] == "Slack API error: channel_not_found"
+        assert result["https://invalid.url"] == "Invalid Slack thread URL format"
+        assert mock_client.conversations_replies.call_count == 3
+        mock_client.users_list.assert_called_once()
+
+    def test_get_threads_validation(self):
+        assert "At least one thread URL" in get_threads(GetThreadsRequest(thread_urls=[]))
+        urls = [f"https://workspace.slack.com/archives/C123/p12345678{i:02d}000000" for i in range(16)]
+        assert "At most 15 threads" in get_threads(GetThreadsRequest(thread_urls=urls))
+
+    @patch('research_agents.tools.get_slack_client')
+    def test_get_thread_messages_resolves_user_names(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.users_list.return_value = {
+            "members": [
+                {"id": "U123", "profile": {"display_name": "alice"}},
+                {"id": "U456", "real_name": "Bob"},
+            ]
+        }
+        mock_client.conversations_replies.return_value = {
+            "messages": [
+                {"text": "Can <@U456> take a look?", "user": "U123", "ts": "1234567890.000000"},
+                {"text": "On it <@U123|alice>, cc <@U999>", "user": "U456", "ts": "1234567891.000000"},
+            ]
+        }
+        mock_client.users_info.return_value = {"user": {"real_name": "Carol"}}
+
+        thread_url = "https://workspace.slack.com/archives/C123/p1234567890000000"
+        result = get_thread_messages(ThreadInput(thread_url=thread_url))
+
+        assert result[0]["user"] == "alice"
+        assert result[0]["text"] == "Can @Bob take a look?"
+        assert result[1]["user"] == "Bob"
+        assert result[1]["text"] == "On it @alice, cc @Carol"
+        mock_client.users_info.assert_called_once_with(user="U999")
+
+    @patch('research_agents.tools.get_slack_client')
+    def test_search_slack_resolves_user_names(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.users_list.return_value = {"members": [{"id": "U123", "profile": {"display_name": "alice"}}]}
+        mock_client.search_messages.return_value = {
+            "messages": {
+                "matches": [{"user": "U123", "username": "alice.smith", "channel": {"name": "general"}, "text": "ping <@U123>"}],
+                "total": 1,
+                "pagination": {}
+            }
+        }
+
+        result = search_slack(SlackSearchRequest(query="ping"))
+
+        assert "#general - alice" in result
+        assert "ping @alice" in result
+
+        result = search_slack(SlackSearchRequest(query="ping", resolve_user_names=False))
+        assert "#general - alice.smith" in result
+        assert "<@U123>" in result
     
     @patch('research_agents.tools.get_slack_client')
     def test_get_thread_messages_invalid_url(self, mock_get_client):
@@ -187,6 +562,7 @@ class TestSlackTools:
         mock_get_client.return_value = mock_client
         
         # Mock response data
+        mock_client.users_list.return_value = {"members": []}
         mock_response = {
             "user": {
                 "id": "U123",
@@ -202,11 +578,41 @@ class TestSlackTools:
         # Assertions
         mock_client.users_info.assert_called_once_with(user="U123")
         assert result == "display_name"
-    
-    def test_format_search_results(self):
+
+        # Fetched users are merged into the directory
+        assert get_user_name(GetUserNameRequest(user_id="U123")) == "display_name"
+        mock_client.users_info.assert_called_once()
+
+    @patch('research_agents.tools.get_slack_client')
+    def test_get_user_names(self, mock_get_client):
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.users_list.side_effect = [
+            {
+                "members": [{"id": "U1", "profile": {"display_name": "alice"}}],
+                "response_metadata": {"next_cursor": "page2"}
+            },
+            {
+                "members": [{"id": "U2", "real_name": "Bob Smith", "profile": {"display_name": ""}}]
+            },
+        ]
+        mock_client.users_info.return_value = {"user": {"profile": {"real_name": "New Hire"}}}
+
+        result = get_user_names(GetUserNamesRequest(user_ids=["U1", "U2", "U1", "U3"]))
+
+        assert result == {"U1": "alice", "U2": "Bob Smith", "U3": "New Hire"}
+        assert mock_client.users_list.call_count == 2
+        mock_client.users_info.assert_called_once_with(user="U3")
+
+        # Common case: everything is served from the directory
+        assert get_user_names(GetUserNamesRequest(user_ids=["U2", "U3"])) == {"U2": "Bob Smith", "U3": "New Hire"}
+        assert mock_client.users_list.call_count == 2
+        mock_client.users_info.assert_called_once()
+
+    def testformat_search_results(self):
         # Test with empty results
         empty_result = SlackSearchResult(query="test", total=0, matches=[])
-        formatted = _format_search_results(empty_result)
+        formatted = format_search_results(empty_result)
         assert "No messages found" in formatted
         
         # Test with results
@@ -227,7 +633,7 @@ class TestSlackTools:
             }
         ]
         result = SlackSearchResult(query="test", total=10, matches=matches, has_more=True)
-        formatted = _format_search_results(result)
+        formatted = format_search_results(result)
         
         # Assertions
         assert "Found 10 messages for query" in formatted